@@ -0,0 +1 @@
+"""Sdílené moduly kolektoru (fce_*). Balíček nic neimportuje, moduly se načítají až při použití."""
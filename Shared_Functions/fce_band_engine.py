@@ -0,0 +1,153 @@
+"""
+Vektorizovaná agregace order booku do cenových pásem.
+
+Pásma se zadávají stejně jako v původních funkcích - seznam {"min", "max", "label"}
+se vzdáleností od aktuální ceny v procentech (nebo v bps). Asks používají uzavřený
+interval min <= d <= max, bids polouzavřený min <= d < max; při překryvu vyhrává
+pásmo s nižším "max" (asks) resp. nižším "min" (bids), stejně jako první shoda
+v původních cyklech.
+"""
+
+import numpy as np
+
+MEDIUM_LEVELS = {
+    "asks": [
+        {"min": 0, "max": 0.25, "label": "0-0.25%"},
+        {"min": 0.25, "max": 1, "label": "0.25-1%"}
+    ],
+    "bids": [
+        {"min": -0.25, "max": 0, "label": "0 to -0.25%"},
+        {"min": -1, "max": -0.25, "label": "-0.25 to -1%"}
+    ]
+}
+
+LARGE_LEVELS = {
+    "asks": [
+        {"min": 0, "max": 0.5, "label": "0-0.5%"},
+        {"min": 0.5, "max": 1.5, "label": "0.5-1.5%"},
+        {"min": 1.5, "max": 3, "label": "1.5-3%"}
+    ],
+    "bids": [
+        {"min": -0.5, "max": 0, "label": "0 to -0.5%"},
+        {"min": -1.5, "max": -0.5, "label": "-0.5 to -1.5%"},
+        {"min": -3, "max": -1.5, "label": "-1.5 to -3%"}
+    ]
+}
+
+UNIT_SCALE = {"percent": 100.0, "bps": 10000.0}
+
+
+def aggregate_bands(prices, quantities, current_price, level_ranges, is_asks=True, unit="percent",
+                    quantities_are_notional=False):
+    """
+    Rozdělí úrovně order booku do pásem jedním vektorizovaným průchodem.
+
+    Args:
+        prices (np.ndarray): Ceny úrovní (float64)
+        quantities (np.ndarray): Množství v base assetu, nebo notional pokud quantities_are_notional
+        current_price (float): Referenční cena, vůči které se počítá vzdálenost
+        level_ranges (list): Pásma [{"min", "max", "label"}, ...]
+        is_asks (bool): True pro asks, False pro bids
+        unit (str): Jednotka min/max - "percent" nebo "bps"
+        quantities_are_notional (bool): True pokud quantities už jsou v quote měně
+
+    Returns:
+        dict: {"labels", "best_price", "notional", "count"} v pořadí level_ranges;
+              best_price je NaN pro prázdná pásma
+    """
+    prices = np.asarray(prices, dtype=np.float64)
+    quantities = np.asarray(quantities, dtype=np.float64)
+    current_price = float(current_price)
+    band_count = len(level_ranges)
+
+    mins = np.array([level["min"] for level in level_ranges], dtype=np.float64)
+    maxs = np.array([level["max"] for level in level_ranges], dtype=np.float64)
+
+    notional = quantities if quantities_are_notional else quantities * prices
+    price_diff = ((prices - current_price) / current_price) * UNIT_SCALE[unit]
+
+    if is_asks:
+        order = np.argsort(maxs, kind="stable")
+        position = np.searchsorted(maxs[order], price_diff, side="left")
+        in_range = position < band_count
+        position = np.minimum(position, band_count - 1)
+        in_range &= price_diff >= mins[order][position]
+    else:
+        order = np.argsort(mins, kind="stable")
+        position = np.searchsorted(mins[order], price_diff, side="right") - 1
+        in_range = position >= 0
+        position = np.maximum(position, 0)
+        in_range &= price_diff < maxs[order][position]
+
+    band_index = order[position[in_range]]
+    band_prices = prices[in_range]
+
+    total_notional = np.bincount(band_index, weights=notional[in_range], minlength=band_count)
+    level_count = np.bincount(band_index, minlength=band_count)
+    if is_asks:
+        best_price = np.full(band_count, np.inf)
+        np.minimum.at(best_price, band_index, band_prices)
+    else:
+        best_price = np.full(band_count, -np.inf)
+        np.maximum.at(best_price, band_index, band_prices)
+    best_price[level_count == 0] = np.nan
+
+    return {
+        "labels": [level["label"] for level in level_ranges],
+        "best_price": best_price,
+        "notional": total_notional,
+        "count": level_count
+    }
+
+
+def bands_to_levels(bands, is_asks=True):
+    """
+    Převede výsledek aggregate_bands na formát původních funkcí.
+
+    Returns:
+        list: [(best_price, quantity_usd, level_label), ...] jen neprázdná pásma,
+              asks seřazené vzestupně, bids sestupně
+    """
+    result = [
+        (float(best_price), float(notional), label)
+        for label, best_price, notional, count in zip(
+            bands["labels"], bands["best_price"], bands["notional"], bands["count"]
+        )
+        if count
+    ]
+    return sorted(result, key=lambda x: x[0], reverse=not is_asks)
+
+
+def aggregate_levels(prices, quantities, current_price, levels, is_asks=True, quantities_are_notional=False):
+    """
+    Agreguje jednu stranu booku zadanou poli cen a množství podle předvolby pásem.
+
+    Returns:
+        list: Seznam agregovaných úrovní [(price, quantity_usd, level_label), ...]
+    """
+    bands = aggregate_bands(
+        prices,
+        quantities,
+        current_price,
+        levels["asks"] if is_asks else levels["bids"],
+        is_asks,
+        quantities_are_notional=quantities_are_notional
+    )
+    return bands_to_levels(bands, is_asks)
+
+
+def aggregate_orders(orders, current_price, levels, is_asks=True):
+    """
+    Agreguje seznam objednávek [[price, quantity], ...] podle předvolby pásem.
+
+    Args:
+        orders (list | np.ndarray): Objednávky ve formátu [[price, quantity], ...]
+        current_price (float): Aktuální cena (procenta se počítají vůči ní)
+        levels (dict): Předvolba pásem {"asks": [...], "bids": [...]}
+        is_asks (bool): True pro asks, False pro bids
+
+    Returns:
+        list: Seznam agregovaných úrovní [(price, quantity_usd, level_label), ...]
+    """
+    orders = np.asarray(orders, dtype=np.float64).reshape(-1, 2)
+    return aggregate_levels(orders[:, 0], orders[:, 1], current_price, levels, is_asks)
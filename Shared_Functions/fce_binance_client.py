@@ -0,0 +1,273 @@
+"""
+Sdílený HTTP klient pro Binance REST API.
+
+Jedna aiohttp session na proces (pool spojení, keep-alive, DNS cache), timeouty
+na jednotlivý request i na celkový deadline včetně opakování, opakování s
+náhodným (jitter) exponenciálním čekáním a hlídání request weight, abychom se
+sami přibrzdili dřív, než Binance vrátí 429/418.
+
+Na 429 se čeká podle Retry-After, jen pokud to stihne deadline volajícího.
+418 (ban IP) se neopakuje - během banu všechny requesty hned selžou, jinak by
+jeden ban zdržel běh timeru o celé Retry-After.
+"""
+
+import asyncio
+import json
+import logging
+import os
+import random
+import time
+
+import aiohttp
+
+from Shared_Functions.fce_metrics import span
+
+BINANCE_BASE_URL = os.environ.get("BINANCE_BASE_URL", "https://api.binance.com")
+
+# Binance limit REQUEST_WEIGHT je 6000 za minutu na IP, necháváme si rezervu
+WEIGHT_LIMIT_1M = int(os.environ.get("BINANCE_WEIGHT_LIMIT_1M", "6000"))
+WEIGHT_SAFETY_RATIO = 0.8
+USED_WEIGHT_HEADER = "X-MBX-USED-WEIGHT-1M"
+
+POOL_SIZE = 20
+DNS_CACHE_TTL = 300
+KEEPALIVE_TIMEOUT = 60
+CONNECT_TIMEOUT = 3
+REQUEST_TIMEOUT = 10
+MAX_RETRIES = 3
+BACKOFF_BASE = 0.25
+BACKOFF_CAP = 4
+
+RETRYABLE_STATUSES = {429, 500, 502, 503, 504}
+IP_BAN_STATUS = 418
+
+_SESSION = None
+_SESSION_LOOP = None
+_WEIGHT_TRACKER = None
+
+
+class BinanceAPIError(Exception):
+    def __init__(self, status, message):
+        super().__init__(f"Binance API returned {status}: {message}")
+        self.status = status
+
+
+def endpoint_weight(path, params=None):
+    """Vrátí request weight endpointu podle dokumentace Binance Spot API."""
+    params = params or {}
+    if path == "/api/v3/depth":
+        limit = int(params.get("limit", 100))
+        if limit <= 100:
+            return 5
+        if limit <= 500:
+            return 25
+        if limit <= 1000:
+            return 50
+        return 250
+    if path == "/api/v3/trades":
+        return 25
+    if path == "/api/v3/aggTrades":
+        return 4
+    if path == "/api/v3/ticker/price":
+        return 2 if "symbol" in params else 4
+    return 1
+
+
+class WeightTracker:
+    """
+    Počítá spotřebovanou váhu v aktuálním minutovém okně.
+
+    Před každým requestem se váha rezervuje; pokud by překročila limit
+    (s bezpečnostní rezervou), request počká na další minutu. Hodnota z hlavičky
+    X-MBX-USED-WEIGHT-1M má přednost, protože zahrnuje i ostatní procesy na stejné IP.
+    """
+
+    def __init__(self, limit=WEIGHT_LIMIT_1M, safety_ratio=WEIGHT_SAFETY_RATIO, clock=time.time):
+        self.limit = limit
+        self.budget = int(limit * safety_ratio)
+        self.used = 0
+        # 429: requesty čekají do konce; 418: requesty hned selžou
+        self.banned_until = 0.0
+        self.ip_banned_until = 0.0
+        self._clock = clock
+        self._window = self._current_window()
+        self._lock = asyncio.Lock()
+
+    def _current_window(self):
+        return int(self._clock() // 60)
+
+    def _roll(self):
+        window = self._current_window()
+        if window != self._window:
+            self._window = window
+            self.used = 0
+
+    def _seconds_to_next_window(self):
+        return (self._window + 1) * 60 - self._clock()
+
+    async def acquire(self, weight):
+        async with self._lock:
+            while True:
+                self.raise_if_ip_banned()
+                now = self._clock()
+                if now < self.banned_until:
+                    wait = self.banned_until - now
+                elif weight > self.budget:
+                    # Request dražší než celý rozpočet nejde rozdělit, pustíme ho v novém okně
+                    self._roll()
+                    if self.used == 0:
+                        self.used = weight
+                        return
+                    wait = self._seconds_to_next_window()
+                else:
+                    self._roll()
+                    if self.used + weight <= self.budget:
+                        self.used += weight
+                        return
+                    wait = self._seconds_to_next_window()
+                logging.warning(f"Binance request weight {self.used}/{self.limit} used, throttling for {wait:.1f}s")
+                await asyncio.sleep(max(wait, 0.01))
+
+    def update_from_headers(self, headers):
+        used = headers.get(USED_WEIGHT_HEADER)
+        if used is not None:
+            self._roll()
+            self.used = max(self.used, int(used))
+
+    def ban(self, seconds, ip_ban=False):
+        if ip_ban:
+            self.ip_banned_until = max(self.ip_banned_until, self._clock() + seconds)
+        else:
+            self.banned_until = max(self.banned_until, self._clock() + seconds)
+
+    def ban_remaining(self):
+        """Sekundy do konce čekání po 429, 0 pokud se nečeká."""
+        return max(0.0, self.banned_until - self._clock())
+
+    def raise_if_ip_banned(self):
+        remaining = self.ip_banned_until - self._clock()
+        if remaining > 0:
+            raise BinanceAPIError(IP_BAN_STATUS, f"IP banned for another {remaining:.0f}s, not sending requests")
+
+
+def get_weight_tracker():
+    global _WEIGHT_TRACKER
+    if _WEIGHT_TRACKER is None:
+        _WEIGHT_TRACKER = WeightTracker()
+    return _WEIGHT_TRACKER
+
+
+async def get_session():
+    """Vrátí procesní aiohttp session, při změně event loopu ji vytvoří znovu."""
+    global _SESSION, _SESSION_LOOP
+    loop = asyncio.get_running_loop()
+    if _SESSION is None or _SESSION.closed or _SESSION_LOOP is not loop:
+        connector = aiohttp.TCPConnector(
+            limit=POOL_SIZE,
+            ttl_dns_cache=DNS_CACHE_TTL,
+            keepalive_timeout=KEEPALIVE_TIMEOUT,
+            enable_cleanup_closed=True
+        )
+        _SESSION = aiohttp.ClientSession(
+            base_url=BINANCE_BASE_URL,
+            connector=connector,
+            timeout=aiohttp.ClientTimeout(total=REQUEST_TIMEOUT, connect=CONNECT_TIMEOUT),
+            raise_for_status=False
+        )
+        _SESSION_LOOP = loop
+        # asyncio.Lock je vázaný na event loop, ve kterém byl poprvé použit
+        get_weight_tracker()._lock = asyncio.Lock()
+    return _SESSION
+
+
+async def close_session():
+    global _SESSION, _SESSION_LOOP
+    if _SESSION is not None and not _SESSION.closed:
+        await _SESSION.close()
+    _SESSION = None
+    _SESSION_LOOP = None
+
+
+def _backoff_delay(attempt):
+    return random.uniform(0, min(BACKOFF_CAP, BACKOFF_BASE * 2 ** attempt))
+
+
+async def binance_request(path, params=None, weight=None, timeout=REQUEST_TIMEOUT, deadline=None,
+                          retries=MAX_RETRIES):
+    """
+    Provede GET request na Binance a vrátí tělo odpovědi jako bytes.
+
+    Args:
+        path (str): Cesta endpointu, např. "/api/v3/depth"
+        params (dict): Query parametry
+        weight (int): Request weight, pokud None, určí se podle endpoint_weight
+        timeout (float): Timeout jednoho pokusu v sekundách
+        deadline (float): Celkový čas v sekundách na všechny pokusy včetně čekání
+        retries (int): Maximální počet opakování
+
+    Returns:
+        bytes: Tělo odpovědi
+    """
+    params = params or {}
+    weight = endpoint_weight(path, params) if weight is None else weight
+    with span("http.fetch", endpoint=path, symbol=params.get("symbol"), weight=weight) as fetch_span:
+        body = await _request_with_retries(path, params, weight, timeout, deadline, retries)
+        fetch_span.set(bytes_in=len(body))
+    return body
+
+
+async def _request_with_retries(path, params, weight, timeout, deadline, retries):
+    tracker = get_weight_tracker()
+    deadline_at = time.monotonic() + deadline if deadline is not None else None
+    attempt = 0
+
+    while True:
+        attempt_timeout = timeout
+        if deadline_at is not None:
+            attempt_timeout = min(timeout, deadline_at - time.monotonic())
+            if attempt_timeout <= 0:
+                raise asyncio.TimeoutError(f"Deadline exceeded for {path}")
+
+        # Ban IP (418) ani čekání po 429 přes deadline nemá smysl odsedět
+        tracker.raise_if_ip_banned()
+        if deadline_at is not None and time.monotonic() + tracker.ban_remaining() >= deadline_at:
+            raise asyncio.TimeoutError(f"Rate limited for {tracker.ban_remaining():.1f}s, beyond the deadline for {path}")
+
+        retry_after = None
+        try:
+            session = await get_session()
+            # Čekání na rozpočet váhy se nepočítá do timeoutu pokusu, jen do celkového deadline
+            throttle_timeout = deadline_at - time.monotonic() if deadline_at is not None else None
+            await asyncio.wait_for(tracker.acquire(weight), throttle_timeout)
+            if deadline_at is not None:
+                attempt_timeout = min(timeout, deadline_at - time.monotonic())
+            async with session.get(path, params=params,
+                                   timeout=aiohttp.ClientTimeout(total=attempt_timeout,
+                                                                 connect=CONNECT_TIMEOUT)) as response:
+                tracker.update_from_headers(response.headers)
+                body = await response.read()
+                if response.status == 200:
+                    return body
+                if response.status in (429, IP_BAN_STATUS):
+                    retry_after = float(response.headers.get("Retry-After", 60))
+                    tracker.ban(retry_after, ip_ban=response.status == IP_BAN_STATUS)
+                error = BinanceAPIError(response.status, body[:200].decode("utf-8", "replace"))
+                if response.status not in RETRYABLE_STATUSES:
+                    raise error
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            error = e
+
+        if attempt >= retries:
+            raise error
+        delay = retry_after if retry_after is not None else _backoff_delay(attempt)
+        if deadline_at is not None and time.monotonic() + delay >= deadline_at:
+            raise error
+        logging.warning(f"Binance request {path} failed ({error!r}), retry {attempt + 1}/{retries} in {delay:.2f}s")
+        await asyncio.sleep(delay)
+        attempt += 1
+
+
+async def binance_get(path, params=None, **kwargs):
+    """Stejné jako binance_request, ale vrací dekódovaný JSON."""
+    body = await binance_request(path, params, **kwargs)
+    return json.loads(body)
@@ -0,0 +1,185 @@
+import csv
+import logging
+import os
+from io import StringIO
+
+from Shared_Functions.fce_metrics import span
+
+APPEND_BLOB_TYPE = "AppendBlob"
+# Limit velikosti jednoho append_block v Azure Blob Storage
+APPEND_BLOCK_MAX_BYTES = 4 * 1024 * 1024
+# Kolik bajtů ze začátku blobu se stáhne pro kontrolu CSV hlavičky
+HEADER_PROBE_BYTES = 4096
+
+# Dočasná kopie nového obsahu při přepisu blobu, viz replace_with_append_blob
+STAGING_SUFFIX = ".staging"
+
+# (container, blob) -> ověřená CSV hlavička; kontroluje se jednou za proces
+_CHECKED_HEADERS = {}
+# (container, blob) bez nedokončeného přepisu; kontroluje se jednou za proces
+_CHECKED_STAGING = set()
+
+
+async def append_blocks(blob_client, data):
+    """Připojí data po blocích nejvýš APPEND_BLOCK_MAX_BYTES."""
+    for start in range(0, len(data), APPEND_BLOCK_MAX_BYTES):
+        await blob_client.append_block(data[start:start + APPEND_BLOCK_MAX_BYTES])
+
+
+def staging_blob_name(blob_name):
+    return blob_name + STAGING_SUFFIX
+
+
+async def replace_with_append_blob(container_client, blob_name, data):
+    """
+    Nahradí obsah blobu append blobem s daty.
+
+    create_append_blob původní blob zkrátí na nulu a obsah se pak připojuje po
+    blocích, proto se data nejdřív nahrají jedním uploadem do <blob>.staging,
+    který se smaže až po posledním bloku. Přepis přerušený chybou nebo pádem
+    dokončí recover_staged_blob při dalším zápisu do blobu.
+    """
+    key = (container_client.container_name, blob_name)
+    await container_client.get_blob_client(staging_blob_name(blob_name)).upload_blob(data, overwrite=True)
+    # Než přepis doběhne, další zápis musí blob nejdřív obnovit ze staging kopie
+    _CHECKED_STAGING.discard(key)
+    await _swap_staged(container_client, blob_name, data)
+    _CHECKED_STAGING.add(key)
+
+
+async def recover_staged_blob(container_client, blob_name):
+    """Dokončí přepis blobu přerušený po nahrání staging kopie (jednou za proces a blob)."""
+    key = (container_client.container_name, blob_name)
+    if key in _CHECKED_STAGING:
+        return
+    staging_client = container_client.get_blob_client(staging_blob_name(blob_name))
+    if await staging_client.exists():
+        logging.warning(f"Restoring {blob_name} from interrupted rewrite {staging_client.blob_name}")
+        downloader = await staging_client.download_blob()
+        await _swap_staged(container_client, blob_name, await downloader.readall())
+    _CHECKED_STAGING.add(key)
+
+
+async def _swap_staged(container_client, blob_name, data):
+    blob_client = container_client.get_blob_client(blob_name)
+    await blob_client.create_append_blob()
+    await append_blocks(blob_client, data)
+    await container_client.get_blob_client(staging_blob_name(blob_name)).delete_blob()
+
+
+async def ensure_append_blob(container_client, blob_name):
+    """
+    Zajistí, že blob existuje a je typu AppendBlob.
+
+    Soubory zapsané dřívější verzí (download -> concat -> upload) jsou block bloby,
+    do kterých nelze přidávat. Takový blob se jednorázově převede na append blob
+    se stejným obsahem (přes staging kopii, viz replace_with_append_blob).
+
+    Returns:
+        bool: True pokud je blob prázdný - nově vytvořený, nebo existující
+              po nepovedeném prvním appendu (hlavička ještě chybí)
+    """
+    await recover_staged_blob(container_client, blob_name)
+    blob_client = container_client.get_blob_client(blob_name)
+    if not await blob_client.exists():
+        await blob_client.create_append_blob()
+        return True
+
+    properties = await blob_client.get_blob_properties()
+    if properties.blob_type != APPEND_BLOB_TYPE:
+        logging.info(f"Converting {blob_name} from {properties.blob_type} to {APPEND_BLOB_TYPE}")
+        downloader = await blob_client.download_blob()
+        existing_content = await downloader.readall()
+        await replace_with_append_blob(container_client, blob_name, existing_content)
+        return not existing_content
+    return properties.size == 0
+
+
+async def append_bytes(container_client, blob_name, data, header=b""):
+    """
+    Přidá data na konec append blobu. Po síti jdou jen nové bajty.
+
+    Args:
+        container_client: ContainerClient (azure.storage.blob.aio) nebo LocalContainerClient
+        blob_name (str): Název blobu
+        data (bytes): Data k připojení
+        header (bytes): Data zapsaná pouze při vytvoření blobu (např. CSV hlavička)
+
+    Returns:
+        int: Počet odeslaných bajtů
+    """
+    with span("blob.append", blob=blob_name) as append_span:
+        created = await ensure_append_blob(container_client, blob_name)
+        blob_client = container_client.get_blob_client(blob_name)
+        payload = header + data if created else data
+        await append_blocks(blob_client, payload)
+        append_span.set(bytes_out=len(payload))
+    return len(payload)
+
+
+async def append_csv(container_client, blob_name, csv_data, encoding="utf-8"):
+    """
+    Připojí CSV text (včetně hlavičky) k dennímu souboru.
+
+    Hlavička se zapíše jen do nového souboru, u existujícího se přidají pouze řádky.
+    Pokud má existující soubor jinou hlavičku (např. v den nasazení nových
+    sloupců), přepíše se nejdřív na novou hlavičku (rewrite_csv_columns).
+
+    Returns:
+        int: Počet odeslaných bajtů
+    """
+    header, _, body = csv_data.partition("\n")
+    await ensure_csv_header(container_client, blob_name, header, encoding)
+    return await append_bytes(
+        container_client,
+        blob_name,
+        body.encode(encoding),
+        header=(header + "\n").encode(encoding)
+    )
+
+
+async def ensure_csv_header(container_client, blob_name, header, encoding="utf-8"):
+    """
+    Zajistí, že existující CSV soubor má stejnou hlavičku jako připojované řádky.
+
+    Kontroluje se jednou za proces a soubor (stáhne se jen začátek blobu).
+    """
+    key = (container_client.container_name, blob_name)
+    if _CHECKED_HEADERS.get(key) == header:
+        return
+    # Přerušený přepis se musí dokončit dřív, než se čte hlavička zkráceného blobu
+    await recover_staged_blob(container_client, blob_name)
+    blob_client = container_client.get_blob_client(blob_name)
+    if await blob_client.exists():
+        downloader = await blob_client.download_blob(offset=0, length=HEADER_PROBE_BYTES)
+        existing = (await downloader.readall()).split(b"\n", 1)[0].decode(encoding)
+        if existing and existing.rstrip("\r") != header.rstrip("\r"):
+            await rewrite_csv_columns(container_client, blob_name, header, encoding)
+    _CHECKED_HEADERS[key] = header
+
+
+async def rewrite_csv_columns(container_client, blob_name, header, encoding="utf-8"):
+    """
+    Přepíše CSV soubor na sloupce z nové hlavičky.
+
+    Hodnoty se přenesou podle názvu sloupce beze změny textu, nové sloupce
+    zůstanou u starých řádků prázdné (NaN po načtení), zrušené sloupce se
+    vynechají. Výsledek je append blob zapsaný přes staging kopii
+    (replace_with_append_blob), takže chyba uprostřed přepisu den neztratí.
+    """
+    downloader = await container_client.get_blob_client(blob_name).download_blob()
+    rows = csv.reader(StringIO((await downloader.readall()).decode(encoding)))
+    old_columns = next(rows, [])
+    new_columns = next(csv.reader([header.rstrip("\r")]))
+    positions = [old_columns.index(column) if column in old_columns else None for column in new_columns]
+
+    output = StringIO()
+    writer = csv.writer(output, lineterminator=os.linesep)
+    writer.writerow(new_columns)
+    rewritten = 0
+    for row in rows:
+        writer.writerow(["" if position is None or position >= len(row) else row[position] for position in positions])
+        rewritten += 1
+
+    logging.warning(f"Rewriting {blob_name} from columns {old_columns} to {new_columns} ({rewritten} rows)")
+    await replace_with_append_blob(container_client, blob_name, output.getvalue().encode(encoding))
@@ -0,0 +1,96 @@
+"""
+Lokální cache stažených blobů s omezenou velikostí a LRU vyhazováním.
+
+Klíč obsahuje i verzi (etag) blobu, takže přepsaný blob (např. znovu
+zkompaktovaný den, i se stejnou velikostí) se stáhne znovu a stará verze
+časem vypadne.
+"""
+
+import hashlib
+import logging
+import os
+import tempfile
+from collections import OrderedDict
+
+DEFAULT_CACHE_DIR = os.environ.get("LIQUIDITY_CACHE_DIR", os.path.join(tempfile.gettempdir(), "liquidity_cache"))
+DEFAULT_MAX_BYTES = int(os.environ.get("LIQUIDITY_CACHE_MAX_BYTES", str(512 * 1024 * 1024)))
+
+
+class LocalBlobCache:
+    def __init__(self, root=DEFAULT_CACHE_DIR, max_bytes=DEFAULT_MAX_BYTES):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(root, exist_ok=True)
+        # Soubory z minulých běhů procesu seřazené od nejdéle nepoužitého
+        entries = []
+        for filename in os.listdir(root):
+            path = os.path.join(root, filename)
+            if os.path.isfile(path) and not filename.endswith(".tmp"):
+                entries.append((os.path.getmtime(path), filename, os.path.getsize(path)))
+        self._entries = OrderedDict((filename, size) for _, filename, size in sorted(entries))
+        self._total = sum(self._entries.values())
+
+    @staticmethod
+    def cache_key(container_name, blob_name, version):
+        return hashlib.sha1(f"{container_name}/{blob_name}@{version}".encode()).hexdigest()
+
+    @property
+    def total_bytes(self):
+        return self._total
+
+    def get(self, key):
+        if key not in self._entries:
+            self.misses += 1
+            return None
+        path = os.path.join(self.root, key)
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+        except FileNotFoundError:
+            self._total -= self._entries.pop(key)
+            self.misses += 1
+            return None
+        os.utime(path)
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return data
+
+    def put(self, key, data):
+        if len(data) > self.max_bytes:
+            return
+        path = os.path.join(self.root, key)
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+        self._total += len(data) - self._entries.pop(key, 0)
+        self._entries[key] = len(data)
+        self._evict()
+
+    def _evict(self):
+        while self._total > self.max_bytes and self._entries:
+            key, size = self._entries.popitem(last=False)
+            self._total -= size
+            try:
+                os.remove(os.path.join(self.root, key))
+            except FileNotFoundError:
+                pass
+            logging.debug(f"Evicted {key} ({size} bytes) from blob cache")
+
+    async def fetch(self, container_client, blob_name, version):
+        """
+        Vrátí obsah blobu z cache, nebo ho stáhne celý a uloží (bez ranged reads,
+        viz fce_liquidity_query).
+
+        Args:
+            version (str): ETag blobu (z list_blobs nebo manifestu)
+        """
+        key = self.cache_key(container_client.container_name, blob_name, version)
+        data = self.get(key)
+        if data is None:
+            downloader = await container_client.get_blob_client(blob_name).download_blob()
+            data = await downloader.readall()
+            self.put(key, data)
+        return data
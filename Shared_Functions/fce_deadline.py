@@ -0,0 +1,81 @@
+"""
+Časový rozpočet běhu a záložní (hedged) požadavky.
+
+Deadline drží celkový rozpočet jednoho vyvolání funkce, jednotlivé požadavky
+dostávají timeout min(vlastní limit, zbytek rozpočtu). hedged() po hedge_after
+sekundách pošle k opožděnému požadavku druhý stejný a použije ten, který
+doběhne dřív - pomalý request tak neurčuje latenci celého běhu.
+"""
+
+import asyncio
+import time
+
+
+class Deadline:
+    def __init__(self, budget, clock=time.monotonic):
+        self.budget = budget
+        self._clock = clock
+        self._expires_at = clock() + budget
+
+    def remaining(self):
+        return max(0.0, self._expires_at - self._clock())
+
+    @property
+    def expired(self):
+        return self.remaining() <= 0
+
+    def timeout(self, limit=None):
+        """Timeout pro jeden požadavek: limit omezený zbytkem rozpočtu."""
+        remaining = self.remaining()
+        return remaining if limit is None else min(limit, remaining)
+
+
+async def _cancel(tasks):
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+
+
+async def hedged(factory, timeout, hedge_after=None, hedge_factory=None):
+    """
+    Spustí požadavek, po hedge_after sekundách bez výsledku přidá záložní.
+
+    Vrátí první úspěšný výsledek, zbylý požadavek se zruší. Chyba se vyhodí
+    až když selžou všechny spuštěné pokusy.
+
+    Args:
+        factory (callable): Vytvoří coroutine požadavku
+        timeout (float): Celkový čas na výsledek v sekundách
+        hedge_after (float): Kdy poslat záložní požadavek, None/0 = nikdy
+        hedge_factory (callable): Coroutine záložního požadavku, výchozí je factory
+
+    Returns:
+        Výsledek prvního úspěšného požadavku
+
+    Raises:
+        asyncio.TimeoutError: Žádný požadavek nedoběhl do timeoutu
+    """
+    loop = asyncio.get_running_loop()
+    started = loop.time()
+    pending = {loop.create_task(factory())}
+    hedge_at = started + hedge_after if hedge_after and hedge_after < timeout else None
+    error = None
+    try:
+        while pending:
+            now = loop.time()
+            wake_at = started + timeout if hedge_at is None else min(hedge_at, started + timeout)
+            done, pending = await asyncio.wait(pending, timeout=max(0.0, wake_at - now),
+                                               return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task.exception() is None:
+                    return task.result()
+                error = task.exception()
+            if hedge_at is not None and loop.time() >= hedge_at:
+                if pending:
+                    pending.add(loop.create_task((hedge_factory or factory)()))
+                hedge_at = None
+            elif not done and loop.time() >= started + timeout:
+                raise asyncio.TimeoutError(f"No result within {timeout:.2f}s")
+        raise error
+    finally:
+        await _cancel(pending)
@@ -0,0 +1,133 @@
+"""
+Analytika hloubky booku - market impact, slippage a hloubka do vzdálenosti v bps.
+
+Pro každou stranu booku se jednou spočítají kumulativní součty notional a
+množství (prefix sums). Dotaz na velikost příkazu nebo vzdálenost od ceny je
+pak jen binární vyhledávání (searchsorted), O(log n) místo procházení booku.
+"""
+
+from typing import NamedTuple
+
+import numpy as np
+
+# Velikosti market příkazů v USD
+IMPACT_SIZES_USD = (10_000, 25_000, 50_000, 100_000, 250_000, 500_000,
+                    1_000_000, 2_500_000, 5_000_000, 10_000_000)
+# Vzdálenosti od referenční ceny v bps
+DEPTH_DISTANCES_BPS = (5, 10, 25, 50, 100, 200, 500)
+
+
+class SideCurve(NamedTuple):
+    """
+    Kumulativní křivka jedné strany booku.
+
+    keys jsou ceny vzestupně (asks) nebo záporné ceny (bids), aby šlo vždy
+    použít searchsorted. cum_base je kumulativní notional / cena, tedy množství
+    přepočtené stejným kurzem jako notional; průměrná cena = notional / cum_base
+    vychází v cenových jednotkách booku.
+    """
+    prices: np.ndarray
+    keys: np.ndarray
+    cum_notional: np.ndarray
+    cum_base: np.ndarray
+
+
+def build_side_curve(prices, notional, is_asks=True):
+    """
+    Postaví kumulativní křivku ze seřazené strany booku (asks vzestupně, bids sestupně).
+
+    Args:
+        prices (np.ndarray): Ceny úrovní
+        notional (np.ndarray): Notional úrovní (USD)
+        is_asks (bool): True pro asks, False pro bids
+
+    Returns:
+        SideCurve
+    """
+    prices = np.asarray(prices, dtype=np.float64)
+    notional = np.asarray(notional, dtype=np.float64)
+    return SideCurve(
+        prices,
+        prices if is_asks else -prices,
+        np.cumsum(notional),
+        np.cumsum(notional / prices)
+    )
+
+
+def impact_curve(curve, reference_price, sizes=IMPACT_SIZES_USD, is_buy=True):
+    """
+    Průměrná cena plnění a slippage market příkazů daných velikostí.
+
+    Slippage se počítá vůči referenční ceně (mid), včetně poloviny spreadu.
+
+    Args:
+        curve (SideCurve): asks pro nákup, bids pro prodej
+        reference_price (float): Referenční cena
+        sizes (sequence): Velikosti příkazů v USD
+        is_buy (bool): True pro market buy, False pro market sell
+
+    Returns:
+        tuple: (avg_price, slippage_bps) jako np.ndarray; NaN pro velikosti větší než book
+    """
+    sizes = np.asarray(sizes, dtype=np.float64)
+    if len(curve.prices) == 0:
+        empty = np.full(len(sizes), np.nan)
+        return empty, empty.copy()
+
+    # První úroveň, na které kumulativní notional dosáhne velikosti příkazu
+    index = np.searchsorted(curve.cum_notional, sizes, side="left")
+    fillable = index < len(curve.prices)
+    index = np.minimum(index, len(curve.prices) - 1)
+    previous = index - 1
+    prev_notional = np.where(previous >= 0, curve.cum_notional[previous], 0.0)
+    prev_base = np.where(previous >= 0, curve.cum_base[previous], 0.0)
+
+    base = prev_base + (sizes - prev_notional) / curve.prices[index]
+    avg_price = np.where(fillable, sizes / base, np.nan)
+    direction = 1.0 if is_buy else -1.0
+    slippage_bps = direction * (avg_price - reference_price) / reference_price * 10000
+    return avg_price, slippage_bps
+
+
+def depth_within(curve, reference_price, distances_bps=DEPTH_DISTANCES_BPS, is_asks=True):
+    """
+    Notional do dané vzdálenosti od referenční ceny (včetně hranice).
+
+    Returns:
+        np.ndarray: Kumulativní notional pro každou vzdálenost
+    """
+    distances = np.asarray(distances_bps, dtype=np.float64) / 10000
+    if len(curve.keys) == 0:
+        return np.zeros(len(distances))
+    if is_asks:
+        limits = reference_price * (1 + distances)
+    else:
+        limits = -reference_price * (1 - distances)
+    count = np.searchsorted(curve.keys, limits, side="right")
+    return np.where(count > 0, curve.cum_notional[np.maximum(count - 1, 0)], 0.0)
+
+
+def analyze_book(book, sizes=IMPACT_SIZES_USD, distances_bps=DEPTH_DISTANCES_BPS):
+    """
+    Spočítá impact a hloubku pro ConsolidatedBook (fce_book_merge).
+
+    Returns:
+        dict: {"impact": [(side, size_usd, avg_price, slippage_bps), ...],
+               "depth": [(side, distance_bps, depth_usd), ...]}
+              side je "buy"/"sell" pro impact a "ask"/"bid" pro hloubku
+    """
+    asks = build_side_curve(book.ask_prices, book.ask_notional, True)
+    bids = build_side_curve(book.bid_prices, book.bid_notional, False)
+    reference_price = book.reference_price
+
+    impact = []
+    for side, curve, is_buy in (("buy", asks, True), ("sell", bids, False)):
+        avg_price, slippage_bps = impact_curve(curve, reference_price, sizes, is_buy)
+        impact.extend(zip([side] * len(sizes), map(float, sizes), avg_price.tolist(), slippage_bps.tolist()))
+
+    depth = []
+    for side, curve, is_asks in (("ask", asks, True), ("bid", bids, False)):
+        depth_usd = depth_within(curve, reference_price, distances_bps, is_asks)
+        depth.extend(zip([side] * len(distances_bps), map(float, distances_bps), depth_usd.tolist()))
+
+    return {"impact": impact, "depth": depth}
@@ -0,0 +1,58 @@
+"""
+Parser odpovědi /api/v3/depth přímo do numpy polí.
+
+Ceny a množství jdou z JSONu rovnou do souvislých float64 polí bez mezikroku
+přes seznamy [[price, quantity], ...], takže další kroky (agregace do pásem,
+analytika) pracují jen s poli.
+"""
+
+from itertools import chain
+from typing import NamedTuple
+
+import numpy as np
+import orjson
+
+
+class DepthSnapshot(NamedTuple):
+    last_update_id: int
+    bid_prices: np.ndarray
+    bid_qtys: np.ndarray
+    ask_prices: np.ndarray
+    ask_qtys: np.ndarray
+
+    @property
+    def best_bid(self):
+        return float(self.bid_prices[0])
+
+    @property
+    def best_ask(self):
+        return float(self.ask_prices[0])
+
+    @property
+    def mid_price(self):
+        return (self.best_bid + self.best_ask) / 2
+
+
+def levels_to_arrays(levels):
+    """
+    Převede úrovně [["price", "qty"], ...] na dvojici souvislých float64 polí.
+
+    Returns:
+        tuple: (prices, quantities)
+    """
+    flat = np.fromiter(map(float, chain.from_iterable(levels)), dtype=np.float64, count=2 * len(levels))
+    # Jediná kopie: (n, 2) -> (2, n), každý řádek je pak souvislé pole
+    columns = flat.reshape(-1, 2).T.copy()
+    return columns[0], columns[1]
+
+
+def parse_depth(payload):
+    """
+    Dekóduje odpověď /api/v3/depth (bytes nebo str) do DepthSnapshot.
+
+    Bids jsou seřazené sestupně a asks vzestupně, tak jak je vrací Binance.
+    """
+    data = orjson.loads(payload)
+    bid_prices, bid_qtys = levels_to_arrays(data["bids"])
+    ask_prices, ask_qtys = levels_to_arrays(data["asks"])
+    return DepthSnapshot(data.get("lastUpdateId", 0), bid_prices, bid_qtys, ask_prices, ask_qtys)
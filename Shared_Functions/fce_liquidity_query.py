@@ -0,0 +1,152 @@
+"""
+Čtení historických dat likvidity z Parquet výstupu (fce_parquet_store).
+
+Dny se dohledají přes manifest assetu (zkompaktované dny) a výpisem fragmentů
+(aktuální, ještě nezkompaktovaný den a fragmenty zapsané po kompakci). Z každého
+souboru se čtou jen požadované sloupce a row groupy, které podle statistik mohou
+obsahovat hledané řádky.
+
+Soubory se stahují celé do lokální LRU cache, takže opakovaný dotaz (refresh
+dashboardu) už bloby nestahuje. Výběr sloupců a row groups proto šetří jen
+dekódování a paměť, ne přenos - první dotaz na den stáhne celý soubor i když
+potřebuje jeden sloupec. Denní soubory jsou malé a dotazy se opakují, takže
+cache celého souboru vyjde levněji než ranged reads pro každý dotaz.
+"""
+
+from datetime import datetime, timedelta
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from Shared_Functions.fce_blob_cache import LocalBlobCache
+from Shared_Functions.fce_parquet_store import FRAGMENT_PREFIX, load_manifest, partition_prefix
+
+FRAGMENT_TIME_SLACK = timedelta(minutes=5)
+# Sloupec strany booku: pásma mají type (ask/bid), impact a hloubka side (buy/sell, ask/bid)
+SIDE_COLUMNS = ("type", "side")
+
+_CACHE = None
+
+
+def get_default_cache():
+    global _CACHE
+    if _CACHE is None:
+        _CACHE = LocalBlobCache()
+    return _CACHE
+
+
+def iter_days(start, end):
+    day = start.date()
+    last_day = (end - timedelta(microseconds=1)).date()
+    while day <= last_day:
+        yield day
+        day += timedelta(days=1)
+
+
+def build_filters(start, end, levels=None, sides=None, column_names=None):
+    """
+    Filtry pro pyarrow podle sloupců datasetu.
+
+    Args:
+        column_names (list): Sloupce souboru; None = dataset pásem (type, level_number)
+
+    Raises:
+        ValueError: pokud dataset nemá sloupec pro požadovaný filtr (levels u impact/hloubky)
+    """
+    filters = [("timestamp", ">=", start), ("timestamp", "<", end)]
+    if levels:
+        if column_names is not None and "level_number" not in column_names:
+            raise ValueError("levels filter needs the level_number column, which only band datasets have")
+        filters.append(("level_number", "in", list(levels)))
+    if sides:
+        side_column = SIDE_COLUMNS[0] if column_names is None else \
+            next((column for column in SIDE_COLUMNS if column in column_names), None)
+        if side_column is None:
+            raise ValueError(f"sides filter needs one of the columns {', '.join(SIDE_COLUMNS)}")
+        filters.append((side_column, "in", list(sides)))
+    return filters
+
+
+async def resolve_day_blobs(container_client, asset, day, manifest, start, end):
+    """
+    Vrátí bloby, které mohou obsahovat data daného dne v rozsahu [start, end).
+
+    Zkompaktovaný den (v manifestu) je data.parquet plus fragmenty zapsané po
+    kompakci (pozdní flush write-behind journalu, opakovaný běh).
+
+    Returns:
+        list: [(blob_name, etag), ...]
+    """
+    blobs = []
+    entry = manifest["days"].get(day.isoformat())
+    if entry is not None and datetime.fromisoformat(entry["max_timestamp"]) >= start \
+            and datetime.fromisoformat(entry["min_timestamp"]) < end:
+        etag = entry.get("etag")
+        if etag is None:
+            # Manifest zapsaný starší verzí etag nemá
+            etag = (await container_client.get_blob_client(entry["blob"]).get_blob_properties()).etag
+        blobs.append((entry["blob"], etag))
+
+    # Fragment part-HHMMSS.parquet (dávka part-HHMMSS-HHMMSS.parquet) nese čas běhu,
+    # řádky v něm mají timestamp o chvíli dřív
+    prefix = partition_prefix(asset, day)
+    async for blob in container_client.list_blobs(name_starts_with=prefix):
+        filename = blob.name[len(prefix):]
+        if not filename.startswith(FRAGMENT_PREFIX):
+            continue
+        first_run, last_run = fragment_time_range(day, filename[len(FRAGMENT_PREFIX):])
+        if first_run < end + FRAGMENT_TIME_SLACK and last_run >= start - FRAGMENT_TIME_SLACK:
+            blobs.append((blob.name, blob.etag))
+    return blobs
+
+
+def fragment_time_range(day, name):
+    """Vrátí (první, poslední) čas běhu z názvu fragmentu bez prefixu."""
+    first_run = datetime.combine(day, datetime.strptime(name[:6], "%H%M%S").time())
+    if name[6:7] == "-":
+        return first_run, datetime.combine(day, datetime.strptime(name[7:13], "%H%M%S").time())
+    return first_run, first_run
+
+
+async def query_liquidity(container_client, asset, start, end, levels=None, sides=None, columns=None,
+                          as_arrow=False, cache=None):
+    """
+    Vrátí řádky likvidity assetu v časovém rozsahu [start, end).
+
+    Args:
+        container_client: ContainerClient (azure.storage.blob.aio) nebo LocalContainerClient
+        asset (str): Asset, např. "eth"
+        start (datetime): Začátek rozsahu (UTC, včetně)
+        end (datetime): Konec rozsahu (UTC, bez)
+        levels (list): Čísla pásem (level_number), např. [1, -1]; None = všechna.
+                       Jen pro pásma - u impact/hloubky (<asset>_impact, <asset>_depth) ValueError
+        sides (list): Strany - "ask"/"bid" pro pásma a hloubku, "buy"/"sell" pro impact; None = všechny
+        columns (list): Sloupce k načtení; None = všechny
+        as_arrow (bool): True vrátí pyarrow.Table místo pandas DataFrame
+        cache (LocalBlobCache): Cache stažených souborů; None = procesní výchozí
+
+    Returns:
+        pd.DataFrame | pa.Table: Nalezené řádky seřazené podle času
+    """
+    cache = cache or get_default_cache()
+    manifest = await load_manifest(container_client, asset)
+    # Filtry podle sloupců souboru (pásma vs. impact/hloubka), pro každé schéma jednou
+    filters_by_schema = {}
+
+    tables = []
+    for day in iter_days(start, end):
+        for blob_name, etag in await resolve_day_blobs(container_client, asset, day, manifest, start, end):
+            data = await cache.fetch(container_client, blob_name, etag)
+            column_names = tuple(pq.read_schema(pa.BufferReader(data)).names)
+            filters = filters_by_schema.get(column_names)
+            if filters is None:
+                filters = filters_by_schema[column_names] = build_filters(start, end, levels, sides, column_names)
+            tables.append(pq.read_table(pa.BufferReader(data), columns=columns, filters=filters))
+
+    if tables:
+        table = pa.concat_tables(tables, promote_options="permissive")
+    else:
+        table = pa.table({column: [] for column in columns or ["timestamp"]})
+    if "timestamp" in table.column_names:
+        table = table.sort_by("timestamp")
+    return table if as_arrow else table.to_pandas()
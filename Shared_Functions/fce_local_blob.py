@@ -0,0 +1,188 @@
+"""
+Lokální náhrada Azure Blob Storage nad souborovým systémem.
+
+Implementuje jen tu část async API (azure.storage.blob.aio), kterou používá kolektor,
+takže ji lze dosadit místo BLOB_SERVICE_CLIENT při lokálním ladění a testech.
+"""
+
+import os
+from datetime import datetime, timezone
+from types import SimpleNamespace
+
+from azure.core.exceptions import ResourceExistsError, ResourceNotFoundError
+
+BLOCK_BLOB_TYPE = "BlockBlob"
+APPEND_BLOB_TYPE = "AppendBlob"
+
+
+def file_version(path):
+    """ETag a čas poslední změny souboru - každý zápis dá nový etag, jako v Azure."""
+    stat = os.stat(path)
+    return f'"0x{stat.st_mtime_ns:X}{stat.st_size:X}"', datetime.fromtimestamp(stat.st_mtime, timezone.utc)
+
+
+class LocalBlobDownloader:
+    def __init__(self, data):
+        self._data = data
+
+    @property
+    def size(self):
+        return len(self._data)
+
+    async def readall(self):
+        return self._data
+
+    async def content_as_bytes(self):
+        return self._data
+
+    async def content_as_text(self, encoding="UTF-8"):
+        return self._data.decode(encoding)
+
+    async def chunks(self, chunk_size=4 * 1024 * 1024):
+        for start in range(0, len(self._data), chunk_size):
+            yield self._data[start:start + chunk_size]
+
+
+class LocalBlobClient:
+    def __init__(self, container, blob_name):
+        self._container = container
+        self.container_name = container.container_name
+        self.blob_name = blob_name
+        self._path = container._blob_path(blob_name)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *args):
+        pass
+
+    async def exists(self):
+        return os.path.isfile(self._path)
+
+    async def get_blob_properties(self):
+        if not os.path.isfile(self._path):
+            raise ResourceNotFoundError(f"The specified blob does not exist: {self.blob_name}")
+        etag, last_modified = file_version(self._path)
+        return SimpleNamespace(
+            name=self.blob_name,
+            size=os.path.getsize(self._path),
+            blob_type=self._container._blob_types.get(self.blob_name, BLOCK_BLOB_TYPE),
+            etag=etag,
+            last_modified=last_modified,
+            metadata={}
+        )
+
+    async def download_blob(self, offset=None, length=None, **kwargs):
+        if not os.path.isfile(self._path):
+            raise ResourceNotFoundError(f"The specified blob does not exist: {self.blob_name}")
+        with open(self._path, "rb") as f:
+            if offset:
+                f.seek(offset)
+            data = f.read() if length is None else f.read(length)
+        return LocalBlobDownloader(data)
+
+    async def upload_blob(self, data, overwrite=False, **kwargs):
+        if not overwrite and os.path.isfile(self._path):
+            raise ResourceExistsError(f"The specified blob already exists: {self.blob_name}")
+        if isinstance(data, str):
+            data = data.encode("utf-8")
+        os.makedirs(os.path.dirname(self._path), exist_ok=True)
+        tmp_path = self._path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, self._path)
+        self._container._blob_types[self.blob_name] = BLOCK_BLOB_TYPE
+        etag, last_modified = file_version(self._path)
+        return {"etag": etag, "last_modified": last_modified}
+
+    async def create_append_blob(self, **kwargs):
+        os.makedirs(os.path.dirname(self._path), exist_ok=True)
+        open(self._path, "wb").close()
+        self._container._blob_types[self.blob_name] = APPEND_BLOB_TYPE
+
+    async def append_block(self, data, **kwargs):
+        if self._container._blob_types.get(self.blob_name) != APPEND_BLOB_TYPE:
+            raise ResourceExistsError(f"The blob type is invalid for this operation: {self.blob_name}")
+        if isinstance(data, str):
+            data = data.encode("utf-8")
+        with open(self._path, "ab") as f:
+            f.write(data)
+        return {"blob_append_offset": str(os.path.getsize(self._path) - len(data))}
+
+    async def delete_blob(self, **kwargs):
+        if not os.path.isfile(self._path):
+            raise ResourceNotFoundError(f"The specified blob does not exist: {self.blob_name}")
+        os.remove(self._path)
+        self._container._blob_types.pop(self.blob_name, None)
+
+
+class LocalContainerClient:
+    def __init__(self, root, container_name):
+        self.container_name = container_name
+        self._root = os.path.join(root, container_name)
+        # Typ blobu (block/append) se drží jen v paměti, soubory na disku jsou prostá data
+        self._blob_types = {}
+        os.makedirs(self._root, exist_ok=True)
+
+    def _blob_path(self, blob_name):
+        return os.path.join(self._root, *blob_name.split("/"))
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *args):
+        pass
+
+    def get_blob_client(self, blob):
+        return LocalBlobClient(self, blob)
+
+    async def upload_blob(self, name, data, overwrite=False, **kwargs):
+        blob_client = self.get_blob_client(name)
+        await blob_client.upload_blob(data, overwrite=overwrite)
+        return blob_client
+
+    async def download_blob(self, blob, offset=None, length=None, **kwargs):
+        return await self.get_blob_client(blob).download_blob(offset=offset, length=length)
+
+    async def delete_blob(self, blob, **kwargs):
+        await self.get_blob_client(blob).delete_blob()
+
+    async def list_blobs(self, name_starts_with=None, **kwargs):
+        for dirpath, _, filenames in sorted(os.walk(self._root)):
+            for filename in sorted(filenames):
+                if filename.endswith(".tmp"):
+                    continue
+                path = os.path.join(dirpath, filename)
+                name = os.path.relpath(path, self._root).replace(os.sep, "/")
+                if name_starts_with and not name.startswith(name_starts_with):
+                    continue
+                etag, last_modified = file_version(path)
+                yield SimpleNamespace(
+                    name=name,
+                    size=os.path.getsize(path),
+                    blob_type=self._blob_types.get(name, BLOCK_BLOB_TYPE),
+                    etag=etag,
+                    last_modified=last_modified
+                )
+
+
+class LocalBlobServiceClient:
+    """Náhrada BlobServiceClient - každý kontejner je podadresář v root."""
+
+    def __init__(self, root):
+        self._root = root
+        self._containers = {}
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *args):
+        pass
+
+    def get_container_client(self, container):
+        if container not in self._containers:
+            self._containers[container] = LocalContainerClient(self._root, container)
+        return self._containers[container]
+
+    async def close(self):
+        pass
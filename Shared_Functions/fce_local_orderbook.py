@@ -0,0 +1,252 @@
+"""
+Lokální order book udržovaný z diff-depth WebSocket streamu Binance.
+
+Postup synchronizace podle dokumentace Binance:
+    1. otevřít stream <symbol>@depth@100ms a bufferovat události,
+    2. stáhnout REST snapshot /api/v3/depth,
+    3. zahodit události s u <= lastUpdateId,
+    4. každá další událost musí navazovat (U <= lastUpdateId + 1), jinak resync.
+
+Book je uložený v seřazených numpy polích, takže agregace do pásem z něj může
+vzorkovat v libovolné kadenci (např. každých 10 s) bez dalších REST volání.
+Režim se zapíná proměnnou prostředí BINANCE_DEPTH_STREAM=1.
+"""
+
+import asyncio
+import logging
+import os
+import time
+
+import aiohttp
+import numpy as np
+import orjson
+
+from Shared_Functions.fce_binance_client import binance_request
+from Shared_Functions.fce_depth_parser import DepthSnapshot, levels_to_arrays, parse_depth
+
+BINANCE_WS_URL = os.environ.get("BINANCE_WS_URL", "wss://stream.binance.com:9443")
+DEPTH_STREAM_ENABLED = os.environ.get("BINANCE_DEPTH_STREAM", "0") == "1"
+SNAPSHOT_LIMIT = 1000
+STREAM_SPEED = "100ms"
+MAX_BOOK_AGE = 5.0
+RECONNECT_DELAY = 1.0
+RECONNECT_DELAY_CAP = 30.0
+
+_STREAMS = {}
+
+
+class OrderBookOutOfSync(Exception):
+    pass
+
+
+def merge_side(prices, quantities, update_prices, update_quantities, descending):
+    """
+    Aplikuje změny úrovní na jednu stranu booku.
+
+    Nové množství nahrazuje staré, množství 0 úroveň odstraňuje. Výsledek je
+    opět seřazený (asks vzestupně, bids sestupně).
+    """
+    sign = -1.0 if descending else 1.0
+    # Změny jdou první a v opačném pořadí: np.unique vrací index prvního výskytu,
+    # takže vyhraje poslední změna dané úrovně před původním stavem
+    keys = np.concatenate((update_prices[::-1] * sign, prices * sign))
+    all_quantities = np.concatenate((update_quantities[::-1], quantities))
+    unique_keys, first = np.unique(keys, return_index=True)
+    merged_quantities = all_quantities[first]
+    keep = merged_quantities > 0
+    return unique_keys[keep] * sign, merged_quantities[keep]
+
+
+class LocalOrderBook:
+    def __init__(self, symbol):
+        self.symbol = symbol
+        self.last_update_id = None
+        self.updated_at = None
+        self.bid_prices = np.empty(0)
+        self.bid_qtys = np.empty(0)
+        self.ask_prices = np.empty(0)
+        self.ask_qtys = np.empty(0)
+
+    @property
+    def synced(self):
+        return self.last_update_id is not None
+
+    def reset(self):
+        self.last_update_id = None
+
+    def load_snapshot(self, snapshot):
+        self.bid_prices = snapshot.bid_prices.copy()
+        self.bid_qtys = snapshot.bid_qtys.copy()
+        self.ask_prices = snapshot.ask_prices.copy()
+        self.ask_qtys = snapshot.ask_qtys.copy()
+        self.last_update_id = snapshot.last_update_id
+        self.updated_at = time.monotonic()
+
+    def apply_event(self, event):
+        """
+        Aplikuje depthUpdate událost.
+
+        Returns:
+            bool: False pokud byla událost starší než book a byla zahozena
+
+        Raises:
+            OrderBookOutOfSync: pokud mezi bookem a událostí chybí update ID
+        """
+        if event["u"] <= self.last_update_id:
+            return False
+        if event["U"] > self.last_update_id + 1:
+            raise OrderBookOutOfSync(
+                f"{self.symbol}: expected update {self.last_update_id + 1}, got {event['U']}"
+            )
+        if event["b"]:
+            self.bid_prices, self.bid_qtys = merge_side(
+                self.bid_prices, self.bid_qtys, *levels_to_arrays(event["b"]), descending=True
+            )
+        if event["a"]:
+            self.ask_prices, self.ask_qtys = merge_side(
+                self.ask_prices, self.ask_qtys, *levels_to_arrays(event["a"]), descending=False
+            )
+        self.last_update_id = event["u"]
+        self.updated_at = time.monotonic()
+        return True
+
+    def snapshot(self):
+        """Vrátí kopii aktuálního stavu jako DepthSnapshot."""
+        return DepthSnapshot(
+            self.last_update_id,
+            self.bid_prices.copy(),
+            self.bid_qtys.copy(),
+            self.ask_prices.copy(),
+            self.ask_qtys.copy()
+        )
+
+
+class OrderBookStream:
+    """Udržuje LocalOrderBook pro jeden symbol, při výpadku se sám znovu připojí a synchronizuje."""
+
+    def __init__(self, symbol, snapshot_limit=SNAPSHOT_LIMIT, ws_url=None):
+        self.symbol = symbol
+        self.snapshot_limit = snapshot_limit
+        self.ws_url = ws_url or BINANCE_WS_URL
+        self.book = LocalOrderBook(symbol)
+        self._task = None
+
+    @property
+    def stream_url(self):
+        return f"{self.ws_url}/ws/{self.symbol.lower()}@depth@{STREAM_SPEED}"
+
+    def start(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.ensure_future(self.run())
+        return self._task
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def run(self):
+        delay = RECONNECT_DELAY
+        while True:
+            try:
+                await self._run_connection()
+                delay = RECONNECT_DELAY
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logging.warning(f"Depth stream {self.symbol} interrupted ({e}), reconnecting in {delay:.0f}s")
+            self.book.reset()
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, RECONNECT_DELAY_CAP)
+
+    async def _fetch_snapshot(self):
+        payload = await binance_request("/api/v3/depth", {"symbol": self.symbol, "limit": self.snapshot_limit})
+        return parse_depth(payload)
+
+    async def _run_connection(self):
+        buffered = []
+        snapshot_task = None
+        async with aiohttp.ClientSession() as session:
+            async with session.ws_connect(self.stream_url, heartbeat=30) as ws:
+                snapshot_task = asyncio.ensure_future(self._fetch_snapshot())
+                try:
+                    async for message in ws:
+                        if message.type != aiohttp.WSMsgType.TEXT:
+                            break
+                        event = orjson.loads(message.data)
+                        if self.book.synced:
+                            self.book.apply_event(event)
+                            continue
+
+                        buffered.append(event)
+                        if not snapshot_task.done():
+                            continue
+                        self.book.load_snapshot(snapshot_task.result())
+                        try:
+                            for buffered_event in buffered:
+                                self.book.apply_event(buffered_event)
+                            buffered.clear()
+                            logging.info(f"Depth stream {self.symbol} synced at update {self.book.last_update_id}")
+                        except OrderBookOutOfSync:
+                            # Snapshot je starší než začátek bufferu, stáhneme nový
+                            self.book.reset()
+                            snapshot_task = asyncio.ensure_future(self._fetch_snapshot())
+                finally:
+                    if snapshot_task is not None and not snapshot_task.done():
+                        snapshot_task.cancel()
+        raise ConnectionError("WebSocket closed")
+
+    def get_snapshot(self, max_age=MAX_BOOK_AGE):
+        """Vrátí aktuální book, nebo None pokud není synchronizovaný nebo je starý."""
+        if not self.book.synced or time.monotonic() - self.book.updated_at > max_age:
+            return None
+        return self.book.snapshot()
+
+
+def ensure_stream(symbol, snapshot_limit=SNAPSHOT_LIMIT):
+    """
+    Spustí (jednou za proces) stream pro daný symbol a vrátí ho.
+
+    Hloubka REST snapshotu se u běžícího streamu změní pro příští synchronizaci.
+    """
+    stream = _STREAMS.get(symbol)
+    if stream is None:
+        stream = _STREAMS[symbol] = OrderBookStream(symbol, snapshot_limit)
+    stream.snapshot_limit = snapshot_limit
+    stream.start()
+    return stream
+
+
+def get_stream_snapshot(symbol, max_age=MAX_BOOK_AGE, depth_limit=SNAPSHOT_LIMIT):
+    """
+    Vrátí snapshot ze streamu, pokud je zapnutý streaming režim.
+
+    Při prvním volání stream spustí; dokud se nesynchronizuje, vrací None
+    a volající použije REST snapshot.
+
+    Args:
+        depth_limit (int): Hloubka REST snapshotu pro synchronizaci, stejná jako u REST režimu
+    """
+    if not DEPTH_STREAM_ENABLED:
+        return None
+    return ensure_stream(symbol, depth_limit).get_snapshot(max_age)
+
+
+async def iter_samples(symbol, interval=10.0, max_age=MAX_BOOK_AGE, depth_limit=SNAPSHOT_LIMIT):
+    """Asynchronní generátor snapshotů booku v pravidelném intervalu (v sekundách)."""
+    stream = ensure_stream(symbol, depth_limit)
+    while True:
+        snapshot = stream.get_snapshot(max_age)
+        if snapshot is not None:
+            yield snapshot
+        await asyncio.sleep(interval)
+
+
+async def stop_streams():
+    for stream in _STREAMS.values():
+        await stream.stop()
+    _STREAMS.clear()
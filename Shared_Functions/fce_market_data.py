@@ -0,0 +1,210 @@
+"""
+Brána na tržní data Binance sdílená všemi assety v jednom procesu.
+
+Souběžné stejné požadavky se sloučí do jednoho requestu (in-flight task),
+výsledky se drží v cache s krátkým TTL a ceny se dotazují dávkově přes
+/api/v3/ticker/price?symbols=[...], takže N souběžných dotazů na cenu stojí
+jeden request. Záložní (hedged) požadavek na depth slučování obchází, jinak
+by jen čekal na stejný opožděný request.
+"""
+
+import asyncio
+import json
+import os
+import time
+
+from Shared_Functions.fce_binance_client import binance_get, binance_request
+
+PRICE_TTL = float(os.environ.get("MARKET_DATA_PRICE_TTL", "5"))
+DEPTH_TTL = float(os.environ.get("MARKET_DATA_DEPTH_TTL", "1"))
+# Jak dlouho se sbírají souběžné dotazy na cenu do jedné dávky (s)
+PRICE_BATCH_WINDOW = 0.002
+
+_GATEWAY = None
+
+
+def _consume_exception(future):
+    # Chybu dostanou čekající volající, bez nich by ji asyncio logovalo jako nevyzvednutou
+    if not future.cancelled():
+        future.exception()
+
+
+class MarketDataGateway:
+    """
+    Sloučení souběžných požadavků a krátkodobá cache nad fce_binance_client.
+
+    Cache přežívá mezi běhy v teplé instanci, in-flight požadavky jsou vázané
+    na event loop a při jeho změně se zahodí.
+    """
+
+    def __init__(self, price_ttl=PRICE_TTL, depth_ttl=DEPTH_TTL, batch_window=PRICE_BATCH_WINDOW,
+                 clock=time.monotonic):
+        self.price_ttl = price_ttl
+        self.depth_ttl = depth_ttl
+        self.batch_window = batch_window
+        self._clock = clock
+        self._cache = {}
+        self._inflight = {}
+        self._pending_prices = []
+        self._batch_task = None
+        self._loop = None
+        self.requests = 0
+        self.coalesced = 0
+        self.cache_hits = 0
+        self.hedges = 0
+
+    def _bind_loop(self):
+        loop = asyncio.get_running_loop()
+        if loop is not self._loop:
+            self._loop = loop
+            self._inflight = {}
+            self._pending_prices = []
+            self._batch_task = None
+
+    def _cached(self, key):
+        entry = self._cache.get(key)
+        if entry is None:
+            return None
+        if entry[0] <= self._clock():
+            del self._cache[key]
+            return None
+        self.cache_hits += 1
+        return entry[1]
+
+    def _store(self, key, value, ttl):
+        if ttl > 0:
+            self._cache[key] = (self._clock() + ttl, value)
+
+    async def _coalesce(self, key, ttl, loader):
+        self._bind_loop()
+        cached = self._cached(key)
+        if cached is not None:
+            return cached
+        task = self._inflight.get(key)
+        if task is None:
+            task = self._loop.create_task(self._load(key, ttl, loader))
+            task.add_done_callback(_consume_exception)
+            self._inflight[key] = task
+        else:
+            self.coalesced += 1
+        # Zrušení jednoho volajícího (timeout) nesmí zrušit request ostatním
+        return await asyncio.shield(task)
+
+    async def _load(self, key, ttl, loader):
+        try:
+            self.requests += 1
+            value = await loader()
+            self._store(key, value, ttl)
+            return value
+        finally:
+            self._inflight.pop(key, None)
+
+    async def get_depth(self, symbol, limit, deadline=None, hedge=False):
+        """
+        Vrátí tělo odpovědi /api/v3/depth (bytes).
+
+        Args:
+            deadline (float): Celkový čas na request včetně opakování (s)
+            hedge (bool): Záložní požadavek - vlastní request mimo slučování
+        """
+        params = {"symbol": symbol, "limit": limit}
+        key = ("depth", symbol, limit)
+
+        def loader():
+            return binance_request("/api/v3/depth", params, deadline=deadline)
+
+        if hedge:
+            self.requests += 1
+            self.hedges += 1
+            value = await loader()
+            self._store(key, value, self.depth_ttl)
+            return value
+        return await self._coalesce(key, self.depth_ttl, loader)
+
+    async def get_prices(self, symbols):
+        """
+        Vrátí aktuální ceny symbolů.
+
+        Chybějící ceny se přidají do společné dávky, kterou odešle první
+        volající po uplynutí batch_window.
+
+        Returns:
+            dict: symbol -> cena (float)
+        """
+        self._bind_loop()
+        prices = {}
+        waiting = {}
+        for symbol in symbols:
+            key = ("price", symbol)
+            cached = self._cached(key)
+            if cached is not None:
+                prices[symbol] = cached
+                continue
+            future = self._inflight.get(key)
+            if future is None:
+                future = self._loop.create_future()
+                future.add_done_callback(_consume_exception)
+                self._inflight[key] = future
+                self._pending_prices.append(symbol)
+                if self._batch_task is None:
+                    self._batch_task = self._loop.create_task(self._flush_prices())
+            else:
+                self.coalesced += 1
+            waiting[symbol] = future
+        for symbol, future in waiting.items():
+            prices[symbol] = await asyncio.shield(future)
+        return prices
+
+    async def get_price(self, symbol):
+        prices = await self.get_prices([symbol])
+        return prices[symbol]
+
+    async def _flush_prices(self):
+        await asyncio.sleep(self.batch_window)
+        symbols = self._pending_prices
+        self._pending_prices = []
+        self._batch_task = None
+        futures = {symbol: self._inflight[("price", symbol)] for symbol in symbols}
+        try:
+            self.requests += 1
+            if len(symbols) == 1:
+                data = [await binance_get("/api/v3/ticker/price", {"symbol": symbols[0]})]
+            else:
+                data = await binance_get("/api/v3/ticker/price",
+                                         {"symbols": json.dumps(symbols, separators=(",", ":"))})
+            received = {item["symbol"]: float(item["price"]) for item in data}
+            for symbol, future in futures.items():
+                if symbol in received:
+                    self._store(("price", symbol), received[symbol], self.price_ttl)
+                    future.set_result(received[symbol])
+                else:
+                    future.set_exception(KeyError(f"No price returned for {symbol}"))
+        except Exception as e:
+            for future in futures.values():
+                if not future.done():
+                    future.set_exception(e)
+        finally:
+            for symbol in symbols:
+                self._inflight.pop(("price", symbol), None)
+
+    def clear(self):
+        self._cache.clear()
+
+
+def get_gateway():
+    global _GATEWAY
+    if _GATEWAY is None:
+        _GATEWAY = MarketDataGateway()
+    return _GATEWAY
+
+
+async def get_price(symbol):
+    return await get_gateway().get_price(symbol)
+
+
+async def get_prices(symbols):
+    return await get_gateway().get_prices(symbols)
+
+
+async def get_depth(symbol, limit, deadline=None, hedge=False):
+    return await get_gateway().get_depth(symbol, limit, deadline=deadline, hedge=hedge)
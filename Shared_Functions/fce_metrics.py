@@ -0,0 +1,155 @@
+"""
+Měření latence jednotlivých fází běhu a procesní registr metrik.
+
+Každá fáze (HTTP fetch, dekódování JSON, agregace, formátování řádků,
+serializace, zápis do blobu) se obalí do span(...). Span po skončení
+    - zapíše strukturovaný log záznam (custom_dimensions pro Application Insights),
+    - přidá dobu trvání do histogramu v REGISTRY,
+    - přičte bytes_in / bytes_out / rows do čítačů.
+"""
+
+import bisect
+import logging
+import threading
+import time
+
+# Hranice bucketů histogramu v sekundách
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 180)
+# Atributy spanu, které se stávají labely metrik (ostatní jdou jen do logu)
+LABEL_KEYS = ("asset", "symbol", "endpoint")
+COUNTER_KEYS = ("bytes_in", "bytes_out", "rows")
+
+
+class Histogram:
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.min = None
+        self.max = None
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+        self.min = value if self.min is None else min(self.min, value)
+        self.max = value if self.max is None else max(self.max, value)
+
+    def quantile(self, q):
+        """Odhad kvantilu - horní hranice bucketu, do kterého kvantil padne."""
+        if not self.count:
+            return None
+        rank = q * self.count
+        cumulative = 0
+        for index, bucket_count in enumerate(self.counts):
+            cumulative += bucket_count
+            if cumulative >= rank:
+                return self.buckets[index] if index < len(self.buckets) else self.max
+        return self.max
+
+    def snapshot(self):
+        return {
+            "count": self.count,
+            "sum": self.sum,
+            "min": self.min,
+            "max": self.max,
+            "p50": self.quantile(0.5),
+            "p95": self.quantile(0.95),
+            "p99": self.quantile(0.99),
+            "buckets": dict(zip([*map(str, self.buckets), "+Inf"], self.counts))
+        }
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._histograms = {}
+        self._counters = {}
+
+    @staticmethod
+    def _key(name, labels):
+        return (name, tuple(sorted(labels.items())))
+
+    def observe(self, name, value, **labels):
+        key = self._key(name, labels)
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = Histogram()
+            histogram.observe(value)
+
+    def inc(self, name, value=1, **labels):
+        key = self._key(name, labels)
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def snapshot(self):
+        """
+        Returns:
+            dict: {"histograms": [{"name", "labels", ...}], "counters": [{"name", "labels", "value"}]}
+        """
+        with self._lock:
+            return {
+                "histograms": [
+                    {"name": name, "labels": dict(labels), **histogram.snapshot()}
+                    for (name, labels), histogram in self._histograms.items()
+                ],
+                "counters": [
+                    {"name": name, "labels": dict(labels), "value": value}
+                    for (name, labels), value in self._counters.items()
+                ]
+            }
+
+    def reset(self):
+        with self._lock:
+            self._histograms.clear()
+            self._counters.clear()
+
+
+REGISTRY = MetricsRegistry()
+
+
+class Span:
+    def __init__(self, stage, registry=REGISTRY, **attributes):
+        self.stage = stage
+        self.registry = registry
+        self.attributes = attributes
+        self.duration = None
+        self._start = None
+
+    def set(self, **attributes):
+        self.attributes.update(attributes)
+        return self
+
+    def __enter__(self):
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.duration = time.perf_counter() - self._start
+        status = "ok" if exc_type is None else "error"
+        labels = {key: self.attributes[key] for key in LABEL_KEYS if self.attributes.get(key) is not None}
+
+        self.registry.observe("stage_duration_seconds", self.duration, stage=self.stage, status=status, **labels)
+        for key in COUNTER_KEYS:
+            if key in self.attributes:
+                self.registry.inc(f"stage_{key}_total", self.attributes[key], stage=self.stage, **labels)
+
+        dimensions = {"stage": self.stage, "status": status, "duration_ms": round(self.duration * 1000, 3),
+                      **self.attributes}
+        message = " ".join(f"{key}={value}" for key, value in dimensions.items())
+        logging.info(f"span {message}", extra={"custom_dimensions": dimensions})
+        return False
+
+
+def span(stage, **attributes):
+    """
+    Změří fázi běhu.
+
+    Example:
+        with span("http.fetch", symbol="ETHUSDT") as s:
+            payload = await binance_request(...)
+            s.set(bytes_in=len(payload))
+    """
+    return Span(stage, **attributes)
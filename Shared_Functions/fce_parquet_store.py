@@ -0,0 +1,203 @@
+"""
+Sloupcový výstup do Parquetu rozdělený podle assetu a dne.
+
+Každý běh zapíše malý fragment parquet/asset=<asset>/date=<YYYY-MM-DD>/part-<HHMMSS>.parquet,
+kompakce po skončení dne sloučí fragmenty do jednoho data.parquet seřazeného
+podle času. Textové sloupce s malým počtem hodnot (type, level_range, ...) jsou
+kategorické, timestamp je skutečný datetime, takže čtení nemusí znovu odhadovat typy.
+
+pandas/pyarrow se importují až ve funkcích, které s daty pracují - kolektor
+s OUTPUT_FORMAT=csv modul potřebuje jen kvůli přepínačům výstupu.
+"""
+
+import json
+import logging
+import os
+from datetime import datetime
+from io import BytesIO
+
+from Shared_Functions.fce_metrics import span
+
+PARQUET_PREFIX = "parquet"
+COMPACTED_NAME = "data.parquet"
+FRAGMENT_PREFIX = "part-"
+MANIFEST_NAME = "_manifest.json"
+CATEGORICAL_COLUMNS = ["type", "level_range", "quote_asset", "exchange", "side", "status", "missing_markets"]
+TIMESTAMP_FORMAT = "%Y-%m-%d %H:%M"
+COMPRESSION = "zstd"
+ROW_GROUP_SIZE = 10000
+# Menší row groupy v denním souboru, aby dotaz na časový úsek přeskočil zbytek dne
+COMPACTED_ROW_GROUP_SIZE = 1000
+
+# csv | parquet | both
+OUTPUT_FORMAT = os.environ.get("OUTPUT_FORMAT", "csv").lower()
+
+
+def csv_output_enabled():
+    return OUTPUT_FORMAT in ("csv", "both")
+
+
+def parquet_output_enabled():
+    return OUTPUT_FORMAT in ("parquet", "both")
+
+
+def partition_prefix(asset, day):
+    return f"{PARQUET_PREFIX}/asset={asset}/date={day.isoformat()}/"
+
+
+def manifest_blob_name(asset):
+    return f"{PARQUET_PREFIX}/asset={asset}/{MANIFEST_NAME}"
+
+
+async def load_manifest(container_client, asset):
+    """
+    Načte manifest assetu - index zkompaktovaných dní.
+
+    Returns:
+        dict: {"days": {"YYYY-MM-DD": {"blob", "rows", "size", "etag", "min_timestamp", "max_timestamp"}}}
+    """
+    try:
+        downloader = await container_client.get_blob_client(manifest_blob_name(asset)).download_blob()
+        return json.loads(await downloader.readall())
+    except Exception:
+        return {"days": {}}
+
+
+async def update_manifest(container_client, asset, day, entry):
+    manifest = await load_manifest(container_client, asset)
+    manifest["days"][day.isoformat()] = entry
+    await container_client.upload_blob(
+        name=manifest_blob_name(asset),
+        data=json.dumps(manifest, sort_keys=True),
+        overwrite=True
+    )
+    return manifest
+
+
+def prepare_frame(df):
+    """Převede řádky (ColumnarRows.to_pandas nebo načtené CSV) na typované sloupce pro Parquet."""
+    import pandas as pd
+
+    df = df.copy()
+    timestamps = df["timestamp"]
+    if isinstance(timestamps.dtype, pd.CategoricalDtype):
+        # Převedou se jen kategorie; to_datetime nad kategorickým sloupcem by
+        # od 50 řádků (cache hodnot) vrátil zase kategorický sloupec
+        categories = pd.to_datetime(timestamps.cat.categories, format=TIMESTAMP_FORMAT)
+        df["timestamp"] = categories.take(timestamps.cat.codes.to_numpy())
+    elif not pd.api.types.is_datetime64_any_dtype(timestamps):
+        df["timestamp"] = pd.to_datetime(timestamps, format=TIMESTAMP_FORMAT)
+    for column in CATEGORICAL_COLUMNS:
+        if column in df.columns:
+            df[column] = df[column].astype("category")
+    return df
+
+
+def frame_to_parquet(df, row_group_size=ROW_GROUP_SIZE):
+    buffer = BytesIO()
+    df.to_parquet(buffer, engine="pyarrow", compression=COMPRESSION, index=False, row_group_size=row_group_size)
+    return buffer.getvalue()
+
+
+async def read_parquet_blob(container_client, blob_name):
+    import pandas as pd
+
+    downloader = await container_client.get_blob_client(blob_name).download_blob()
+    return pd.read_parquet(BytesIO(await downloader.readall()), engine="pyarrow")
+
+
+async def write_fragment(container_client, asset, df, run_time=None, end_time=None):
+    """
+    Zapíše řádky jednoho běhu (nebo dávky běhů) jako samostatný Parquet fragment.
+
+    Fragment dávky se jmenuje part-<HHMMSS>-<HHMMSS>.parquet podle prvního
+    a posledního běhu, aby dotaz mohl fragmenty dál vybírat podle času.
+
+    Returns:
+        str: Název zapsaného blobu
+    """
+    run_time = run_time or datetime.utcnow()
+    time_range = run_time.strftime('%H%M%S')
+    if end_time is not None and end_time != run_time:
+        time_range += f"-{end_time.strftime('%H%M%S')}"
+    blob_name = f"{partition_prefix(asset, run_time.date())}{FRAGMENT_PREFIX}{time_range}.parquet"
+    with span("serialize.parquet", asset=asset, rows=len(df)) as serialize_span:
+        data = frame_to_parquet(prepare_frame(df))
+        serialize_span.set(bytes_out=len(data))
+    with span("blob.upload", asset=asset, blob=blob_name, bytes_out=len(data)):
+        await container_client.upload_blob(name=blob_name, data=data, overwrite=True)
+    return blob_name
+
+
+async def list_day_blobs(container_client, asset, day):
+    prefix = partition_prefix(asset, day)
+    return [blob.name async for blob in container_client.list_blobs(name_starts_with=prefix)]
+
+
+async def compact_day(container_client, asset, day, delete_fragments=True):
+    """
+    Sloučí fragmenty jednoho dne (a případný dřívější data.parquet) do jednoho souboru.
+
+    Returns:
+        pd.DataFrame | None: Sloučená data, None pokud den nemá žádné fragmenty
+    """
+    prefix = partition_prefix(asset, day)
+    names = await list_day_blobs(container_client, asset, day)
+    fragments = [name for name in names if name[len(prefix):].startswith(FRAGMENT_PREFIX)]
+    if not fragments:
+        return None
+
+    import pandas as pd
+
+    parts = [await read_parquet_blob(container_client, name) for name in sorted(fragments)]
+    compacted_name = prefix + COMPACTED_NAME
+    if compacted_name in names:
+        parts.insert(0, await read_parquet_blob(container_client, compacted_name))
+
+    df = await write_compacted(container_client, asset, day, pd.concat(parts, ignore_index=True))
+
+    if delete_fragments:
+        for name in fragments:
+            await container_client.delete_blob(name)
+    logging.info(f"Compacted {len(fragments)} fragments into {compacted_name} ({len(df)} rows)")
+    return df
+
+
+async def write_compacted(container_client, asset, day, df):
+    """
+    Zapíše řádky dne jako data.parquet seřazený podle času a aktualizuje manifest.
+
+    Returns:
+        pd.DataFrame: Zapsaná (typovaná a seřazená) data
+    """
+    compacted_name = partition_prefix(asset, day) + COMPACTED_NAME
+    df = prepare_frame(df).sort_values("timestamp", kind="stable", ignore_index=True)
+    data = frame_to_parquet(df, row_group_size=COMPACTED_ROW_GROUP_SIZE)
+    uploaded = await container_client.get_blob_client(compacted_name).upload_blob(data, overwrite=True)
+    await update_manifest(container_client, asset, day, {
+        "blob": compacted_name,
+        "rows": len(df),
+        "size": len(data),
+        # Verze pro cache dotazů - přepsaný den může mít stejnou velikost
+        "etag": uploaded["etag"],
+        "min_timestamp": df["timestamp"].min().isoformat(),
+        "max_timestamp": df["timestamp"].max().isoformat()
+    })
+    return df
+
+
+async def replace_day(container_client, asset, day, df):
+    """
+    Nahradí celý den novými daty (přepočet historie) - opakované volání dá stejný výsledek.
+
+    Zapíše data.parquet a smaže všechny ostatní bloby dne (fragmenty z dřívějších běhů).
+
+    Returns:
+        int: Počet smazaných fragmentů
+    """
+    compacted_name = partition_prefix(asset, day) + COMPACTED_NAME
+    stale = [name for name in await list_day_blobs(container_client, asset, day) if name != compacted_name]
+    await write_compacted(container_client, asset, day, df)
+    for name in stale:
+        await container_client.delete_blob(name)
+    return len(stale)
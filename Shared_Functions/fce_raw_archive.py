@@ -0,0 +1,288 @@
+"""
+Archiv surových snapshotů order booku.
+
+Každý snapshot se uloží jako jeden zstd frame připojený do hodinového append
+blobu raw/<symbol>/<YYYYMMDD>/<HH>.zst, takže pásma i další metriky jde
+později přepočítat ze surových dat.
+
+Kódování záznamu:
+    - ceny jako celočíselné vzdálenosti od mid v ticích; v záznamu jsou mezery
+      mezi sousedními úrovněmi (malá kladná čísla)
+    - množství jako celá čísla (10^-qty_exp) a rozdíl proti množství na stejném
+      absolutním ticku v předchozím snapshotu (nezměněné úrovně jsou nuly)
+    - první záznam hodinového blobu (a první po restartu procesu) je keyframe
+      bez rozdílů, každou hodinu jde tedy dekódovat samostatně
+
+Čtení je proudové: ArchiveDecoder dostává komprimované bloky tak, jak přichází
+ze sítě, a vrací snapshoty postupně, bez dekomprese celé hodiny do paměti.
+Do jednoho blobu smí zapisovat jen jeden proces (timer trigger běží jako singleton).
+zstandard se importuje až při prvním zápisu/čtení, s vypnutým archivem se nenačte.
+"""
+
+import logging
+import os
+import struct
+from datetime import datetime, timezone
+
+import numpy as np
+
+from Shared_Functions.fce_blob_append import append_bytes
+from Shared_Functions.fce_depth_parser import DepthSnapshot
+from Shared_Functions.fce_metrics import span
+
+RAW_ARCHIVE_ENABLED = os.environ.get("RAW_ARCHIVE_ENABLED", "0") == "1"
+RAW_ARCHIVE_LEVEL = int(os.environ.get("RAW_ARCHIVE_LEVEL", "3"))
+RAW_PREFIX = "raw"
+MAX_DECIMALS = 8
+# Škálované hodnoty musí bezpečně projít převodem na int64
+MAX_SCALED_VALUE = 2.0 ** 62
+
+FORMAT_VERSION = 1
+FLAG_KEYFRAME = 1
+# version, flags, timestamp_ms, last_update_id, price_exp, qty_exp, tick, mid_ticks, n_bids, n_asks
+RECORD_HEADER = struct.Struct("<BBqqBBqqII")
+
+_ENCODERS = {}
+_COMPRESSOR = None
+
+
+def archive_blob_name(symbol, timestamp):
+    return f"{RAW_PREFIX}/{symbol}/{timestamp.strftime('%Y%m%d')}/{timestamp.strftime('%H')}.zst"
+
+
+def infer_exponent(values, max_exponent=MAX_DECIMALS):
+    """Nejmenší počet desetinných míst, při kterém jsou všechny hodnoty celá čísla."""
+    for exponent in range(max_exponent + 1):
+        scaled = values * 10.0 ** exponent
+        tolerance = 1e-6 + 8 * np.finfo(np.float64).eps * np.abs(scaled)
+        if np.all(np.abs(scaled - np.rint(scaled)) <= tolerance):
+            return exponent
+    return max_exponent
+
+
+def to_integers(values, exponent):
+    return np.rint(values * 10.0 ** exponent).astype(np.int64)
+
+
+def previous_quantities(keys, previous_keys, previous_values):
+    """Množství na stejných klíčích (absolutních ticích) v předchozím snapshotu, 0 pokud úroveň nebyla."""
+    if len(previous_keys) == 0 or len(keys) == 0:
+        return np.zeros(len(keys), dtype=np.int64)
+    index = np.minimum(np.searchsorted(previous_keys, keys), len(previous_keys) - 1)
+    return np.where(previous_keys[index] == keys, previous_values[index], 0)
+
+
+class SnapshotEncoder:
+    """Kóduje snapshoty jednoho symbolu, drží poslední stav pro rozdílové kódování."""
+
+    def __init__(self):
+        self.previous = None
+
+    def reset(self):
+        self.previous = None
+
+    def encode(self, snapshot, timestamp_ms):
+        """
+        Zakóduje DepthSnapshot do nekomprimovaného záznamu.
+
+        Returns:
+            bytes | None: Záznam, None pro prázdný book
+        """
+        if len(snapshot.bid_prices) == 0 or len(snapshot.ask_prices) == 0:
+            return None
+        prices = np.concatenate([snapshot.bid_prices, snapshot.ask_prices])
+        quantities = np.concatenate([snapshot.bid_qtys, snapshot.ask_qtys])
+        price_exp = infer_exponent(prices)
+        qty_exp = infer_exponent(quantities)
+        if max(np.abs(prices).max() * 10.0 ** price_exp, np.abs(quantities).max() * 10.0 ** qty_exp) >= MAX_SCALED_VALUE:
+            raise ValueError("Snapshot values out of range for integer encoding")
+        price_ints = to_integers(prices, price_exp)
+        tick = int(np.gcd.reduce(price_ints))
+
+        keyframe = self.previous is None
+        if not keyframe:
+            previous_price_exp, previous_qty_exp, previous_tick = self.previous[:3]
+            # Jiné měřítko nejde zarovnat s předchozím stavem, začne se znovu keyframem
+            if (price_exp, qty_exp) != (previous_price_exp, previous_qty_exp) or tick % previous_tick:
+                keyframe = True
+            else:
+                tick = previous_tick
+
+        n_bids = len(snapshot.bid_prices)
+        ticks = price_ints // tick
+        bid_ticks, ask_ticks = ticks[:n_bids], ticks[n_bids:]
+        qty_ints = to_integers(quantities, qty_exp)
+        bid_qtys, ask_qtys = qty_ints[:n_bids], qty_ints[n_bids:]
+        mid_ticks = (int(bid_ticks[0]) + int(ask_ticks[0])) // 2
+
+        bid_offsets = mid_ticks - bid_ticks
+        ask_offsets = ask_ticks - mid_ticks
+        bid_base = ask_base = 0
+        if not keyframe:
+            _, _, _, previous_bid_ticks, previous_bid_qtys, previous_ask_ticks, previous_ask_qtys = self.previous
+            # Bids jsou sestupně, pro searchsorted se porovnávají záporné ticky
+            bid_base = previous_quantities(-bid_ticks, -previous_bid_ticks, previous_bid_qtys)
+            ask_base = previous_quantities(ask_ticks, previous_ask_ticks, previous_ask_qtys)
+
+        header = RECORD_HEADER.pack(
+            FORMAT_VERSION, FLAG_KEYFRAME if keyframe else 0, int(timestamp_ms), int(snapshot.last_update_id),
+            price_exp, qty_exp, tick, mid_ticks, n_bids, len(ask_ticks)
+        )
+        record = b"".join([
+            header,
+            np.diff(bid_offsets, prepend=0).astype("<i4").tobytes(),
+            np.diff(ask_offsets, prepend=0).astype("<i4").tobytes(),
+            (bid_qtys - bid_base).astype("<i8").tobytes(),
+            (ask_qtys - ask_base).astype("<i8").tobytes()
+        ])
+        self.previous = (price_exp, qty_exp, tick, bid_ticks, bid_qtys, ask_ticks, ask_qtys)
+        return record
+
+
+class ArchiveDecoder:
+    """
+    Proudový dekodér hodinového archivu.
+
+    feed() přijímá komprimované bloky libovolné velikosti a vrací dekódované
+    záznamy jako (timestamp_ms, DepthSnapshot).
+    """
+
+    def __init__(self):
+        import zstandard
+
+        self._decompressor = zstandard.ZstdDecompressor().decompressobj(read_across_frames=True)
+        self._buffer = bytearray()
+        self._offset = 0
+        self._previous = None
+
+    def feed(self, data):
+        self._buffer += self._decompressor.decompress(data)
+        while True:
+            record = self._next_record()
+            if record is None:
+                break
+            yield record
+        # Zpracovaná data se z bufferu odstraní najednou, ne po každém záznamu
+        del self._buffer[:self._offset]
+        self._offset = 0
+
+    def _next_record(self):
+        available = len(self._buffer) - self._offset
+        if available < RECORD_HEADER.size:
+            return None
+        header = RECORD_HEADER.unpack_from(self._buffer, self._offset)
+        version, flags, timestamp_ms, last_update_id, price_exp, qty_exp, tick, mid_ticks, n_bids, n_asks = header
+        if version != FORMAT_VERSION:
+            raise ValueError(f"Unsupported raw archive record version {version}")
+        size = RECORD_HEADER.size + 12 * (n_bids + n_asks)
+        if available < size:
+            return None
+
+        position = self._offset + RECORD_HEADER.size
+        arrays = []
+        for dtype, count in (("<i4", n_bids), ("<i4", n_asks), ("<i8", n_bids), ("<i8", n_asks)):
+            arrays.append(np.frombuffer(self._buffer, dtype=dtype, count=count, offset=position).astype(np.int64))
+            position += count * np.dtype(dtype).itemsize
+        self._offset += size
+        bid_gaps, ask_gaps, bid_deltas, ask_deltas = arrays
+
+        bid_ticks = mid_ticks - np.cumsum(bid_gaps)
+        ask_ticks = mid_ticks + np.cumsum(ask_gaps)
+        if flags & FLAG_KEYFRAME:
+            bid_qtys, ask_qtys = bid_deltas, ask_deltas
+        else:
+            if self._previous is None:
+                raise ValueError("Raw archive delta record without preceding keyframe")
+            previous_bid_ticks, previous_bid_qtys, previous_ask_ticks, previous_ask_qtys = self._previous
+            bid_qtys = bid_deltas + previous_quantities(-bid_ticks, -previous_bid_ticks, previous_bid_qtys)
+            ask_qtys = ask_deltas + previous_quantities(ask_ticks, previous_ask_ticks, previous_ask_qtys)
+        self._previous = (bid_ticks, bid_qtys, ask_ticks, ask_qtys)
+
+        # Dělení celého čísla mocninou deseti dá stejný float jako parsování původního řetězce
+        price_scale = 10.0 ** price_exp
+        qty_scale = 10.0 ** qty_exp
+        return timestamp_ms, DepthSnapshot(
+            last_update_id,
+            (bid_ticks * tick) / price_scale,
+            bid_qtys / qty_scale,
+            (ask_ticks * tick) / price_scale,
+            ask_qtys / qty_scale
+        )
+
+
+def get_compressor():
+    global _COMPRESSOR
+    if _COMPRESSOR is None:
+        import zstandard
+
+        _COMPRESSOR = zstandard.ZstdCompressor(level=RAW_ARCHIVE_LEVEL)
+    return _COMPRESSOR
+
+
+async def archive_snapshot(container_client, symbol, snapshot, timestamp=None):
+    """
+    Připojí snapshot do hodinového archivu symbolu.
+
+    Returns:
+        int: Počet zapsaných (komprimovaných) bajtů
+    """
+    timestamp = timestamp or datetime.utcnow()
+    blob_name = archive_blob_name(symbol, timestamp)
+    key = (container_client.container_name, symbol)
+    state = _ENCODERS.get(key)
+    if state is None or state[0] != blob_name:
+        state = (blob_name, SnapshotEncoder())
+        _ENCODERS[key] = state
+    encoder = state[1]
+
+    try:
+        with span("serialize.raw", symbol=symbol) as serialize_span:
+            timestamp_ms = int(timestamp.replace(tzinfo=timezone.utc).timestamp() * 1000)
+            record = encoder.encode(snapshot, timestamp_ms)
+            if record is None:
+                return 0
+            frame = get_compressor().compress(record)
+            serialize_span.set(bytes_in=len(record), bytes_out=len(frame))
+        return await append_bytes(container_client, blob_name, frame)
+    except Exception:
+        # Nezapsaný záznam by rozbil navazující rozdíly, další záznam bude keyframe
+        encoder.reset()
+        raise
+
+
+async def iter_archive(container_client, symbol, hour):
+    """
+    Proudově čte hodinový archiv symbolu.
+
+    Args:
+        hour (datetime): Libovolný čas v požadované hodině (UTC)
+
+    Yields:
+        tuple: (timestamp_ms, DepthSnapshot)
+    """
+    downloader = await container_client.get_blob_client(archive_blob_name(symbol, hour)).download_blob()
+    decoder = ArchiveDecoder()
+    async for chunk in downloader.chunks():
+        for record in decoder.feed(chunk):
+            yield record
+
+
+def iter_archive_file(path, chunk_size=1024 * 1024):
+    """Stejné jako iter_archive, ale pro lokální soubor (stažený archiv)."""
+    decoder = ArchiveDecoder()
+    with open(path, "rb") as f:
+        while True:
+            chunk = f.read(chunk_size)
+            if not chunk:
+                break
+            yield from decoder.feed(chunk)
+
+
+async def archive_snapshots(container_client, symbols, snapshots, timestamp=None):
+    """Archivuje snapshoty všech trhů jednoho běhu; chyba archivu neukončí běh."""
+    timestamp = timestamp or datetime.utcnow()
+    for symbol, snapshot in zip(symbols, snapshots):
+        try:
+            await archive_snapshot(container_client, symbol, snapshot, timestamp)
+        except Exception as e:
+            logging.error(f"Error archiving raw {symbol} snapshot: {e}")
@@ -0,0 +1,330 @@
+"""
+Průběžné hodinové agregáty (rollupy) výstupu kolektoru.
+
+Pro každý asset a hodinu se drží statistiky po klíčích skupina|metrika|strana|pásmo:
+počet, průměr a M2 (Welfordův online algoritmus), minimum a maximum. Běh kolektoru
+přičte své čerstvě naformátované řádky do rollupu aktuální hodiny (O(1) na hodnotu)
+a uloží ho jako malý JSON blob rollups/<asset>/<YYYYMMDD>/<HH>.json. Dashboard tak
+čte pár KB místo celého denního CSV; denní statistiky vzniknou sloučením hodin
+(RunningStats.merge), průměr ani rozptyl se slučováním nezkreslí.
+
+Metriky:
+    band_usd         - notional pásma (strana ask/bid, pásmo level_range)
+    volume_3min_usd  - objem za okno kolektoru, jednou za běh a skupinu
+    price            - referenční cena skupiny, jednou za běh a skupinu
+    spread_bps       - kotovaný spread: nejlepší ask (pásmo 1) minus nejlepší bid
+                       (pásmo -1) vůči jejich středu, jednou za běh a skupinu
+    impact_cost_bps  - round-trip náklad nejmenší velikosti z impact datasetu
+                       (slippage nákupu + prodeje); chybí, když ji book neutáhne
+
+Ztracené rollupy jde přepočítat z denních CSV (collector_logic.rebuild_rollups)
+nebo z archivu surových snapshotů (collector.backfill).
+"""
+
+import json
+import math
+import os
+from datetime import datetime
+
+ROLLUPS_ENABLED = os.environ.get("ROLLUPS_ENABLED", "1") == "1"
+ROLLUP_PREFIX = "rollups"
+KEY_SEPARATOR = "|"
+HOUR_FORMAT = "%Y-%m-%d %H"
+
+# (container, asset) -> HourlyRollup aktuální hodiny; přežívá mezi běhy na teplé instanci
+_CURRENT = {}
+
+
+class RunningStats:
+    """Počet, průměr, M2, minimum a maximum řady hodnot; NaN a nekonečna se přeskočí."""
+
+    __slots__ = ("count", "mean", "m2", "min", "max")
+
+    def __init__(self, count=0, mean=0.0, m2=0.0, minimum=math.inf, maximum=-math.inf):
+        self.count = count
+        self.mean = mean
+        self.m2 = m2
+        self.min = minimum
+        self.max = maximum
+
+    def update(self, value):
+        if value is None or not math.isfinite(value):
+            return
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (value - self.mean)
+        self.min = min(self.min, value)
+        self.max = max(self.max, value)
+
+    def merge(self, other):
+        """Přičte jiné statistiky (paralelní varianta Welforda - Chan et al.)."""
+        if other.count == 0:
+            return self
+        count = self.count + other.count
+        delta = other.mean - self.mean
+        self.mean += delta * other.count / count
+        self.m2 += other.m2 + delta * delta * self.count * other.count / count
+        self.count = count
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        return self
+
+    @property
+    def variance(self):
+        """Výběrový rozptyl, NaN pro méně než dvě hodnoty."""
+        return self.m2 / (self.count - 1) if self.count > 1 else math.nan
+
+    @property
+    def std(self):
+        return math.sqrt(self.variance)
+
+    def summary(self):
+        return {"count": self.count, "mean": self.mean, "std": self.std, "min": self.min, "max": self.max}
+
+    def to_list(self):
+        return [self.count, self.mean, self.m2, self.min, self.max]
+
+    @classmethod
+    def from_list(cls, values):
+        return cls(*values)
+
+
+def rollup_key(group, metric, side="", bucket=""):
+    return KEY_SEPARATOR.join((group, metric, side, bucket))
+
+
+class HourlyRollup:
+    """
+    Statistiky jednoho assetu za jednu hodinu.
+
+    runs je počet různých časů běhu (řádky mají minutové rozlišení, stejně jako
+    při přepočtu z CSV), last_timestamp je čas posledního běhu - podle něj
+    dashboard pozná, jak čerstvý rollup je.
+    """
+
+    def __init__(self, asset, hour, stats=None, runs=0, last_timestamp=""):
+        self.asset = asset
+        self.hour = hour
+        self.stats = stats if stats is not None else {}
+        self.runs = runs
+        self.last_timestamp = last_timestamp
+
+    def apply(self, timestamp, observations):
+        """
+        Započte hodnoty jednoho běhu.
+
+        Args:
+            timestamp (str): čas běhu ve formátu řádků (YYYY-MM-DD HH:MM)
+            observations (list): [(klíč, hodnota), ...]
+        """
+        for key, value in observations:
+            stats = self.stats.get(key)
+            if stats is None:
+                stats = self.stats[key] = RunningStats()
+            stats.update(value)
+        if timestamp != self.last_timestamp:
+            self.runs += 1
+        self.last_timestamp = max(self.last_timestamp, timestamp)
+
+    def to_json(self):
+        return json.dumps({
+            "asset": self.asset,
+            "hour": self.hour.strftime(HOUR_FORMAT),
+            "runs": self.runs,
+            "last_timestamp": self.last_timestamp,
+            "stats": {key: stats.to_list() for key, stats in self.stats.items() if stats.count}
+        }, sort_keys=True)
+
+    @classmethod
+    def from_json(cls, data):
+        stored = json.loads(data)
+        return cls(
+            stored["asset"],
+            datetime.strptime(stored["hour"], HOUR_FORMAT),
+            {key: RunningStats.from_list(values) for key, values in stored["stats"].items()},
+            stored["runs"],
+            stored["last_timestamp"]
+        )
+
+
+def _column(rows, name):
+    """Sloupec ColumnarRows nebo DataFrame (načtené CSV) jako seznam."""
+    return rows.column(name) if hasattr(rows, "column") else rows[name].tolist()
+
+
+def iter_observations(band_rows, impact_rows=None, group_column="quote_asset", value_column="value_usd"):
+    """
+    Hodnoty pro rollupy z řádků pásem a impact křivek (jednoho nebo více běhů).
+
+    Args:
+        band_rows: ColumnarRows nebo DataFrame s řádky pásem
+        impact_rows: ColumnarRows nebo DataFrame s impact řádky, None = bez impact_cost_bps
+        group_column (str): sloupec skupiny pásem (quote_asset / exchange)
+        value_column (str): sloupec notional pásma (value_usd / quantity_usd)
+
+    Yields:
+        tuple: (timestamp, klíč, hodnota)
+    """
+    # Blok řádků pásem jednoho běhu a skupiny: [(timestamp, skupina), {číslo pásma: nejlepší cena}]
+    band_blocks = []
+    for timestamp, group, side, level, bucket, value, best_price, price, volume in zip(
+        _column(band_rows, "timestamp"), _column(band_rows, group_column), _column(band_rows, "type"),
+        _column(band_rows, "level_number"), _column(band_rows, "level_range"), _column(band_rows, value_column),
+        _column(band_rows, "price"), _column(band_rows, "current_price"), _column(band_rows, "volume_3min_usd")
+    ):
+        yield timestamp, rollup_key(group, "band_usd", side, bucket), value
+        # Cena a objem se opakují v celém bloku řádků skupiny, do statistik jdou jednou za blok (běh)
+        if not band_blocks or band_blocks[-1][0] != (timestamp, group):
+            band_blocks.append([(timestamp, group), {}])
+            yield timestamp, rollup_key(group, "price"), price
+            yield timestamp, rollup_key(group, "volume_3min_usd"), volume
+        if level in (1, -1):
+            band_blocks[-1][1][level] = best_price
+    for (timestamp, group), best_prices in band_blocks:
+        # Prázdné první pásmo (žádná nabídka blízko středu) se do CSV nezapisuje, spread pak není známý
+        if 1 in best_prices and -1 in best_prices:
+            best_ask, best_bid = best_prices[1], best_prices[-1]
+            yield timestamp, rollup_key(group, "spread_bps"), (best_ask - best_bid) / ((best_ask + best_bid) / 2) * 1e4
+
+    if impact_rows is None or not len(impact_rows):
+        return
+    # Blok impact řádků jednoho běhu a skupiny: [(timestamp, skupina), nejmenší velikost, {strana: slippage}]
+    blocks = []
+    for timestamp, group, side, size, slippage in zip(
+        _column(impact_rows, "timestamp"), _column(impact_rows, "quote_asset"), _column(impact_rows, "side"),
+        _column(impact_rows, "size_usd"), _column(impact_rows, "slippage_bps")
+    ):
+        if not blocks or blocks[-1][0] != (timestamp, group):
+            blocks.append([(timestamp, group), size, {}])
+        block = blocks[-1]
+        if size < block[1]:
+            block[1], block[2] = size, {}
+        if size == block[1]:
+            block[2][side] = slippage
+    for (timestamp, group), _, slippages in blocks:
+        if "buy" in slippages and "sell" in slippages:
+            yield timestamp, rollup_key(group, "impact_cost_bps"), slippages["buy"] + slippages["sell"]
+
+
+def group_runs(observations):
+    """Seskupí hodnoty podle běhu: {timestamp: [(klíč, hodnota), ...]}."""
+    runs = {}
+    for timestamp, key, value in observations:
+        runs.setdefault(timestamp, []).append((key, value))
+    return runs
+
+
+def run_hour(timestamp):
+    return datetime.strptime(timestamp[:13], HOUR_FORMAT)
+
+
+def build_rollups(asset, observations):
+    """
+    Rollupy ze všech hodnot najednou (přepočet dne).
+
+    Returns:
+        dict: hodina (datetime) -> HourlyRollup
+    """
+    rollups = {}
+    runs = group_runs(observations)
+    for timestamp in sorted(runs):
+        hour = run_hour(timestamp)
+        rollup = rollups.get(hour)
+        if rollup is None:
+            rollup = rollups[hour] = HourlyRollup(asset, hour)
+        rollup.apply(timestamp, runs[timestamp])
+    return rollups
+
+
+def day_prefix(asset, day):
+    return f"{ROLLUP_PREFIX}/{asset}/{day.strftime('%Y%m%d')}/"
+
+
+def rollup_blob_name(asset, hour):
+    return f"{day_prefix(asset, hour)}{hour.strftime('%H')}.json"
+
+
+async def load_rollup(container_client, asset, hour, journal=None):
+    """Načte rollup hodiny (přednostně nenahranou verzi z write-behind journalu), None pokud neexistuje."""
+    blob_name = rollup_blob_name(asset, hour)
+    if journal is not None:
+        pending = journal.latest(container_client.container_name, blob_name)
+        if pending is not None:
+            return HourlyRollup.from_json(pending)
+    try:
+        downloader = await container_client.get_blob_client(blob_name).download_blob()
+        return HourlyRollup.from_json(await downloader.readall())
+    except Exception:
+        return None
+
+
+async def save_rollup(container_client, rollup, journal=None):
+    """Uloží rollup do blobu, s write-behind journalem jen do journalu (nahraje se s dávkou)."""
+    blob_name = rollup_blob_name(rollup.asset, rollup.hour)
+    if journal is not None:
+        journal.put(container_client.container_name, blob_name, rollup.to_json())
+        return
+    await container_client.upload_blob(name=blob_name, data=rollup.to_json(), overwrite=True)
+
+
+async def update_rollups(container_client, asset, observations, journal=None):
+    """
+    Přičte hodnoty běhu do rollupu jeho hodiny a uloží ho.
+
+    Rollup aktuální hodiny se drží v paměti, z blobu se načte jen při změně
+    hodiny nebo po restartu. Při chybě zápisu se zahodí, další běh začne
+    z uloženého stavu (neuložený běh v rollupu chybí, nezapočte se dvakrát).
+
+    Args:
+        journal (WriteBehindJournal): write-behind journal, None = zapisovat rovnou do blobu
+    """
+    key = (container_client.container_name, asset)
+    runs = group_runs(observations)
+    for timestamp in sorted(runs):
+        hour = run_hour(timestamp)
+        rollup = _CURRENT.get(key)
+        if rollup is None or rollup.hour != hour:
+            rollup = await load_rollup(container_client, asset, hour, journal) or HourlyRollup(asset, hour)
+            _CURRENT[key] = rollup
+        rollup.apply(timestamp, runs[timestamp])
+        try:
+            await save_rollup(container_client, rollup, journal)
+        except Exception:
+            _CURRENT.pop(key, None)
+            raise
+
+
+async def replace_day_rollups(container_client, asset, day, rollups):
+    """
+    Nahradí rollupy celého dne (přepočet) - hodiny bez běhů se smažou.
+
+    Returns:
+        int: Počet zapsaných hodin
+    """
+    prefix = day_prefix(asset, day)
+    written = set()
+    for hour in sorted(rollups):
+        await save_rollup(container_client, rollups[hour])
+        written.add(rollup_blob_name(asset, hour))
+    async for blob in container_client.list_blobs(name_starts_with=prefix):
+        if blob.name not in written:
+            await container_client.delete_blob(blob.name)
+    _CURRENT.pop((container_client.container_name, asset), None)
+    return len(written)
+
+
+async def load_day_stats(container_client, asset, day):
+    """
+    Denní statistiky sloučené z hodinových rollupů (pro dashboardy).
+
+    Returns:
+        dict: klíč -> RunningStats, prázdný pokud den nemá rollupy
+    """
+    merged = {}
+    async for blob in container_client.list_blobs(name_starts_with=day_prefix(asset, day)):
+        downloader = await container_client.get_blob_client(blob.name).download_blob()
+        rollup = HourlyRollup.from_json(await downloader.readall())
+        for key, stats in rollup.stats.items():
+            merged.setdefault(key, RunningStats()).merge(stats)
+    return merged
@@ -0,0 +1,202 @@
+"""
+Sloupcový builder výstupních řádků a přímý CSV encoder bez pandas.
+
+Řádky se neskládají jako seznam slovníků, ale po blocích rovnou do sloupců:
+čísla v array('d') / array('q'), textové sloupce jako kódy do tabulky
+internovaných hodnot (timestamp, quote_asset, type, ... se opakují v každém
+řádku, uloží se jednou). CSV encoder píše stejné bajty jako
+DataFrame.to_csv(index=False): float přes repr, NaN jako prázdné pole,
+csv.QUOTE_MINIMAL a os.linesep jako konec řádku. pandas je potřeba jen pro
+Parquet výstup (to_pandas) a importuje se až tam.
+"""
+
+import csv
+import os
+from array import array
+from io import StringIO
+from itertools import islice
+
+STRING = "str"
+FLOAT = "float"
+INT = "int"
+
+LINE_TERMINATOR = os.linesep
+# Znaky, kvůli kterým csv.QUOTE_MINIMAL pole uzavře do uvozovek: oddělovač,
+# uvozovka a znaky konce řádku (samotné \r se při konci řádku \n neuzavírá)
+QUOTE_TRIGGERS = (",", '"', *LINE_TERMINATOR)
+CSV_CHUNK_ROWS = 10000
+
+_ARRAY_TYPECODES = {STRING: "i", FLOAT: "d", INT: "q"}
+
+
+def quote_field(text):
+    if any(char in text for char in QUOTE_TRIGGERS):
+        return '"' + text.replace('"', '""') + '"'
+    return text
+
+
+def format_float(value):
+    # NaN != NaN; pandas píše NaN jako prázdné pole (na_rep="")
+    if value != value:
+        return ""
+    return repr(value)
+
+
+def _is_sequence(value):
+    return hasattr(value, "__len__") and not isinstance(value, str)
+
+
+class ColumnarRows:
+    """
+    Řádky s pevným schématem uložené po sloupcích.
+
+    Args:
+        columns (list): [(název, STRING | FLOAT | INT), ...] v pořadí sloupců CSV
+
+    Example:
+        rows = ColumnarRows([("timestamp", STRING), ("side", STRING), ("depth_usd", FLOAT)])
+        rows.append_block(2, timestamp="2024-01-01 00:00", side=["ask", "bid"], depth_usd=[1.5, 2.5])
+        csv_data = rows.to_csv()
+    """
+
+    def __init__(self, columns):
+        self.columns = [name for name, _ in columns]
+        self.kinds = [kind for _, kind in columns]
+        self._data = [array(_ARRAY_TYPECODES[kind]) for kind in self.kinds]
+        # Pro textové sloupce: hodnota -> kód a seznam hodnot podle kódu
+        self._codes = [{} if kind == STRING else None for kind in self.kinds]
+        self._values = [[] if kind == STRING else None for kind in self.kinds]
+        self._length = 0
+
+    def __len__(self):
+        return self._length
+
+    @property
+    def schema(self):
+        """[(název, druh), ...] - argument konstruktoru, dá se uložit jako JSON."""
+        return list(zip(self.columns, self.kinds))
+
+    @classmethod
+    def from_csv(cls, csv_data, columns):
+        """
+        Načte CSV zapsané přes to_csv zpět do builderu s daným schématem.
+
+        Na rozdíl od pandas.read_csv se typ sloupce neodhaduje z hodnot: prázdný
+        textový sloupec zůstane textový, prázdné číslo je NaN.
+        """
+        rows = cls(columns)
+        reader = csv.reader(StringIO(csv_data, newline=""))
+        header = next(reader, None)
+        if header is None:
+            return rows
+        if header != rows.columns:
+            raise ValueError(f"CSV header {header} does not match columns {rows.columns}")
+        records = [record for record in reader if record]
+        if records:
+            values = {}
+            for name, kind, column in zip(rows.columns, rows.kinds, zip(*records)):
+                if kind == FLOAT:
+                    values[name] = [float(value) if value else None for value in column]
+                elif kind == INT:
+                    values[name] = [int(value) for value in column]
+                else:
+                    values[name] = column
+            rows.append_block(len(records), **values)
+        return rows
+
+    def _intern(self, index, value):
+        value = "" if value is None else value
+        codes = self._codes[index]
+        code = codes.get(value)
+        if code is None:
+            code = codes[value] = len(self._values[index])
+            self._values[index].append(value)
+        return code
+
+    def append_block(self, count, **values):
+        """
+        Přidá count řádků. Hodnota sloupce je buď skalár (stejný pro všechny
+        řádky bloku), nebo sekvence délky count. Chybějící sloupec je chyba.
+        """
+        for index, (name, kind) in enumerate(zip(self.columns, self.kinds)):
+            value = values[name]
+            column = self._data[index]
+            if kind == STRING:
+                if _is_sequence(value):
+                    column.extend([self._intern(index, item) for item in value])
+                else:
+                    column.extend(array("i", [self._intern(index, value)]) * count)
+            elif kind == FLOAT:
+                if _is_sequence(value):
+                    column.extend([float("nan") if item is None else float(item) for item in value])
+                else:
+                    column.extend(array("d", [float("nan") if value is None else float(value)]) * count)
+            else:
+                if _is_sequence(value):
+                    column.extend([int(item) for item in value])
+                else:
+                    column.extend(array("q", [int(value)]) * count)
+            if len(column) != self._length + count:
+                raise ValueError(f"Column {name} has {len(column) - self._length} values, expected {count}")
+        self._length += count
+
+    def extend(self, other):
+        """Připojí řádky jiného builderu se stejným schématem."""
+        if other.columns != self.columns or other.kinds != self.kinds:
+            raise ValueError("Cannot extend rows with a different schema")
+        for index, kind in enumerate(self.kinds):
+            if kind == STRING:
+                remap = [self._intern(index, value) for value in other._values[index]]
+                self._data[index].extend([remap[code] for code in other._data[index]])
+            else:
+                self._data[index].extend(other._data[index])
+        self._length += len(other)
+
+    def column(self, name):
+        """Hodnoty jednoho sloupce jako seznam (textové sloupce dekódované)."""
+        index = self.columns.index(name)
+        if self.kinds[index] == STRING:
+            return list(map(self._values[index].__getitem__, self._data[index]))
+        return self._data[index].tolist()
+
+    def _formatted_column(self, index):
+        kind = self.kinds[index]
+        data = self._data[index]
+        if kind == STRING:
+            # Každá internovaná hodnota se formátuje jednou, řádky jen indexují
+            labels = [quote_field(value) for value in self._values[index]]
+            return map(labels.__getitem__, data)
+        if kind == FLOAT:
+            return map(format_float, data)
+        return map(str, data)
+
+    def iter_csv(self, header=True, chunk_rows=CSV_CHUNK_ROWS):
+        """Proudově vrací CSV text po blocích nejvýš chunk_rows řádků."""
+        if header:
+            yield ",".join(map(quote_field, self.columns)) + LINE_TERMINATOR
+        lines = map(",".join, zip(*(self._formatted_column(index) for index in range(len(self.columns)))))
+        while True:
+            chunk = list(islice(lines, chunk_rows))
+            if not chunk:
+                break
+            yield LINE_TERMINATOR.join(chunk) + LINE_TERMINATOR
+
+    def to_csv(self, header=True):
+        """CSV text shodný s pandas.DataFrame.to_csv(index=False)."""
+        return "".join(self.iter_csv(header))
+
+    def to_pandas(self):
+        """DataFrame pro Parquet výstup; textové sloupce jsou rovnou kategorické."""
+        import numpy as np
+        import pandas as pd
+
+        data = {}
+        for index, (name, kind) in enumerate(zip(self.columns, self.kinds)):
+            column = self._data[index]
+            if kind == STRING:
+                codes = np.frombuffer(column, dtype=np.int32) if len(column) else np.empty(0, dtype=np.int32)
+                data[name] = pd.Categorical.from_codes(codes.copy(), categories=self._values[index])
+            else:
+                dtype = np.float64 if kind == FLOAT else np.int64
+                data[name] = np.frombuffer(column, dtype=dtype).copy() if len(column) else np.empty(0, dtype=dtype)
+        return pd.DataFrame(data, columns=self.columns)
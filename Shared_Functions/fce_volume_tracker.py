@@ -0,0 +1,157 @@
+"""
+Objem obchodů za časové okno z /api/v3/aggTrades s perzistentním kurzorem.
+
+Místo posledních 1000 obchodů z /api/v3/trades (na ETHUSDT pokryjí jen zlomek
+3 minut) se pro každý symbol drží fromId kurzor a stránkuje se jen přes nové
+obchody. Kurzor se ukládá kousek před konec okna (OVERLAP_MS), takže běh, který
+přijde o pár sekund dřív, nepřijde o obchody na začátku svého okna. Kurzor se
+použije, jen když začátek okna leží mezi pozicí kurzoru a koncem předchozího
+okna; jinak se okno načte od startTime. Starší kurzor (vynechaný nebo opožděný
+běh) by stránkoval přes obchody před oknem, novější (předchozí běh skončil víc
+než OVERLAP_MS po začátku tohoto okna) by přeskočil obchody na jeho začátku.
+"""
+
+import asyncio
+import json
+import logging
+import time
+
+from Shared_Functions.fce_binance_client import binance_get
+
+AGG_TRADES_PATH = "/api/v3/aggTrades"
+PAGE_LIMIT = 1000
+MAX_PAGES = 30
+OVERLAP_MS = 60 * 1000
+CURSOR_BLOB_NAME = "state/agg_trade_cursors.json"
+DEFAULT_CONCURRENCY = 4
+
+# symbol -> {"from_id": int, "updated": ms}; přežívá mezi běhy na teplé instanci
+_CURSORS = {}
+_LOADED_BLOBS = set()
+
+
+async def fetch_window_volume(symbol, minutes=3, now_ms=None, cursors=None, max_pages=MAX_PAGES):
+    """
+    Spočítá notional obchodů symbolu v okně [now - minutes, now).
+
+    Args:
+        symbol (str): Symbol, např. "ETHUSDT"
+        minutes (int): Délka okna v minutách
+        now_ms (int): Konec okna v ms, výchozí je aktuální čas
+        cursors (dict): Úložiště kurzorů, výchozí je procesní _CURSORS
+        max_pages (int): Maximální počet stránek aggTrades na jeden běh
+
+    Returns:
+        dict: {"notional", "buy_notional", "sell_notional", "trades", "complete"}
+              - buy/sell podle strany takera, complete=False pokud došly stránky
+    """
+    cursors = _CURSORS if cursors is None else cursors
+    window_end = int(time.time() * 1000) if now_ms is None else now_ms
+    window_start = window_end - minutes * 60 * 1000
+    resume_after = window_end - OVERLAP_MS
+
+    cursor = cursors.get(symbol)
+    # Kurzor ukazuje na první obchod od updated - OVERLAP_MS, okno musí začínat mezi tím a updated
+    if cursor is None or not cursor["updated"] - OVERLAP_MS <= window_start <= cursor["updated"]:
+        params = {"symbol": symbol, "startTime": window_start, "endTime": window_end - 1, "limit": PAGE_LIMIT}
+    else:
+        params = {"symbol": symbol, "fromId": cursor["from_id"], "limit": PAGE_LIMIT}
+
+    result = {"notional": 0.0, "buy_notional": 0.0, "sell_notional": 0.0, "trades": 0, "complete": True}
+    next_id = cursor["from_id"] if cursor else None
+    resume_id = None
+
+    for _ in range(max_pages):
+        trades = await binance_get(AGG_TRADES_PATH, params)
+        reached_end = False
+        for trade in trades:
+            trade_time = trade["T"]
+            if trade_time >= window_end:
+                reached_end = True
+                break
+            next_id = trade["a"] + 1
+            if resume_id is None and trade_time >= resume_after:
+                resume_id = trade["a"]
+            if trade_time < window_start:
+                continue
+            value = float(trade["p"]) * float(trade["q"])
+            result["notional"] += value
+            # m = buyer je maker, tj. taker prodával
+            if trade["m"]:
+                result["sell_notional"] += value
+            else:
+                result["buy_notional"] += value
+            result["trades"] += 1
+
+        if reached_end or len(trades) < PAGE_LIMIT:
+            break
+        params = {"symbol": symbol, "fromId": next_id, "limit": PAGE_LIMIT}
+    else:
+        result["complete"] = False
+        logging.warning(f"aggTrades for {symbol} truncated after {max_pages} pages")
+
+    from_id = resume_id if resume_id is not None else next_id
+    if from_id is not None:
+        cursors[symbol] = {"from_id": from_id, "updated": window_end}
+    return result
+
+
+async def fetch_window_volumes(symbols, minutes=3, concurrency=DEFAULT_CONCURRENCY, cursors=None, timeout=None):
+    """
+    Spočítá objemy pro více symbolů najednou s omezenou paralelitou.
+
+    Args:
+        timeout (float): Limit na symbol včetně čekání na volný slot (s), None = bez limitu.
+                         Přerušené stránkování kurzor nemění, další běh naváže.
+
+    Returns:
+        dict: symbol -> výsledek fetch_window_volume, nebo None při chybě či timeoutu
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+    now_ms = int(time.time() * 1000)
+
+    async def fetch_limited(symbol):
+        async with semaphore:
+            return await fetch_window_volume(symbol, minutes, now_ms=now_ms, cursors=cursors)
+
+    async def fetch(symbol):
+        try:
+            return await asyncio.wait_for(fetch_limited(symbol), timeout)
+        except asyncio.TimeoutError:
+            # TimeoutError může přijít i bez vlastního limitu (HTTP klient)
+            limit = f" after {timeout:.1f}s" if timeout is not None else ""
+            logging.error(f"Timed out fetching {symbol} aggTrades volume{limit}")
+            return None
+        except Exception as e:
+            logging.error(f"Error fetching {symbol} aggTrades volume: {e}")
+            return None
+
+    results = await asyncio.gather(*(fetch(symbol) for symbol in symbols))
+    return dict(zip(symbols, results))
+
+
+async def load_cursors(container_client, blob_name=CURSOR_BLOB_NAME):
+    """Načte uložené kurzory z blobu do _CURSORS (jen chybějící symboly, jednou za proces)."""
+    key = (container_client.container_name, blob_name)
+    if key in _LOADED_BLOBS:
+        return _CURSORS
+    _LOADED_BLOBS.add(key)
+    try:
+        downloader = await container_client.get_blob_client(blob_name).download_blob()
+        stored = json.loads(await downloader.readall())
+    except Exception:
+        logging.info(f"No stored aggTrades cursors in {blob_name}")
+        return _CURSORS
+    for symbol, cursor in stored.items():
+        _CURSORS.setdefault(symbol, cursor)
+    return _CURSORS
+
+
+def dump_cursors(symbols):
+    """Kurzory daných symbolů jako JSON obsah blobu (pro save_cursors nebo write-behind journal)."""
+    return json.dumps({symbol: _CURSORS[symbol] for symbol in symbols if symbol in _CURSORS})
+
+
+async def save_cursors(container_client, symbols, blob_name=CURSOR_BLOB_NAME):
+    """Uloží kurzory daných symbolů do blobu."""
+    await container_client.upload_blob(name=blob_name, data=dump_cursors(symbols), overwrite=True)
@@ -0,0 +1,350 @@
+"""
+Write-behind vrstva pro výstupy kolektoru.
+
+Řádky každého běhu se jen připíšou (s fsync) do lokálního journalu a běh
+pokračuje bez čekání na blob storage. Do blobů se dávka nahraje jednou za
+WRITE_BEHIND_FLUSH_RUNS běhů nebo po WRITE_BEHIND_FLUSH_MINUTES minutách
+od nejstaršího záznamu a při ukončení procesu. Nenahrané záznamy se po pádu
+nebo restartu hostitele načtou z journalu znovu.
+
+Kromě CSV řádků drží journal i náhrady celých blobů (stav kurzorů, rollupy),
+nahraje se jen poslední verze každého blobu.
+
+Po každé doručené skupině (jeden CSV soubor, jeden Parquet fragment, jeden
+blob) se journal přepíše jen na nedoručené záznamy, takže chyba nebo pád
+uprostřed flushe už doručené řádky znovu nepřipojí. Doručení je at-least-once
+jen v okně mezi potvrzeným appendem a přepsáním journalu. Journal musí ležet
+na disku, který přežije restart procesu - WRITE_BEHIND_DIR proto nemá výchozí
+hodnotu (temp hostitele Azure Functions se při recyklaci maže, vhodný je např.
+$HOME/data) a bez něj zůstane write-behind vypnutý.
+
+Write-behind nezrychlí jeden běh proti lokálnímu úložišti (benchmark flow
+write_behind je kvůli fsync a flushi pomalejší než přímý append); šetří počet
+síťových zápisů do blob storage a odstiňuje běh od jeho výpadků.
+"""
+
+import asyncio
+import atexit
+import json
+import logging
+import os
+import time
+import uuid
+from datetime import datetime
+from io import StringIO
+
+from Shared_Functions.fce_blob_append import append_csv
+from Shared_Functions.fce_metrics import span
+from Shared_Functions.fce_parquet_store import write_fragment
+from Shared_Functions.fce_row_builder import ColumnarRows
+
+WRITE_BEHIND_ENABLED = os.environ.get("WRITE_BEHIND_ENABLED", "0") == "1"
+WRITE_BEHIND_DIR = os.environ.get("WRITE_BEHIND_DIR")
+WRITE_BEHIND_FLUSH_RUNS = int(os.environ.get("WRITE_BEHIND_FLUSH_RUNS", "5"))
+WRITE_BEHIND_FLUSH_MINUTES = float(os.environ.get("WRITE_BEHIND_FLUSH_MINUTES", "15"))
+
+JOURNAL_NAME = "journal.jsonl"
+FLUSHING_SUFFIX = ".flushing"
+
+_JOURNAL = None
+_MISSING_DIR_LOGGED = False
+
+
+class WriteBehindJournal:
+    """
+    Lokální journal záznamů čekajících na nahrání.
+
+    Záznam je jeden řádek JSON s CSV textem jednoho datasetu jednoho běhu a cíli
+    (CSV blob a/nebo Parquet asset), nebo s novým obsahem celého blobu. Doručený
+    cíl se v záznamu vynuluje. Záznamy v paměti odpovídají vždy všem souborům
+    journalu na disku.
+    """
+
+    def __init__(self, directory, flush_runs=WRITE_BEHIND_FLUSH_RUNS,
+                 flush_minutes=WRITE_BEHIND_FLUSH_MINUTES, clock=time.time):
+        self.directory = directory
+        self.flush_runs = flush_runs
+        self.flush_minutes = flush_minutes
+        self.runs_since_flush = 0
+        self._clock = clock
+        self._lock = None
+        self._lock_loop = None
+        os.makedirs(directory, exist_ok=True)
+        self._files = self._journal_files()
+        self._entries = self._replay(self._files)
+        if self._entries:
+            logging.warning(f"Replaying {len(self._entries)} unflushed write-behind entries from {directory}")
+
+    @property
+    def journal_path(self):
+        return os.path.join(self.directory, JOURNAL_NAME)
+
+    def _journal_files(self):
+        names = sorted(name for name in os.listdir(self.directory) if name.endswith(FLUSHING_SUFFIX))
+        if os.path.exists(self.journal_path):
+            names.append(JOURNAL_NAME)
+        return [os.path.join(self.directory, name) for name in names]
+
+    def _replay(self, paths):
+        # Po pádu během začátku flushe může být záznam ve dvou souborech, platí pozdější verze
+        entries = {}
+        for path in paths:
+            with open(path, encoding="utf-8") as f:
+                for line_number, line in enumerate(f):
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        # Nedopsaný poslední řádek po pádu během zápisu
+                        logging.warning(f"Skipping corrupted write-behind journal line in {path}")
+                        continue
+                    entries[entry.get("id") or f"{path}:{line_number}"] = entry
+        return [entry for entry in entries.values() if undelivered(entry)]
+
+    def pending(self):
+        return len(self._entries)
+
+    def append(self, container, csv_data, csv_blob=None, parquet_asset=None, run_time=None, columns=None):
+        """
+        Trvale zapíše záznam do journalu. Vrací se hned po fsync, bez síťové komunikace.
+
+        Args:
+            container (str): Název blob kontejneru
+            csv_data (str): Řádky datasetu jako CSV včetně hlavičky
+            csv_blob (str): Denní CSV soubor, None = do CSV nezapisovat
+            parquet_asset (str): Parquet partition, None = Parquet nezapisovat
+            run_time (datetime): Čas běhu (UTC)
+            columns (list): Schéma řádků (ColumnarRows.schema), aby Parquet fragment
+                            z journalu měl stejné typy sloupců jako přímý zápis
+        """
+        self._write({
+            "container": container,
+            "csv_blob": csv_blob,
+            "parquet_asset": parquet_asset,
+            "columns": columns,
+            "csv": csv_data
+        }, run_time)
+
+    def put(self, container, blob_name, data, run_time=None):
+        """
+        Trvale zapíše nový obsah celého blobu (přepis, ne append).
+
+        Při flushi se nahraje jen poslední verze každého blobu.
+
+        Args:
+            container (str): Název blob kontejneru
+            blob_name (str): Název blobu
+            data (str): Nový obsah blobu
+            run_time (datetime): Čas běhu (UTC)
+        """
+        self._write({"container": container, "blob": blob_name, "data": data}, run_time)
+
+    def latest(self, container, blob_name):
+        """Poslední nenahraný obsah blobu zapsaný přes put(), None pokud žádný nečeká."""
+        for entry in reversed(self._entries):
+            if entry.get("blob") == blob_name and entry["container"] == container:
+                return entry["data"]
+        return None
+
+    def _write(self, entry, run_time):
+        entry.update(
+            id=uuid.uuid4().hex,
+            run_time=(run_time or datetime.utcnow()).isoformat(timespec="seconds"),
+            written=self._clock()
+        )
+        with open(self.journal_path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(entry, separators=(",", ":")) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        if self.journal_path not in self._files:
+            self._files.append(self.journal_path)
+        self._entries.append(entry)
+
+    def record_run(self):
+        self.runs_since_flush += 1
+
+    def should_flush(self):
+        if not self._entries:
+            return False
+        if self.runs_since_flush >= self.flush_runs:
+            return True
+        oldest = min(entry["written"] for entry in self._entries)
+        return self._clock() - oldest >= self.flush_minutes * 60
+
+    def _get_lock(self):
+        loop = asyncio.get_running_loop()
+        if self._lock is None or self._lock_loop is not loop:
+            self._lock = asyncio.Lock()
+            self._lock_loop = loop
+        return self._lock
+
+    async def flush(self, get_container_client):
+        """
+        Nahraje všechny čekající záznamy a smaže jejich journal.
+
+        Dávka se nejdřív přepíše do jednoho souboru .flushing a po každé doručené
+        skupině se v něm nechají jen nedoručené záznamy. Při chybě v journalu
+        zůstanou jen ty, další pokus už doručené řádky nepřipojí znovu.
+
+        Args:
+            get_container_client (callable): název kontejneru -> container client
+
+        Returns:
+            int: Počet nahraných záznamů
+        """
+        async with self._get_lock():
+            if not self._entries:
+                return 0
+            # Zápisy během nahrávání jdou do nového journal.jsonl
+            batch, files = self._entries, self._files
+            self._entries, self._files = [], []
+            flushing_path = os.path.join(self.directory, f"journal-{time.time_ns()}{FLUSHING_SUFFIX}")
+            write_entries(flushing_path, batch)
+            for path in files:
+                os.remove(path)
+
+            def checkpoint():
+                write_entries(flushing_path, [entry for entry in batch if undelivered(entry)])
+
+            try:
+                with span("write_behind.flush", rows=len(batch)):
+                    await upload_entries(batch, get_container_client, on_delivered=checkpoint)
+            except Exception:
+                remaining = [entry for entry in batch if undelivered(entry)]
+                self._entries = remaining + self._entries
+                if remaining:
+                    self._files = [flushing_path] + self._files
+                raise
+
+            write_entries(flushing_path, [])
+            self.runs_since_flush = 0
+            logging.info(f"Flushed {len(batch)} write-behind entries")
+            return len(batch)
+
+
+def undelivered(entry):
+    """True, pokud záznam ještě má nedoručený cíl."""
+    return bool(entry.get("csv_blob") or entry.get("parquet_asset") or entry.get("blob"))
+
+
+def write_entries(path, entries):
+    """Atomicky přepíše soubor journalu na dané záznamy, prázdný seznam soubor smaže."""
+    if not entries:
+        if os.path.exists(path):
+            os.remove(path)
+        return
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        for entry in entries:
+            f.write(json.dumps(entry, separators=(",", ":")) + "\n")
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+async def upload_entries(entries, get_container_client, on_delivered=None):
+    """
+    Nahraje dávku záznamů: jeden append na každý CSV soubor, jeden Parquet
+    fragment na každý asset a den, pojmenovaný rozsahem časů běhů, a poslední
+    verzi každého přepisovaného blobu.
+
+    Po doručení skupiny se v jejích záznamech vynuluje cíl a zavolá se
+    on_delivered(), aby journal mohl doručené záznamy zahodit.
+    """
+    csv_groups = {}
+    parquet_groups = {}
+    blob_groups = {}
+    for entry in entries:
+        if entry.get("blob"):
+            blob_groups.setdefault((entry["container"], entry["blob"]), []).append(entry)
+            continue
+        header, _, body = entry["csv"].partition("\n")
+        if entry["csv_blob"]:
+            group = csv_groups.setdefault((entry["container"], entry["csv_blob"]), (header, [], []))
+            group[1].append(body)
+            group[2].append(entry)
+        if entry["parquet_asset"]:
+            if not body:
+                # Běh bez řádků, do Parquetu není co zapsat
+                entry["parquet_asset"] = None
+                continue
+            key = (entry["container"], entry["parquet_asset"], datetime.fromisoformat(entry["run_time"]).date())
+            parquet_groups.setdefault(key, []).append(entry)
+
+    def delivered(group, target):
+        for entry in group:
+            entry[target] = None
+        if on_delivered is not None:
+            on_delivered()
+
+    for (container, blob_name), (header, bodies, group) in csv_groups.items():
+        await append_csv(get_container_client(container), blob_name, header + "\n" + "".join(bodies))
+        delivered(group, "csv_blob")
+
+    for (container, asset, _), group in parquet_groups.items():
+        df = read_entries_frame(group)
+        run_times = [datetime.fromisoformat(entry["run_time"]) for entry in group]
+        await write_fragment(get_container_client(container), asset, df,
+                             run_time=min(run_times), end_time=max(run_times))
+        delivered(group, "parquet_asset")
+
+    for (container, blob_name), group in blob_groups.items():
+        await get_container_client(container).upload_blob(name=blob_name, data=group[-1]["data"], overwrite=True)
+        delivered(group, "blob")
+
+
+def read_entries_frame(entries):
+    """
+    Řádky záznamů jako DataFrame pro Parquet.
+
+    Záznamy se schématem se načtou přes ColumnarRows, takže fragment má stejné
+    typy jako přímý zápis (textové sloupce kategorické i když jsou celé prázdné).
+    """
+    import pandas as pd
+
+    if all(entry.get("columns") for entry in entries):
+        rows = ColumnarRows(entries[0]["columns"])
+        for entry in entries:
+            rows.extend(ColumnarRows.from_csv(entry["csv"], entry["columns"]))
+        return rows.to_pandas()
+    # Záznam zapsaný starší verzí journalu bez schématu
+    return pd.concat([pd.read_csv(StringIO(entry["csv"])) for entry in entries], ignore_index=True)
+
+
+def get_journal():
+    """Vrátí procesní journal, None pokud je write-behind vypnutý nebo chybí WRITE_BEHIND_DIR."""
+    global _JOURNAL, _MISSING_DIR_LOGGED
+    if _JOURNAL is None and WRITE_BEHIND_ENABLED:
+        if not WRITE_BEHIND_DIR:
+            if not _MISSING_DIR_LOGGED:
+                logging.error("WRITE_BEHIND_ENABLED needs WRITE_BEHIND_DIR on persistent storage, writing directly")
+                _MISSING_DIR_LOGGED = True
+            return None
+        _JOURNAL = WriteBehindJournal(WRITE_BEHIND_DIR)
+    return _JOURNAL
+
+
+def register_exit_flush(journal, open_service_client):
+    """
+    Při ukončení procesu nahraje zbytek journalu.
+
+    Event loop ani klienti z běhu už nemusí existovat, proto se použije nový
+    loop a nový service client z open_service_client(). Pokud flush selže,
+    data zůstanou v journalu a nahrají se po restartu.
+    """
+    def flush_at_exit():
+        if not journal.pending():
+            return
+
+        async def run():
+            service_client = open_service_client()
+            try:
+                await journal.flush(service_client.get_container_client)
+            finally:
+                await service_client.close()
+
+        try:
+            asyncio.run(run())
+        except Exception as e:
+            logging.error(f"Write-behind flush at exit failed, entries stay in journal: {e}")
+
+    atexit.register(flush_at_exit)
@@ -0,0 +1 @@
+"""AAVE likvidita - obálka nad společným kolektorem."""
@@ -0,0 +1,305 @@
+"""
+Offline benchmark sběrné pipeline.
+
+Měří agregaci (Shared_Functions), slití booků více trhů (fce_book_merge, pro
+srovnání i heapq.merge), format_data_for_csv obou modulů a celé běhy
+*_liquidity_storage_impl proti lokálnímu stubu Binance a lokálnímu blob kontejneru,
+včetně scénáře "konec dne", kdy denní soubor už obsahuje 479 běhů, a scénáře
+"write_behind" se zápisem do lokálního journalu (fce_write_behind).
+
+Použití:
+    python benchmarks/bench_pipeline.py                     # spustí vše a uloží výsledky
+    python benchmarks/bench_pipeline.py --quick             # méně iterací
+    python benchmarks/bench_pipeline.py --compare benchmarks/results/<commit>.json
+"""
+
+import argparse
+import asyncio
+import heapq
+import json
+import logging
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_ROOT = os.path.dirname(BENCH_DIR)
+RESULTS_DIR = os.path.join(BENCH_DIR, "results")
+sys.path.insert(0, REPO_ROOT)
+sys.path.insert(0, BENCH_DIR)
+
+from aave import aave_logic  # noqa: E402
+from collector import collector_logic  # noqa: E402
+from eth import eth_logic  # noqa: E402
+from Shared_Functions import fce_binance_client  # noqa: E402
+from Shared_Functions import fce_market_data  # noqa: E402
+from Shared_Functions import fce_write_behind  # noqa: E402
+from Shared_Functions.fce_aggregate_orders_Large import aggregate_orders_by_levels  # noqa: E402
+from Shared_Functions.fce_aggregate_orders_Medium import aggregate_orders_by_levels_medium  # noqa: E402
+from Shared_Functions.fce_blob_append import append_csv  # noqa: E402
+from Shared_Functions.fce_book_merge import merge_sides  # noqa: E402
+from Shared_Functions.fce_depth_parser import parse_depth  # noqa: E402
+from Shared_Functions.fce_local_blob import LocalBlobServiceClient  # noqa: E402
+from synthetic_data import generate_depth_book, generate_depth_payload  # noqa: E402
+from stub_binance import StubBinance  # noqa: E402
+
+BOOK_SIZES = (1000, 2000, 5000)
+MERGE_MARKETS = ("ETHUSDT", "ETHUSDC", "BTCUSDT")
+END_OF_DAY_RUNS = 479
+REGRESSION_THRESHOLD = 0.2
+
+
+def percentile(sorted_samples, q):
+    index = min(len(sorted_samples) - 1, max(0, round(q * (len(sorted_samples) - 1))))
+    return sorted_samples[index]
+
+
+def summarize(samples, peak_memory, items_per_iteration=1):
+    ordered = sorted(samples)
+    total = sum(samples)
+    return {
+        "iterations": len(samples),
+        "mean_ms": total / len(samples) * 1000,
+        "p50_ms": percentile(ordered, 0.5) * 1000,
+        "p99_ms": percentile(ordered, 0.99) * 1000,
+        "throughput_per_s": len(samples) * items_per_iteration / total if total else None,
+        "peak_memory_kb": peak_memory / 1024
+    }
+
+
+def measure(func, iterations, items_per_iteration=1):
+    func()
+    samples = []
+    tracemalloc.start()
+    for _ in range(iterations):
+        start = time.perf_counter()
+        func()
+        samples.append(time.perf_counter() - start)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return summarize(samples, peak, items_per_iteration)
+
+
+async def measure_async(func, iterations):
+    await func()
+    samples = []
+    tracemalloc.start()
+    for _ in range(iterations):
+        start = time.perf_counter()
+        await func()
+        samples.append(time.perf_counter() - start)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return summarize(samples, peak)
+
+
+def bench_aggregation(iterations):
+    results = {}
+    for levels in BOOK_SIZES:
+        book = generate_depth_book(2500.0, 0.01, levels=levels, seed=levels)
+        mid = (float(book["bids"][0][0]) + float(book["asks"][0][0])) / 2
+        # Úrovně jsou v booku rozprostřené, takže 1-3 % pásma pokryjí jen část z nich
+        for name, func in (("medium", aggregate_orders_by_levels_medium), ("large", aggregate_orders_by_levels)):
+            results[f"aggregate_{name}_{levels}"] = measure(
+                lambda: (func(book["asks"], mid, True), func(book["bids"], mid, False)),
+                iterations,
+                items_per_iteration=2 * levels
+            )
+    return results
+
+
+def heapq_merge_sides(sides):
+    """Referenční k-cestné slití dvojicí ukazatelů na úroveň (heapq.merge) pro srovnání s merge_sides."""
+    merged = list(heapq.merge(*(zip(prices.tolist(), values.tolist()) for prices, values in sides),
+                              key=lambda level: level[0]))
+    return [price for price, _ in merged], [value for _, value in merged]
+
+
+def bench_merge(iterations):
+    results = {}
+    for levels in BOOK_SIZES:
+        snapshots = [parse_depth(generate_depth_payload(symbol, levels, seed=index))
+                     for index, symbol in enumerate(MERGE_MARKETS)]
+        asks = [(snapshot.ask_prices, snapshot.ask_prices * snapshot.ask_qtys) for snapshot in snapshots]
+        name = f"{len(asks)}x{levels}"
+        results[f"merge_sides_{name}"] = measure(lambda: merge_sides(asks), iterations,
+                                                 items_per_iteration=len(asks) * levels)
+        results[f"merge_heapq_{name}"] = measure(lambda: heapq_merge_sides(asks), iterations,
+                                                 items_per_iteration=len(asks) * levels)
+    return results
+
+
+def sample_liquidity(quote_asset="USD"):
+    return {
+        "price": 2500.0,
+        "orderbook": {
+            "asks": [(2500.05, 2.5e6, "0-0.25%"), (2506.3, 7.3e6, "0.25-1%")],
+            "bids": [(2499.95, 2.7e6, "0 to -0.25%"), (2493.7, 6.4e6, "-0.25 to -1%")]
+        },
+        "volume_3min": 1.5e6,
+        "volume_3min_usd": 1.5e6
+    }
+
+
+def bench_formatting(iterations):
+    eth_data = {"USD": sample_liquidity(), "BTC": sample_liquidity("BTC")}
+    aave_data = sample_liquidity()
+    return {
+        "format_eth": measure(lambda: eth_logic.format_data_for_csv(eth_data, 62500.0), iterations),
+        "format_aave": measure(lambda: aave_logic.format_data_for_csv(aave_data), iterations)
+    }
+
+
+async def prefill_daily_file(service_client, module, formatter, runs):
+    """Naplní dnešní denní soubor daným počtem běhů (konec dne)."""
+    csv_data = formatter().to_csv()
+    header, _, body = csv_data.partition("\n")
+    container_client = service_client.get_container_client(module.CONTAINER_NAME)
+    await append_csv(container_client, module.get_csv_filename(), header + "\n" + body * runs)
+
+
+async def bench_flows(iterations, levels):
+    stub = StubBinance(levels=levels)
+    base_url = await stub.start()
+    fce_binance_client.BINANCE_BASE_URL = base_url
+    await fce_binance_client.close_session()
+    # Stub nemá limit váhy, throttling by měřil čekání místo pipeline
+    fce_binance_client._WEIGHT_TRACKER = fce_binance_client.WeightTracker(limit=10 ** 9)
+    # Bez TTL cache, jinak by opakované běhy měřily jen cache; slučování souběžných požadavků zůstává
+    fce_market_data._GATEWAY = fce_market_data.MarketDataGateway(price_ttl=0, depth_ttl=0)
+    # Journal benchmarku se nahraje do lokálního kontejneru na konci scénáře,
+    # flush při ukončení procesu (do skutečného Azure) se pro něj neregistruje
+    exit_flush_registered = collector_logic._EXIT_FLUSH_REGISTERED
+    collector_logic._EXIT_FLUSH_REGISTERED = True
+    results = {}
+    try:
+        for scenario in ("fresh_day", "end_of_day", "write_behind"):
+            with tempfile.TemporaryDirectory() as root:
+                service_client = LocalBlobServiceClient(root)
+                collector_logic.BLOB_SERVICE_CLIENT = service_client
+                # Zápis jen do lokálního journalu, dávka se nahraje každý 5. běh
+                journal = (fce_write_behind.WriteBehindJournal(os.path.join(root, "journal"))
+                           if scenario == "write_behind" else None)
+                fce_write_behind._JOURNAL = journal
+                if scenario == "end_of_day":
+                    await prefill_daily_file(
+                        service_client, eth_logic,
+                        lambda: eth_logic.format_data_for_csv(
+                            {"USD": sample_liquidity(), "BTC": sample_liquidity("BTC")}, 62500.0),
+                        END_OF_DAY_RUNS
+                    )
+                    await prefill_daily_file(
+                        service_client, aave_logic,
+                        lambda: aave_logic.format_data_for_csv(sample_liquidity()),
+                        END_OF_DAY_RUNS
+                    )
+                for asset, impl in (("eth", eth_logic.eth_liquidity_storage_impl),
+                                    ("aave", aave_logic.aave_liquidity_storage_impl),
+                                    ("all", collector_logic.liquidity_collector_impl)):
+                    requests_before = stub.request_count
+                    result = await measure_async(lambda: impl(None), iterations)
+                    # Včetně zahřívacího běhu
+                    result["http_requests_per_run"] = (stub.request_count - requests_before) / (iterations + 1)
+                    results[f"flow_{asset}_{scenario}_{levels}"] = result
+                if journal is not None:
+                    await journal.flush(service_client.get_container_client)
+    finally:
+        await fce_binance_client.close_session()
+        fce_binance_client._WEIGHT_TRACKER = None
+        fce_market_data._GATEWAY = None
+        fce_write_behind._JOURNAL = None
+        collector_logic._EXIT_FLUSH_REGISTERED = exit_flush_registered
+        await stub.stop()
+        collector_logic.BLOB_SERVICE_CLIENT = None
+    return results
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], cwd=REPO_ROOT, text=True).strip()
+    except Exception:
+        return "unknown"
+
+
+def compare(current, baseline_path, threshold):
+    """Vypíše změny p50 proti uloženým výsledkům. Vrací seznam regresí."""
+    with open(baseline_path) as f:
+        baseline = json.load(f)
+    regressions = []
+    print(f"\nComparison against {baseline.get('commit')} ({baseline_path})")
+    for name, result in current["results"].items():
+        previous = baseline["results"].get(name)
+        if not previous:
+            continue
+        ratio = result["p50_ms"] / previous["p50_ms"] if previous["p50_ms"] else float("inf")
+        marker = ""
+        if ratio > 1 + threshold:
+            marker = "  REGRESSION"
+            regressions.append(name)
+        print(f"{name:40s} {previous['p50_ms']:10.3f} -> {result['p50_ms']:10.3f} ms  x{ratio:5.2f}{marker}")
+    return regressions
+
+
+def print_results(results):
+    print(f"{'benchmark':40s} {'p50 ms':>10s} {'p99 ms':>10s} {'ops/s':>12s} {'peak KiB':>10s}")
+    for name, result in results.items():
+        print(f"{name:40s} {result['p50_ms']:10.3f} {result['p99_ms']:10.3f} "
+              f"{result['throughput_per_s'] or 0:12.1f} {result['peak_memory_kb']:10.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--quick", action="store_true", help="méně iterací")
+    parser.add_argument("--only", choices=["aggregation", "merge", "formatting", "flows"], action="append")
+    parser.add_argument("--levels", type=int, default=2000, help="hloubka booku ve stubu pro běhy flows")
+    parser.add_argument("--output", help="cesta pro uložení výsledků (výchozí benchmarks/results/<commit>.json)")
+    parser.add_argument("--compare", help="soubor s výsledky pro porovnání")
+    parser.add_argument("--threshold", type=float, default=REGRESSION_THRESHOLD)
+    parser.add_argument("--fail-on-regression", action="store_true")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+    logging.getLogger().setLevel(logging.WARNING)
+    iterations = {"aggregation": 20 if args.quick else 200, "merge": 20 if args.quick else 200,
+                  "formatting": 50 if args.quick else 500, "flows": 5 if args.quick else 30}
+    selected = args.only or ["aggregation", "merge", "formatting", "flows"]
+
+    results = {}
+    if "aggregation" in selected:
+        results.update(bench_aggregation(iterations["aggregation"]))
+    if "merge" in selected:
+        results.update(bench_merge(iterations["merge"]))
+    if "formatting" in selected:
+        results.update(bench_formatting(iterations["formatting"]))
+    if "flows" in selected:
+        results.update(asyncio.run(bench_flows(iterations["flows"], args.levels)))
+
+    commit = git_commit()
+    report = {
+        "commit": commit,
+        "created": datetime.utcnow().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "results": results
+    }
+    print_results(results)
+
+    output = args.output or os.path.join(RESULTS_DIR, f"{commit}.json")
+    os.makedirs(os.path.dirname(output), exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"\nResults saved to {output}")
+
+    if args.compare:
+        regressions = compare(report, args.compare, args.threshold)
+        if regressions and args.fail_on_regression:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
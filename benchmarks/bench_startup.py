@@ -0,0 +1,238 @@
+"""
+Benchmark cold startu: čas importu a paměť jednotlivých vstupních bodů.
+
+Každý vstupní bod se importuje v novém procesu Pythonu (jako při cold startu
+na Consumption plánu), měří se čas importu, maximální RSS procesu a které
+těžké závislosti (pandas, pyarrow, Azure SDK, ...) se přitom načetly.
+Výsledky se porovnají s rozpočtem v benchmarks/startup_budget.json:
+    import_ms          - medián času importu
+    rss_mib            - medián maximálního RSS procesu
+    forbidden_modules  - moduly, které se při importu nesmí načíst
+Překročení rozpočtu ukončí skript s kódem 1. Měření RSS vyžaduje modul
+resource (Linux/macOS).
+
+Použití:
+    python benchmarks/bench_startup.py                      # změří vše a zkontroluje rozpočet
+    python benchmarks/bench_startup.py --quick --importtime # méně opakování, nejpomalejší moduly
+    python benchmarks/bench_startup.py --compare benchmarks/results/startup-<commit>.json
+"""
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+from datetime import datetime
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_ROOT = os.path.dirname(BENCH_DIR)
+RESULTS_DIR = os.path.join(BENCH_DIR, "results")
+BUDGET_PATH = os.path.join(BENCH_DIR, "startup_budget.json")
+REGRESSION_THRESHOLD = 0.2
+IMPORTTIME_TOP = 8
+
+# Kód vstupního bodu spuštěný v čistém procesu
+ENTRY_POINTS = {
+    # indexace funkcí hostem
+    "function_app": "import function_app",
+    # první běh timeru: kolektor + klient úložiště
+    "collector_first_tick": (
+        "from collector import collector_logic\n"
+        "collector_logic.create_blob_service_client()"
+    ),
+    "eth_logic": "import eth.eth_logic",
+    "aave_logic": "import aave.aave_logic",
+    "backfill": "import collector.backfill",
+    "liquidity_query": "import Shared_Functions.fce_liquidity_query",
+}
+HEAVY_MODULES = ("pandas", "pyarrow", "numpy", "aiohttp", "azure.storage.blob", "zstandard", "orjson")
+
+PROBE = """
+import json, resource, sys, time
+scale = 1 if sys.platform == "darwin" else 1024
+baseline_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * scale
+sys.stderr.write("ENTRY_START\\n")
+sys.stderr.flush()
+start = time.perf_counter()
+exec(compile(sys.argv[1], "<entry>", "exec"), {"__name__": "__entry__"})
+elapsed = time.perf_counter() - start
+print(json.dumps({
+    "import_ms": elapsed * 1000,
+    "rss_mib": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * scale / 2 ** 20,
+    "baseline_rss_mib": baseline_rss / 2 ** 20,
+    "loaded": [name for name in sys.argv[2:] if name in sys.modules]
+}))
+"""
+
+# Kolektor čte přihlašovací údaje z prostředí už při vytvoření klienta (bez síťového volání)
+PROBE_ENV = {
+    "STORAGE_ACCOUNT_NAME": "benchstartup",
+    "STORAGE_ACCOUNT_KEY": "YmVuY2hzdGFydHVw",
+}
+
+
+def probe_env():
+    env = dict(os.environ)
+    for key, value in PROBE_ENV.items():
+        env.setdefault(key, value)
+    return env
+
+
+def run_probe(code, importtime=False):
+    """Spustí vstupní bod v novém procesu, vrátí (měření, výstup -X importtime)."""
+    command = [sys.executable]
+    if importtime:
+        command += ["-X", "importtime"]
+    command += ["-c", PROBE, code, *HEAVY_MODULES]
+    completed = subprocess.run(command, cwd=REPO_ROOT, env=probe_env(), capture_output=True, text=True)
+    if completed.returncode != 0:
+        raise RuntimeError(f"Entry point failed:\n{completed.stderr.strip()}")
+    return json.loads(completed.stdout.strip().splitlines()[-1]), completed.stderr
+
+
+def slowest_imports(importtime_output, top=IMPORTTIME_TOP):
+    """
+    Nejdražší balíčky podle -X importtime: kumulativní čas prvního (nejvyššího)
+    importu každého balíčku nejvyšší úrovně, jen importy vstupního bodu.
+    """
+    packages = {}
+    started = False
+    for line in importtime_output.splitlines():
+        if line == "ENTRY_START":
+            started = True
+            continue
+        if not started or not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        package = name.strip().split(".")[0]
+        packages[package] = max(packages.get(package, 0.0), int(cumulative) / 1000)
+    return sorted(((ms, package) for package, ms in packages.items()), reverse=True)[:top]
+
+
+def measure_entry(code, repeat, importtime=False):
+    # První běh zahodí - zkompiluje .pyc, jako u nasazené aplikace
+    run_probe(code)
+    samples = [run_probe(code)[0] for _ in range(repeat)]
+    result = {
+        "repeat": repeat,
+        "import_ms": statistics.median(sample["import_ms"] for sample in samples),
+        "import_ms_max": max(sample["import_ms"] for sample in samples),
+        "rss_mib": statistics.median(sample["rss_mib"] for sample in samples),
+        "baseline_rss_mib": statistics.median(sample["baseline_rss_mib"] for sample in samples),
+        "loaded_modules": samples[-1]["loaded"],
+    }
+    if importtime:
+        result["slowest_imports"] = slowest_imports(run_probe(code, importtime=True)[1])
+    return result
+
+
+def check_budget(results, budget):
+    """Vrátí seznam překročení rozpočtu (vstupní body bez rozpočtu se nekontrolují)."""
+    violations = []
+    for name, result in results.items():
+        limits = budget.get(name)
+        if not limits:
+            continue
+        for key in ("import_ms", "rss_mib"):
+            if key in limits and result[key] > limits[key]:
+                violations.append(f"{name}: {key} {result[key]:.1f} > budget {limits[key]}")
+        for module in limits.get("forbidden_modules", []):
+            if module in result["loaded_modules"]:
+                violations.append(f"{name}: imports {module} at startup")
+    return violations
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], cwd=REPO_ROOT, text=True).strip()
+    except Exception:
+        return "unknown"
+
+
+def compare(current, baseline_path, threshold):
+    """Vypíše změny času importu a RSS proti uloženým výsledkům. Vrací seznam regresí."""
+    with open(baseline_path) as f:
+        baseline = json.load(f)
+    regressions = []
+    print(f"\nComparison against {baseline.get('commit')} ({baseline_path})")
+    for name, result in current["results"].items():
+        previous = baseline["results"].get(name)
+        if not previous:
+            continue
+        for key, unit in (("import_ms", "ms"), ("rss_mib", "MiB")):
+            ratio = result[key] / previous[key] if previous[key] else float("inf")
+            marker = ""
+            if ratio > 1 + threshold:
+                marker = "  REGRESSION"
+                regressions.append(f"{name}.{key}")
+            print(f"{name + '.' + key:40s} {previous[key]:10.1f} -> {result[key]:10.1f} {unit:3s}  x{ratio:5.2f}{marker}")
+    return regressions
+
+
+def print_results(results, budget):
+    print(f"{'entry point':24s} {'import ms':>10s} {'budget':>8s} {'RSS MiB':>9s} {'budget':>8s}  heavy modules")
+    for name, result in results.items():
+        limits = budget.get(name, {})
+        print(f"{name:24s} {result['import_ms']:10.1f} {limits.get('import_ms', '-'):>8} "
+              f"{result['rss_mib']:9.1f} {limits.get('rss_mib', '-'):>8}  {' '.join(result['loaded_modules']) or '-'}")
+        for cumulative_ms, module in result.get("slowest_imports", []):
+            print(f"    {cumulative_ms:9.1f} ms  {module}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--quick", action="store_true", help="méně opakování")
+    parser.add_argument("--only", choices=sorted(ENTRY_POINTS), action="append")
+    parser.add_argument("--repeat", type=int, help="počet měření na vstupní bod (výchozí 7, s --quick 3)")
+    parser.add_argument("--importtime", action="store_true", help="vypíše nejpomalejší importy (-X importtime)")
+    parser.add_argument("--budget", default=BUDGET_PATH, help="soubor s rozpočtem cold startu")
+    parser.add_argument("--output", help="cesta pro uložení výsledků (výchozí benchmarks/results/startup-<commit>.json)")
+    parser.add_argument("--compare", help="soubor s výsledky pro porovnání")
+    parser.add_argument("--threshold", type=float, default=REGRESSION_THRESHOLD)
+    parser.add_argument("--fail-on-regression", action="store_true")
+    args = parser.parse_args()
+
+    repeat = args.repeat or (3 if args.quick else 7)
+    selected = args.only or list(ENTRY_POINTS)
+    with open(args.budget) as f:
+        budget = json.load(f)
+
+    results = {name: measure_entry(ENTRY_POINTS[name], repeat, args.importtime) for name in selected}
+
+    commit = git_commit()
+    report = {
+        "commit": commit,
+        "created": datetime.utcnow().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "results": results
+    }
+    print_results(results, budget)
+
+    output = args.output or os.path.join(RESULTS_DIR, f"startup-{commit}.json")
+    os.makedirs(os.path.dirname(output), exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"\nResults saved to {output}")
+
+    failed = False
+    violations = check_budget(results, budget)
+    if violations:
+        print("\nStartup budget exceeded:")
+        for violation in violations:
+            print(f"  {violation}")
+        failed = True
+
+    if args.compare:
+        regressions = compare(report, args.compare, args.threshold)
+        if regressions and args.fail_on_regression:
+            failed = True
+
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""
+Lokální stub Binance REST API pro benchmarky a ladění.
+
+Obsluhuje /api/v3/depth, /api/v3/ticker/price (symbol i symbols=[...]),
+/api/v3/aggTrades (fromId i startTime/endTime) a /api/v3/trades z předem
+vygenerovaných dat. Kolektor se na něj přesměruje přes fce_binance_client.BINANCE_BASE_URL.
+"""
+
+import bisect
+import time
+
+import orjson
+from aiohttp import web
+
+from synthetic_data import DEFAULT_MARKETS, generate_depth_payload, generate_trade_tape
+
+PAGE_LIMIT = 1000
+INVALID_SYMBOL = orjson.dumps({"code": -1121, "msg": "Invalid symbol."})
+
+
+class StubBinance:
+    def __init__(self, levels=2000, trades_per_second=20, tape_minutes=10, markets=DEFAULT_MARKETS):
+        now_ms = int(time.time() * 1000)
+        self.markets = markets
+        self.depth = {symbol: generate_depth_payload(symbol, levels, seed=index)
+                      for index, symbol in enumerate(markets)}
+        self.tapes = {symbol: generate_trade_tape(symbol, now_ms - tape_minutes * 60 * 1000, now_ms + 60 * 1000,
+                                                  trades_per_second, seed=index)
+                      for index, symbol in enumerate(markets)}
+        self.request_count = 0
+        self.runner = None
+        self.base_url = None
+
+    async def handle_depth(self, request):
+        self.request_count += 1
+        return web.Response(body=self.depth[request.query["symbol"]], content_type="application/json")
+
+    async def handle_price(self, request):
+        self.request_count += 1
+        if "symbols" in request.query:
+            symbols = orjson.loads(request.query["symbols"])
+        else:
+            symbols = [request.query["symbol"]]
+        if any(symbol not in self.markets for symbol in symbols):
+            return web.Response(status=400, body=INVALID_SYMBOL, content_type="application/json")
+        body = [{"symbol": symbol, "price": str(self.markets[symbol][0])} for symbol in symbols]
+        if "symbols" not in request.query:
+            body = body[0]
+        return web.Response(body=orjson.dumps(body), content_type="application/json")
+
+    async def handle_agg_trades(self, request):
+        self.request_count += 1
+        tape = self.tapes[request.query["symbol"]]
+        limit = min(int(request.query.get("limit", 500)), PAGE_LIMIT)
+        if "fromId" in request.query:
+            start = max(0, int(request.query["fromId"]) - tape[0]["a"])
+        else:
+            times = [trade["T"] for trade in tape]
+            start = bisect.bisect_left(times, int(request.query.get("startTime", 0)))
+        page = tape[start:start + limit]
+        if "endTime" in request.query:
+            end_time = int(request.query["endTime"])
+            page = [trade for trade in page if trade["T"] <= end_time]
+        return web.Response(body=orjson.dumps(page), content_type="application/json")
+
+    async def handle_trades(self, request):
+        self.request_count += 1
+        tape = self.tapes[request.query["symbol"]][-int(request.query.get("limit", 500)):]
+        body = [{"id": t["a"], "price": t["p"], "qty": t["q"], "time": t["T"], "isBuyerMaker": t["m"]} for t in tape]
+        return web.Response(body=orjson.dumps(body), content_type="application/json")
+
+    async def start(self, host="127.0.0.1", port=0):
+        app = web.Application()
+        app.router.add_get("/api/v3/depth", self.handle_depth)
+        app.router.add_get("/api/v3/ticker/price", self.handle_price)
+        app.router.add_get("/api/v3/aggTrades", self.handle_agg_trades)
+        app.router.add_get("/api/v3/trades", self.handle_trades)
+        self.runner = web.AppRunner(app, access_log=None)
+        await self.runner.setup()
+        site = web.TCPSite(self.runner, host, port)
+        await site.start()
+        bound_port = site._server.sockets[0].getsockname()[1]
+        self.base_url = f"http://{host}:{bound_port}"
+        return self.base_url
+
+    async def stop(self):
+        if self.runner is not None:
+            await self.runner.cleanup()
+            self.runner = None
@@ -0,0 +1,272 @@
+"""
+Lokální replay diff-depth WebSocket streamu Binance pro benchmarky a ladění.
+
+Nahrávka je soubor JSON lines seřazený podle času t (sekundy od začátku nahrávání):
+    {"t", "kind": "ws", "stream": "ethusdt@depth@100ms", "data": "<text zprávy>"}
+    {"t", "kind": "snapshot", "symbol": "ETHUSDT", "data": "<odpověď /api/v3/depth>"}
+Snapshot se nahraje až po první zprávě streamu, stejně jako při synchronizaci
+LocalOrderBook, takže stream obsahuje události před snapshotem i po něm.
+
+Server přehraje zprávy streamu každému připojení na /ws/<stream> se zachovaným
+časováním (zrychleným parametrem speed) a /api/v3/depth vrátí nahraný snapshot
+oříznutý na požadovaný limit. Kolektor se na něj přesměruje přes
+fce_binance_client.BINANCE_BASE_URL a fce_local_orderbook.BINANCE_WS_URL.
+Bez přístupu k Binance jde nahrávku vygenerovat (synthesize).
+
+Použití:
+    python benchmarks/stub_binance_ws.py record --symbols ETHUSDT ETHBTC --seconds 60 --output depth.jsonl
+    python benchmarks/stub_binance_ws.py synthesize --symbols ETHUSDT --output synthetic.jsonl
+    python benchmarks/stub_binance_ws.py serve --recording depth.jsonl --port 8765 --speed 10
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import time
+
+import aiohttp
+import orjson
+from aiohttp import web
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+sys.path.insert(0, BENCH_DIR)
+
+from Shared_Functions import fce_binance_client, fce_local_orderbook  # noqa: E402
+from synthetic_data import DEFAULT_MARKETS, generate_depth_book  # noqa: E402
+
+# Největší hloubka REST snapshotu, replay z ní vrátí libovolný menší limit
+RECORD_SNAPSHOT_LIMIT = 5000
+INVALID_SYMBOL = orjson.dumps({"code": -1121, "msg": "Invalid symbol."})
+
+
+def stream_name(symbol):
+    return f"{symbol.lower()}@depth@{fce_local_orderbook.STREAM_SPEED}"
+
+
+def load_recording(path):
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def save_recording(path, records):
+    with open(path, "w", encoding="utf-8") as f:
+        for record in sorted(records, key=lambda record: record["t"]):
+            f.write(json.dumps(record, separators=(",", ":")) + "\n")
+
+
+async def record(symbols, output, seconds, limit=RECORD_SNAPSHOT_LIMIT, ws_url=None, base_url=None):
+    """
+    Nahraje diff-depth stream a jeden REST snapshot každého symbolu z Binance.
+
+    Returns:
+        int: Počet nahraných zpráv streamu
+    """
+    ws_url = ws_url or fce_local_orderbook.BINANCE_WS_URL
+    base_url = base_url or fce_binance_client.BINANCE_BASE_URL
+    records = []
+    started = time.monotonic()
+
+    async def record_symbol(session, symbol):
+        stream = stream_name(symbol)
+        async with session.ws_connect(f"{ws_url}/ws/{stream}", heartbeat=30) as ws:
+            snapshot_saved = False
+            async for message in ws:
+                if message.type != aiohttp.WSMsgType.TEXT:
+                    break
+                records.append({"t": time.monotonic() - started, "kind": "ws", "stream": stream, "data": message.data})
+                if snapshot_saved:
+                    continue
+                snapshot_saved = True
+                params = {"symbol": symbol, "limit": limit}
+                async with session.get(f"{base_url}/api/v3/depth", params=params) as response:
+                    response.raise_for_status()
+                    records.append({"t": time.monotonic() - started, "kind": "snapshot", "symbol": symbol,
+                                    "data": await response.text()})
+
+    async with aiohttp.ClientSession() as session:
+        tasks = [asyncio.ensure_future(record_symbol(session, symbol)) for symbol in symbols]
+        done, pending = await asyncio.wait(tasks, timeout=seconds)
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
+        for task in done:
+            task.result()
+
+    save_recording(output, records)
+    return sum(1 for record in records if record["kind"] == "ws")
+
+
+def synthesize_recording(symbols, events=600, interval=0.1, snapshot_after=20, levels=2000, seed=0):
+    """
+    Vygeneruje nahrávku bez přístupu k Binance: book ze synthetic_data a náhodné
+    změny úrovní u středu (včetně mazání), snapshot po snapshot_after událostech.
+
+    Returns:
+        list: Záznamy nahrávky (viz docstring modulu)
+    """
+    records = []
+    for index, symbol in enumerate(symbols):
+        mid, tick = DEFAULT_MARKETS[symbol]
+        decimals = max(0, len(f"{tick:.10f}".rstrip("0").split(".")[1]))
+        rng = random.Random(seed + index)
+        book = generate_depth_book(mid, tick, levels, seed=seed + index)
+        sides = {"b": dict(book["bids"]), "a": dict(book["asks"])}
+        update_id = book["lastUpdateId"]
+        stream = stream_name(symbol)
+
+        for event_index in range(events):
+            first_id = update_id + 1
+            update_id += rng.randint(1, 3)
+            changes = {}
+            for side, direction in (("b", -1), ("a", 1)):
+                changes[side] = []
+                for _ in range(rng.randint(1, 4)):
+                    price = f"{mid + direction * rng.randint(1, 200) * tick:.{decimals}f}"
+                    quantity = "0.0000" if rng.random() < 0.3 else f"{rng.lognormvariate(0, 1.2):.4f}"
+                    changes[side].append([price, quantity])
+                    if float(quantity) == 0:
+                        sides[side].pop(price, None)
+                    else:
+                        sides[side][price] = quantity
+            t = event_index * interval
+            message = {"e": "depthUpdate", "E": int(t * 1000), "s": symbol, "U": first_id, "u": update_id,
+                       "b": changes["b"], "a": changes["a"]}
+            records.append({"t": t, "kind": "ws", "stream": stream, "data": orjson.dumps(message).decode()})
+            if event_index + 1 == snapshot_after:
+                snapshot = {
+                    "lastUpdateId": update_id,
+                    "bids": sorted(([p, q] for p, q in sides["b"].items()), key=lambda level: -float(level[0])),
+                    "asks": sorted(([p, q] for p, q in sides["a"].items()), key=lambda level: float(level[0]))
+                }
+                records.append({"t": t + interval / 2, "kind": "snapshot", "symbol": symbol,
+                                "data": orjson.dumps(snapshot).decode()})
+    return sorted(records, key=lambda record: record["t"])
+
+
+class StubBinanceStream:
+    """
+    Replay nahrávky: /ws/<stream> a /api/v3/depth na jednom portu.
+
+    depth_requests zaznamenává (symbol, limit) každého REST snapshotu, aby šla
+    ověřit hloubka, se kterou se stream synchronizuje.
+    """
+
+    def __init__(self, records, speed=1.0):
+        self.speed = speed
+        self.snapshots = {}
+        self.messages = {}
+        for record in records:
+            if record["kind"] == "snapshot":
+                self.snapshots[record["symbol"]] = orjson.loads(record["data"])
+            else:
+                self.messages.setdefault(record["stream"], []).append((record["t"], record["data"]))
+        self.depth_requests = []
+        self.connections = 0
+        self.runner = None
+        self.base_url = None
+        self.ws_url = None
+
+    @classmethod
+    def from_file(cls, path, speed=1.0):
+        return cls(load_recording(path), speed)
+
+    async def handle_depth(self, request):
+        symbol = request.query["symbol"]
+        limit = int(request.query.get("limit", 100))
+        self.depth_requests.append((symbol, limit))
+        snapshot = self.snapshots.get(symbol)
+        if snapshot is None:
+            return web.Response(status=400, body=INVALID_SYMBOL, content_type="application/json")
+        body = {"lastUpdateId": snapshot["lastUpdateId"], "bids": snapshot["bids"][:limit],
+                "asks": snapshot["asks"][:limit]}
+        return web.Response(body=orjson.dumps(body), content_type="application/json")
+
+    async def handle_ws(self, request):
+        ws = web.WebSocketResponse()
+        await ws.prepare(request)
+        self.connections += 1
+        messages = self.messages.get(request.match_info["stream"], [])
+        started = time.monotonic()
+        first = messages[0][0] if messages else 0.0
+        for t, data in messages:
+            delay = (t - first) / self.speed - (time.monotonic() - started)
+            if delay > 0:
+                await asyncio.sleep(delay)
+            if ws.closed:
+                break
+            await ws.send_str(data)
+        # Po konci nahrávky spojení zůstane otevřené (jako tichý trh), jinak by se stream hned znovu připojil
+        async for _ in ws:
+            pass
+        return ws
+
+    async def start(self, host="127.0.0.1", port=0):
+        app = web.Application()
+        app.router.add_get("/api/v3/depth", self.handle_depth)
+        app.router.add_get("/ws/{stream}", self.handle_ws)
+        self.runner = web.AppRunner(app, access_log=None)
+        await self.runner.setup()
+        site = web.TCPSite(self.runner, host, port)
+        await site.start()
+        bound_port = site._server.sockets[0].getsockname()[1]
+        self.base_url = f"http://{host}:{bound_port}"
+        self.ws_url = f"ws://{host}:{bound_port}"
+        return self.base_url
+
+    async def stop(self):
+        if self.runner is not None:
+            await self.runner.cleanup()
+            self.runner = None
+
+
+async def serve(path, host, port, speed):
+    stub = StubBinanceStream.from_file(path, speed)
+    await stub.start(host, port)
+    print(f"Replaying {sum(len(messages) for messages in stub.messages.values())} messages of "
+          f"{', '.join(sorted(stub.messages))}")
+    print(f"BINANCE_BASE_URL={stub.base_url} BINANCE_WS_URL={stub.ws_url}", flush=True)
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await stub.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest="command", required=True)
+    record_parser = commands.add_parser("record", help="nahrát stream z Binance")
+    record_parser.add_argument("--symbols", nargs="+", required=True)
+    record_parser.add_argument("--seconds", type=float, default=60)
+    record_parser.add_argument("--limit", type=int, default=RECORD_SNAPSHOT_LIMIT, help="hloubka REST snapshotu")
+    record_parser.add_argument("--output", required=True)
+    synthesize_parser = commands.add_parser("synthesize", help="vygenerovat nahrávku ze syntetických dat")
+    synthesize_parser.add_argument("--symbols", nargs="+", choices=sorted(DEFAULT_MARKETS), required=True)
+    synthesize_parser.add_argument("--events", type=int, default=600)
+    synthesize_parser.add_argument("--levels", type=int, default=2000)
+    synthesize_parser.add_argument("--output", required=True)
+    serve_parser = commands.add_parser("serve", help="přehrávat nahrávku")
+    serve_parser.add_argument("--recording", required=True)
+    serve_parser.add_argument("--host", default="127.0.0.1")
+    serve_parser.add_argument("--port", type=int, default=8765)
+    serve_parser.add_argument("--speed", type=float, default=1.0, help="zrychlení přehrávání")
+    args = parser.parse_args()
+
+    if args.command == "record":
+        count = asyncio.run(record(args.symbols, args.output, args.seconds, args.limit))
+        print(f"Recorded {count} messages to {args.output}")
+    elif args.command == "synthesize":
+        save_recording(args.output, synthesize_recording(args.symbols, args.events, levels=args.levels))
+        print(f"Synthetic recording saved to {args.output}")
+    else:
+        try:
+            asyncio.run(serve(args.recording, args.host, args.port, args.speed))
+        except KeyboardInterrupt:
+            pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""
+Generátory syntetických dat pro benchmarky - order booky a páska obchodů.
+"""
+
+import random
+
+import orjson
+
+# symbol -> (mid, tick)
+DEFAULT_MARKETS = {
+    "ETHUSDT": (2500.0, 0.01),
+    "ETHUSDC": (2500.4, 0.01),
+    "ETHBTC": (0.04, 0.00001),
+    "BTCUSDT": (62500.0, 0.01),
+    "AAVEUSDT": (150.0, 0.01)
+}
+
+
+def generate_depth_book(mid, tick, levels=2000, spread_ticks=1, seed=0, last_update_id=1):
+    """
+    Vygeneruje order book ve formátu odpovědi /api/v3/depth.
+
+    Úrovně nejsou na každém ticku (náhodné mezery 1-5 ticků), množství mají
+    log-normální rozdělení a s hloubkou mírně rostou, podobně jako reálné booky.
+
+    Returns:
+        dict: {"lastUpdateId", "bids": [["price", "qty"], ...], "asks": [...]}
+    """
+    rng = random.Random(seed)
+    decimals = max(0, len(f"{tick:.10f}".rstrip("0").split(".")[1]))
+
+    def side(direction):
+        levels_out = []
+        offset = spread_ticks
+        for index in range(levels):
+            price = mid + direction * offset * tick
+            quantity = rng.lognormvariate(0, 1.2) * (1 + index / 500)
+            levels_out.append([f"{price:.{decimals}f}", f"{quantity:.4f}"])
+            offset += rng.randint(1, 5)
+        return levels_out
+
+    return {"lastUpdateId": last_update_id, "bids": side(-1), "asks": side(1)}
+
+
+def generate_depth_payload(symbol, levels=2000, spread_ticks=1, seed=0):
+    mid, tick = DEFAULT_MARKETS[symbol]
+    return orjson.dumps(generate_depth_book(mid, tick, levels, spread_ticks, seed))
+
+
+def generate_trade_tape(symbol, start_ms, end_ms, trades_per_second=20, seed=0, first_id=1):
+    """
+    Vygeneruje pásku agregovaných obchodů ve formátu /api/v3/aggTrades.
+
+    Returns:
+        list: [{"a", "p", "q", "T", "m"}, ...] seřazené podle ID a času
+    """
+    rng = random.Random(seed)
+    mid, tick = DEFAULT_MARKETS[symbol]
+    tape = []
+    trade_time = start_ms
+    trade_id = first_id
+    mean_gap_ms = 1000 / trades_per_second
+    while True:
+        trade_time += max(1, int(rng.expovariate(1 / mean_gap_ms)))
+        if trade_time >= end_ms:
+            break
+        price = mid + rng.randint(-20, 20) * tick
+        tape.append({
+            "a": trade_id,
+            "p": f"{price:.8f}",
+            "q": f"{rng.lognormvariate(-1, 1):.5f}",
+            "T": trade_time,
+            "m": rng.random() < 0.5
+        })
+        trade_id += 1
+    return tape
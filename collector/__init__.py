@@ -0,0 +1 @@
+"""Společný kolektor likvidity (collector_logic), konfigurace assetů a přepočet historie (backfill)."""
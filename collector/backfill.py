@@ -0,0 +1,349 @@
+"""
+Přepočet historie z archivu surových snapshotů (fce_raw_archive).
+
+Po změně pásem (např. Medium -> Large) nebo analytiky přepočítá denní výstupy
+ze zaznamenaných dat místo opakování v reálném čase. Práce se dělí po dnech
+(asset x den) mezi procesy, každý den projde stejným parsováním, agregací
+a formátováním jako živý kolektor (build_liquidity_data, format_frames).
+
+Vstupy (lokální soubory):
+    --archive-dir   kořen se strukturou <container>/raw/<symbol>/<YYYYMMDD>/<HH>.zst
+                    (stažené kontejnery, stejné rozložení jako LocalBlobServiceClient)
+    --trades-dir    volitelně denní aggTrades z data.binance.vision:
+                    <symbol>/<symbol>-aggTrades-<YYYY-MM-DD>.zip (nebo .csv);
+                    z nich se počítá objem za VOLUME_MINUTES a kurz fx trhů
+                    (poslední obchod před snapshotem). Bez obchodů je objem prázdný;
+                    bez obchodů fx symbolu (BTCUSDT pro ETHBTC) se trh kotovaný v jeho
+                    měně vynechá a jeho skupiny dostanou status "partial", stejně
+                    jako v živém kolektoru při chybějícím kurzu.
+
+Výstup je idempotentní: denní CSV se přepíše celé, Parquet den se nahradí
+jedním data.parquet (fragmenty dne se smažou) a hodinové rollupy dne se zapíšou
+znovu, opakovaný běh dá stejný výsledek.
+Přepočítávat jde jen uzavřené dny, dnešní den by se přetahoval se živým kolektorem.
+
+Použití (z kořene repozitáře):
+    python -m collector.backfill --start 2026-01-01 --end 2026-03-31 --archive-dir data/
+    python -m collector.backfill --start 2026-01-01 --end 2026-01-31 --archive-dir data/ \\
+        --trades-dir trades/ --bands large --output-dir out/ --workers 8
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import sys
+import time
+import zipfile
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import date, datetime, timedelta
+from io import BytesIO
+
+import numpy as np
+import pandas as pd
+
+from Shared_Functions.fce_local_blob import LocalBlobServiceClient
+from Shared_Functions.fce_parquet_store import csv_output_enabled, parquet_output_enabled, replace_day
+from Shared_Functions.fce_raw_archive import RAW_PREFIX, iter_archive_file
+from Shared_Functions.fce_rollups import ROLLUPS_ENABLED, build_rollups, replace_day_rollups
+
+from collector.collector_config import ASSETS, BAND_PRESETS, VOLUME_MINUTES
+from collector.collector_logic import (
+    build_liquidity_data, create_blob_service_client, format_frames, get_asset_config, get_csv_filename,
+    get_parquet_asset, rollup_observations
+)
+
+EPOCH = datetime(1970, 1, 1)
+AGG_TRADES_PRICE_COLUMN = 1
+AGG_TRADES_QTY_COLUMN = 2
+AGG_TRADES_TIME_COLUMN = 5
+# Spotová data na data.binance.vision mají od roku 2025 čas v mikrosekundách
+MICROSECOND_THRESHOLD = 10 ** 14
+
+
+class TradeTape:
+    """Seřazené obchody symbolu s kumulativním notional pro dotazy na okna."""
+
+    def __init__(self, times_ms, prices, quantities):
+        order = np.argsort(times_ms, kind="stable")
+        self.times_ms = times_ms[order]
+        self.prices = prices[order]
+        self.cum_notional = np.concatenate([[0.0], np.cumsum(self.prices * quantities[order])])
+
+    def window_notional(self, ends_ms, minutes=VOLUME_MINUTES):
+        """Notional obchodů v oknech [end - minutes, end) pro pole konců oken."""
+        ends_ms = np.asarray(ends_ms, dtype=np.int64)
+        end_index = np.searchsorted(self.times_ms, ends_ms, side="left")
+        start_index = np.searchsorted(self.times_ms, ends_ms - minutes * 60 * 1000, side="left")
+        return self.cum_notional[end_index] - self.cum_notional[start_index]
+
+    def last_price(self, times_ms):
+        """Cena posledního obchodu před každým časem, NaN pokud žádný nebyl."""
+        index = np.searchsorted(self.times_ms, np.asarray(times_ms, dtype=np.int64), side="left") - 1
+        return np.where(index >= 0, self.prices[np.maximum(index, 0)], np.nan)
+
+
+def agg_trades_path(trades_dir, symbol, day):
+    for extension in ("zip", "csv"):
+        path = os.path.join(trades_dir, symbol, f"{symbol}-aggTrades-{day.isoformat()}.{extension}")
+        if os.path.isfile(path):
+            return path
+    return None
+
+
+def read_agg_trades(path):
+    """
+    Načte denní aggTrades CSV (případně v zipu) z data.binance.vision.
+
+    Returns:
+        tuple: (times_ms, prices, quantities) jako np.ndarray
+    """
+    if path.endswith(".zip"):
+        with zipfile.ZipFile(path) as archive:
+            data = archive.read(archive.namelist()[0])
+    else:
+        with open(path, "rb") as f:
+            data = f.read()
+    # Novější soubory mají hlavičku, starší ne
+    has_header = not data[:1].isdigit()
+    df = pd.read_csv(
+        BytesIO(data), header=None, skiprows=1 if has_header else 0,
+        usecols=[AGG_TRADES_PRICE_COLUMN, AGG_TRADES_QTY_COLUMN, AGG_TRADES_TIME_COLUMN]
+    )
+    times = df[AGG_TRADES_TIME_COLUMN].to_numpy(dtype=np.int64)
+    if len(times) and times.max() >= MICROSECOND_THRESHOLD:
+        times = times // 1000
+    return (times, df[AGG_TRADES_PRICE_COLUMN].to_numpy(dtype=np.float64),
+            df[AGG_TRADES_QTY_COLUMN].to_numpy(dtype=np.float64))
+
+
+def load_trade_tape(trades_dir, symbol, day):
+    """Obchody dne a předchozího dne (okno prvních běhů dne sahá do včerejška), None pokud chybí."""
+    parts = [read_agg_trades(path) for path in
+             (agg_trades_path(trades_dir, symbol, day - timedelta(days=1)), agg_trades_path(trades_dir, symbol, day))
+             if path is not None]
+    if not parts:
+        return None
+    return TradeTape(*(np.concatenate(columns) for columns in zip(*parts)))
+
+
+def read_archive_hour(archive_dir, config, symbol, hour):
+    """Snapshoty symbolu za jednu hodinu jako {timestamp_ms: DepthSnapshot}."""
+    path = os.path.join(archive_dir, config["container"], RAW_PREFIX, symbol,
+                        hour.strftime("%Y%m%d"), f"{hour.strftime('%H')}.zst")
+    if not os.path.isfile(path):
+        return {}
+    return dict(iter_archive_file(path))
+
+
+def archive_has_day(archive_dir, config, day):
+    return any(
+        os.path.isdir(os.path.join(archive_dir, config["container"], RAW_PREFIX, market["symbol"],
+                                   day.strftime("%Y%m%d")))
+        for market in config["markets"]
+    )
+
+
+def fx_rate_series(market, tapes, run_times):
+    """Kurz quote -> USD trhu pro každý běh; NaN, pokud obchody fx symbolu chybí."""
+    if not market.get("fx"):
+        return np.ones(len(run_times))
+    tape = tapes.get(market["fx"])
+    if tape is None:
+        return np.full(len(run_times), np.nan)
+    return tape.last_price(run_times)
+
+
+def rebuild_day_frames(config, day, archive_dir, trades_dir=None):
+    """
+    Přepočítá všechny běhy jednoho dne assetu.
+
+    Běh je každý čas, pro který je v archivu snapshot aspoň jednoho trhu. Trh bez
+    snapshotu nebo bez kurzu se vynechá a jeho skupiny dostanou status "partial",
+    stejně jako v živém kolektoru (fetch_asset_data).
+
+    Returns:
+        tuple: (frames, stats) - dataset -> ColumnarRows celého dne, stats je dict počtů
+    """
+    markets = config["markets"]
+    symbols = [market["symbol"] for market in markets]
+    tapes = {}
+    if trades_dir:
+        needed = set(symbols) | {market["fx"] for market in markets if market.get("fx")}
+        tapes = {symbol: load_trade_tape(trades_dir, symbol, day) for symbol in sorted(needed)}
+    missing_fx = sorted({market["fx"] for market in markets if market.get("fx") and tapes.get(market["fx"]) is None})
+    if missing_fx:
+        logging.warning(f"{config['asset']} {day.isoformat()}: missing {', '.join(missing_fx)} trades, "
+                        f"markets quoted in them are left out as partial")
+    if trades_dir and not all(tapes.get(symbol) for symbol in symbols):
+        logging.warning(f"{config['asset']} {day.isoformat()}: missing trades, volume columns will be empty")
+
+    frames = {}
+    stats = {"runs": 0, "partial_runs": 0, "snapshots": 0}
+    start = datetime(day.year, day.month, day.day)
+    for hour in (start + timedelta(hours=offset) for offset in range(24)):
+        records = [read_archive_hour(archive_dir, config, symbol, hour) for symbol in symbols]
+        stats["snapshots"] += sum(len(symbol_records) for symbol_records in records)
+        run_times = sorted(set().union(*records))
+        if not run_times:
+            continue
+
+        # Objemy a kurzy pro všechny běhy hodiny najednou
+        volumes = [
+            tapes[symbol].window_notional(run_times) if tapes.get(symbol) else np.full(len(run_times), np.nan)
+            for symbol in symbols
+        ]
+        fx_rates = [fx_rate_series(market, tapes, run_times) for market in markets]
+        for index, timestamp_ms in enumerate(run_times):
+            rates = [float(market_rates[index]) for market_rates in fx_rates]
+            # Bez kurzu (NaN - žádný obchod fx symbolu) nejde book převést na USD, trh se vynechá
+            snapshots = [
+                symbol_records.get(timestamp_ms) if not np.isnan(rate) else None
+                for symbol_records, rate in zip(records, rates)
+            ]
+            if all(snapshot is None for snapshot in snapshots):
+                continue
+            liquidity_data = build_liquidity_data(
+                config, snapshots, rates, [float(volume[index]) for volume in volumes]
+            )
+            frames = format_frames(config, liquidity_data, EPOCH + timedelta(milliseconds=timestamp_ms), frames)
+            stats["runs"] += 1
+            if any(snapshot is None for snapshot in snapshots):
+                stats["partial_runs"] += 1
+
+    stats["rows"] = sum(len(rows) for rows in frames.values())
+    return frames, stats
+
+
+async def write_day_outputs(container_client, config, day, frames, write_csv=True, write_parquet=False):
+    """Přepíše výstupy dne - celé denní CSV, Parquet partition dne a hodinové rollupy."""
+    bytes_out = 0
+    for dataset, rows in frames.items():
+        if write_csv:
+            # Celý den jedním block blobem; živý kolektor ho při dalším appendu převede na append blob
+            data = rows.to_csv().encode("utf-8")
+            await container_client.upload_blob(name=get_csv_filename(config, dataset, day), data=data, overwrite=True)
+            bytes_out += len(data)
+        if write_parquet:
+            await replace_day(container_client, get_parquet_asset(config, dataset), day, rows.to_pandas())
+    if ROLLUPS_ENABLED:
+        rollups = build_rollups(config["asset"], rollup_observations(config, frames))
+        await replace_day_rollups(container_client, config["asset"], day, rollups)
+    return bytes_out
+
+
+async def backfill_day(config, day, options):
+    frames, stats = rebuild_day_frames(config, day, options["archive_dir"], options.get("trades_dir"))
+    if not stats["runs"]:
+        return stats
+    service_client = LocalBlobServiceClient(options["output_dir"]) if options.get("output_dir") \
+        else create_blob_service_client()
+    try:
+        stats["bytes_out"] = await write_day_outputs(
+            service_client.get_container_client(config["container"]), config, day, frames,
+            write_csv=options["csv"], write_parquet=options["parquet"]
+        )
+    finally:
+        await service_client.close()
+    return stats
+
+
+def run_shard(asset, day_iso, options):
+    """Vstupní bod procesu: přepočítá jeden den jednoho assetu."""
+    started = time.perf_counter()
+    config = dict(get_asset_config(asset))
+    if options.get("bands"):
+        config["bands"] = options["bands"]
+    day = date.fromisoformat(day_iso)
+    try:
+        stats = asyncio.run(backfill_day(config, day, options))
+    except Exception as e:
+        logging.error(f"Backfill of {asset} {day_iso} failed: {e}")
+        stats = {"error": str(e)}
+    stats.update(asset=asset, day=day_iso, seconds=time.perf_counter() - started)
+    return stats
+
+
+def iter_days(start, end):
+    day = start
+    while day <= end:
+        yield day
+        day += timedelta(days=1)
+
+
+def run_backfill(assets, start, end, options, workers=None):
+    """
+    Přepočítá dny start..end (včetně) pro vybrané assety v procesním poolu.
+
+    Returns:
+        list: stats každého zpracovaného dne
+    """
+    shards = [
+        (config["asset"], day.isoformat())
+        for day in iter_days(start, end)
+        for config in (get_asset_config(asset) for asset in assets)
+        if archive_has_day(options["archive_dir"], config, day)
+    ]
+    print(f"Backfilling {len(shards)} asset-days with {workers or os.cpu_count()} workers", flush=True)
+    results = []
+    totals = {"runs": 0, "snapshots": 0, "rows": 0}
+    started = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = [executor.submit(run_shard, asset, day_iso, options) for asset, day_iso in shards]
+        for done, future in enumerate(as_completed(futures), 1):
+            stats = future.result()
+            results.append(stats)
+            for key in totals:
+                totals[key] += stats.get(key, 0)
+            elapsed = time.perf_counter() - started
+            remaining = elapsed / done * (len(shards) - done)
+            status = f"failed: {stats['error']}" if "error" in stats else \
+                f"{stats['runs']} runs ({stats['partial_runs']} partial), {stats['rows']} rows in {stats['seconds']:.1f}s"
+            print(
+                f"[{done}/{len(shards)}] {stats['asset']} {stats['day']} {status} | "
+                f"{totals['runs'] / elapsed:.0f} runs/s, {totals['snapshots'] / elapsed:.0f} snapshots/s, "
+                f"ETA {remaining:.0f}s",
+                flush=True
+            )
+    elapsed = time.perf_counter() - started
+    failed = sum(1 for stats in results if "error" in stats)
+    print(
+        f"Backfill finished: {len(results) - failed}/{len(results)} asset-days, {totals['runs']} runs, "
+        f"{totals['rows']} rows in {elapsed:.1f}s ({totals['runs'] / elapsed if elapsed else 0:.0f} runs/s)"
+    )
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--start", type=date.fromisoformat, required=True, help="první den (YYYY-MM-DD)")
+    parser.add_argument("--end", type=date.fromisoformat, required=True, help="poslední den včetně")
+    parser.add_argument("--archive-dir", required=True, help="kořen stažených kontejnerů s raw/ archivem")
+    parser.add_argument("--trades-dir", help="adresář s denními aggTrades soubory")
+    parser.add_argument("--assets", nargs="+", choices=[config["asset"] for config in ASSETS],
+                        default=[config["asset"] for config in ASSETS])
+    parser.add_argument("--bands", choices=sorted(BAND_PRESETS), help="přepočítat s jinou předvolbou pásem")
+    parser.add_argument("--output-dir", help="lokální výstup místo Azure Blob Storage")
+    parser.add_argument("--output-format", choices=["csv", "parquet", "both"],
+                        help="výchozí podle OUTPUT_FORMAT jako u kolektoru")
+    parser.add_argument("--workers", type=int, help="počet procesů (výchozí počet CPU)")
+    parser.add_argument("--verbose", action="store_true", help="logovat i INFO (včetně spanů fází)")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO if args.verbose else logging.WARNING,
+                        format="%(asctime)s %(levelname)s %(message)s")
+    output_format = args.output_format
+    options = {
+        "archive_dir": args.archive_dir,
+        "trades_dir": args.trades_dir,
+        "output_dir": args.output_dir,
+        "bands": args.bands,
+        "csv": output_format in ("csv", "both") if output_format else csv_output_enabled(),
+        "parquet": output_format in ("parquet", "both") if output_format else parquet_output_enabled()
+    }
+    results = run_backfill(args.assets, args.start, args.end, options, workers=args.workers)
+    return 1 if any("error" in stats for stats in results) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,63 @@
+"""
+Konfigurace sledovaných assetů pro společný kolektor.
+
+Každý asset popisuje:
+    asset         - krátký název (partition v Parquet výstupu, metriky)
+    container     - blob kontejner pro výstup
+    csv_prefix    - prefix denního CSV souboru (<prefix>_YYYYMMDD.csv)
+    csv_layout    - "quote"    -> sloupce quote_asset / value_usd (jeden blok řádků za quote měnu)
+                    "exchange" -> sloupce exchange / quantity_usd (jen USD trhy)
+    bands         - předvolba pásem z BAND_PRESETS
+    depth_limit   - hloubka REST snapshotu /api/v3/depth
+    markets       - trhy; trhy se stejnou "quote" se slučují, "fx" je symbol pro převod quote -> USD
+    consolidated_label - volitelně: quote_asset skupiny se všemi trhy sloučenými do jednoho USD booku
+
+Nový asset = nový záznam v ASSETS, bez nového modulu a bez nové Azure funkce.
+"""
+
+import os
+
+from Shared_Functions.fce_band_engine import LARGE_LEVELS, MEDIUM_LEVELS
+
+BAND_PRESETS = {
+    "medium": MEDIUM_LEVELS,
+    "large": LARGE_LEVELS
+}
+
+# Kolik assetů se zpracovává najednou v jednom běhu
+MAX_CONCURRENT_ASSETS = int(os.environ.get("COLLECTOR_MAX_CONCURRENT_ASSETS", "8"))
+VOLUME_MINUTES = 3
+
+# Časový rozpočet sběrné fáze jednoho vyvolání (všechny assety) a limit na jeden trh
+RUN_DEADLINE_SECONDS = float(os.environ.get("COLLECTOR_RUN_DEADLINE_SECONDS", "60"))
+SYMBOL_TIMEOUT_SECONDS = float(os.environ.get("COLLECTOR_SYMBOL_TIMEOUT_SECONDS", "15"))
+# Po kolika sekundách poslat k opožděnému depth požadavku záložní, 0 = vypnuto
+HEDGE_AFTER_SECONDS = float(os.environ.get("COLLECTOR_HEDGE_AFTER_SECONDS", "0"))
+
+ASSETS = [
+    {
+        "asset": "eth",
+        "container": "ethereum",
+        "csv_prefix": "eth_liquidity",
+        "csv_layout": "quote",
+        "bands": "medium",
+        "depth_limit": 2000,
+        "markets": [
+            {"symbol": "ETHUSDT", "quote": "USD"},
+            {"symbol": "ETHUSDC", "quote": "USD"},
+            {"symbol": "ETHBTC", "quote": "BTC", "fx": "BTCUSDT"}
+        ],
+        "consolidated_label": "ALL"
+    },
+    {
+        "asset": "aave",
+        "container": "aave",
+        "csv_prefix": "aave_liquidity",
+        "csv_layout": "exchange",
+        "bands": "medium",
+        "depth_limit": 1000,
+        "markets": [
+            {"symbol": "AAVEUSDT", "quote": "USD"}
+        ]
+    }
+]
@@ -0,0 +1,571 @@
+"""
+Společný kolektor likvidity pro všechny assety z collector_config.ASSETS.
+
+Jeden běh timeru zpracuje všechny assety souběžně (omezeno semaforem
+MAX_CONCURRENT_ASSETS) a sdílí jednoho BlobServiceClient i HTTP session
+na Binance (přes bránu fce_market_data, která slučuje stejné požadavky). Pro každý asset:
+    1. stáhne order booky všech trhů, FX ceny a objemy za VOLUME_MINUTES; sběr má
+       společný časový rozpočet RUN_DEADLINE_SECONDS a limit SYMBOL_TIMEOUT_SECONDS na trh,
+       trhy, které nedoběhnou, se vynechají a řádky dostanou status "partial"
+    2. slije surové booky trhů se stejnou quote měnou a agreguje je jednou do pásem
+    3. ze sloučených booků spočítá impact/slippage křivky a hloubku v bps
+    4. zapíše pásma a analytiku do denních CSV (append blob) a/nebo Parquet fragmentů
+    5. přičte běh do hodinových rollupů (fce_rollups) - průměr/rozptyl/min/max pásem,
+       spreadu, impact nákladu a objemu bez čtení denního souboru
+"""
+
+import asyncio
+import logging
+import os
+from datetime import date, datetime, timedelta
+from io import BytesIO
+
+from Shared_Functions.fce_band_engine import aggregate_levels
+from Shared_Functions.fce_blob_append import append_csv
+from Shared_Functions.fce_book_merge import consolidate_books
+from Shared_Functions.fce_deadline import Deadline, hedged
+from Shared_Functions.fce_depth_analytics import analyze_book
+from Shared_Functions.fce_depth_parser import parse_depth
+from Shared_Functions.fce_local_orderbook import get_stream_snapshot
+from Shared_Functions.fce_market_data import get_depth, get_price
+from Shared_Functions.fce_metrics import span
+from Shared_Functions.fce_parquet_store import compact_day, csv_output_enabled, parquet_output_enabled, write_fragment
+from Shared_Functions.fce_raw_archive import RAW_ARCHIVE_ENABLED, archive_snapshots
+from Shared_Functions.fce_rollups import (
+    ROLLUPS_ENABLED, build_rollups, iter_observations, replace_day_rollups, update_rollups
+)
+from Shared_Functions.fce_row_builder import FLOAT, INT, STRING, ColumnarRows
+from Shared_Functions.fce_volume_tracker import (
+    CURSOR_BLOB_NAME, dump_cursors, fetch_window_volumes, load_cursors, save_cursors
+)
+from Shared_Functions.fce_write_behind import get_journal, register_exit_flush
+
+from collector.collector_config import (
+    ASSETS, BAND_PRESETS, HEDGE_AFTER_SECONDS, MAX_CONCURRENT_ASSETS, RUN_DEADLINE_SECONDS, SYMBOL_TIMEOUT_SECONDS,
+    VOLUME_MINUTES
+)
+
+TIMESTAMP_FORMAT = "%Y-%m-%d %H:%M"
+EXCHANGE = "Binance"
+# Hodnoty sloupce status: skupina ze všech svých trhů / některé trhy v běhu chyběly (viz missing_markets)
+STATUS_OK = "ok"
+STATUS_PARTIAL = "partial"
+BLOB_SERVICE_CLIENT = None
+_EXIT_FLUSH_REGISTERED = False
+
+def create_blob_service_client():
+    # Azure SDK se načte až při prvním běhu, ne při importu (indexace funkcí hostem)
+    from azure.storage.blob.aio import BlobServiceClient
+
+    return BlobServiceClient(
+        account_url=f"https://{os.environ['STORAGE_ACCOUNT_NAME']}.blob.core.windows.net",
+        credential=os.environ['STORAGE_ACCOUNT_KEY']
+    )
+
+async def initialize_blob_client():
+    global BLOB_SERVICE_CLIENT
+    if BLOB_SERVICE_CLIENT is None:
+        BLOB_SERVICE_CLIENT = create_blob_service_client()
+
+def get_write_behind():
+    """Vrátí write-behind journal (None pokud je vypnutý), při prvním použití zaregistruje flush při ukončení."""
+    global _EXIT_FLUSH_REGISTERED
+    journal = get_journal()
+    if journal is not None and not _EXIT_FLUSH_REGISTERED:
+        register_exit_flush(journal, create_blob_service_client)
+        _EXIT_FLUSH_REGISTERED = True
+    return journal
+
+def get_asset_config(asset):
+    """Vrátí konfiguraci assetu podle názvu (KeyError pro neznámý asset)."""
+    for config in ASSETS:
+        if config["asset"] == asset:
+            return config
+    raise KeyError(f"Unknown asset: {asset}")
+
+def get_csv_filename(config, dataset=None, day=None):
+    day = day or date.today()
+    prefix = config['csv_prefix'] if dataset is None else f"{config['csv_prefix']}_{dataset}"
+    return f"{prefix}_{day.strftime('%Y%m%d')}.csv"
+
+def get_parquet_asset(config, dataset=None):
+    """Klíč Parquet partition (asset=...) pro pásma nebo analytický dataset."""
+    return config["asset"] if dataset is None else f"{config['asset']}_{dataset}"
+
+def get_level_mapping(levels):
+    """Čísla úrovní podle pořadí v předvolbě: asks 1, 2, ..., bids -1, -2, ..."""
+    mapping = {level["label"]: index + 1 for index, level in enumerate(levels["asks"])}
+    mapping.update({level["label"]: -(index + 1) for index, level in enumerate(levels["bids"])})
+    return mapping
+
+async def get_binance_price(symbol, timeout=None):
+    """Získá aktuální cenu pro daný symbol"""
+    try:
+        # Souběžné dotazy všech assetů jdou jedním dávkovým requestem
+        return await asyncio.wait_for(get_price(symbol), timeout)
+    except asyncio.TimeoutError:
+        # TimeoutError může přijít i bez vlastního limitu (klient, Deadline)
+        limit = f" after {timeout:.1f}s" if timeout is not None else ""
+        logging.error(f"Timed out fetching {symbol} price{limit}")
+        return None
+    except Exception as e:
+        logging.error(f"Error fetching {symbol} price: {e}")
+        return None
+
+async def get_market_snapshot(asset, symbol, depth_limit, deadline=None):
+    """
+    Vrátí DepthSnapshot trhu, None při chybě nebo po vypršení limitu.
+
+    Depth request má limit SYMBOL_TIMEOUT_SECONDS (nejvýš zbytek rozpočtu běhu),
+    s HEDGE_AFTER_SECONDS > 0 se k opožděnému requestu pošle záložní.
+    """
+    deadline = deadline or Deadline(RUN_DEADLINE_SECONDS)
+    try:
+        # Ve streaming režimu se použije lokální book udržovaný z WebSocketu, jinak REST snapshot
+        snapshot = get_stream_snapshot(symbol, depth_limit=depth_limit)
+        if snapshot is None:
+            timeout = deadline.timeout(SYMBOL_TIMEOUT_SECONDS)
+            payload = await hedged(
+                lambda: get_depth(symbol, depth_limit, deadline=timeout),
+                timeout,
+                hedge_after=HEDGE_AFTER_SECONDS,
+                hedge_factory=lambda: get_depth(symbol, depth_limit, deadline=timeout, hedge=True)
+            )
+            with span("json.decode", asset=asset, symbol=symbol, bytes_in=len(payload)) as decode_span:
+                snapshot = parse_depth(payload)
+                decode_span.set(rows=len(snapshot.bid_prices) + len(snapshot.ask_prices))
+        return snapshot
+    except asyncio.TimeoutError:
+        logging.error(f"Binance depth for {symbol} timed out")
+        return None
+    except Exception as e:
+        logging.error(f"Binance API error for {symbol}: {e}")
+        return None
+
+def aggregate_book(book, levels):
+    """
+    Agreguje sloučený book do pásem vůči jeho referenční ceně.
+
+    Returns:
+        dict: {'price', 'orderbook': {'asks', 'bids'}} s hodnotami pásem v USD
+    """
+    return {
+        'price': book.reference_price,
+        'orderbook': {
+            'asks': aggregate_levels(book.ask_prices, book.ask_notional, book.reference_price, levels, True,
+                                     quantities_are_notional=True),
+            'bids': aggregate_levels(book.bid_prices, book.bid_notional, book.reference_price, levels, False,
+                                     quantities_are_notional=True)
+        }
+    }
+
+async def fetch_asset_data(config, deadline=None):
+    """
+    Stáhne a agreguje data jednoho assetu.
+
+    Trhy se stejnou quote měnou se slijí do jednoho booku (ceny zůstávají v quote
+    měně, notional se hned převede na USD) a agregují se jednou. Pokud má asset
+    "consolidated_label", přidá se skupina se všemi trhy v jednom USD booku.
+    Trh, jehož book nebo FX kurz nedoběhl, se vynechá; chybějící nebo neúplný objem je NaN.
+
+    Args:
+        config (dict): konfigurace assetu
+        deadline (Deadline): rozpočet běhu, výchozí je nový RUN_DEADLINE_SECONDS
+
+    Returns:
+        dict: {quote: {'price', 'orderbook', 'impact', 'depth', 'volume_3min', 'volume_3min_usd',
+                       'status', 'missing_markets'}}
+              nebo None, pokud nedoběhl žádný trh
+    """
+    asset = config["asset"]
+    markets = config["markets"]
+    symbols = [market["symbol"] for market in markets]
+    fx_symbols = sorted({market["fx"] for market in markets if market.get("fx")})
+    deadline = deadline or Deadline(RUN_DEADLINE_SECONDS)
+
+    # Paralelní volání všech API včetně objemů
+    snapshots, fx_prices, volumes = await asyncio.gather(
+        asyncio.gather(*(get_market_snapshot(asset, symbol, config["depth_limit"], deadline) for symbol in symbols)),
+        asyncio.gather(*(get_binance_price(symbol, deadline.timeout(SYMBOL_TIMEOUT_SECONDS)) for symbol in fx_symbols)),
+        fetch_window_volumes(symbols, minutes=VOLUME_MINUTES, timeout=deadline.timeout(SYMBOL_TIMEOUT_SECONDS))
+    )
+    fx_prices = dict(zip(fx_symbols, fx_prices))
+    fx_rates = [fx_prices[market["fx"]] if market.get("fx") else 1.0 for market in markets]
+    # Bez kurzu nejde book převést na USD, trh se vynechá stejně jako při chybě booku
+    snapshots = [None if rate is None else snapshot for snapshot, rate in zip(snapshots, fx_rates)]
+    # Useknuté stránkování (complete=False) by objem podhodnotilo, zapíše se NaN
+    volumes = [
+        volumes[symbol]['notional'] if volumes[symbol] is not None and volumes[symbol]['complete'] else float("nan")
+        for symbol in symbols
+    ]
+
+    missing = [symbol for symbol, snapshot in zip(symbols, snapshots) if snapshot is None]
+    if len(missing) == len(symbols):
+        return None
+    if missing:
+        logging.warning(f"{asset.upper()} run without {', '.join(missing)}, saving partial data")
+
+    if RAW_ARCHIVE_ENABLED:
+        available = [index for index, snapshot in enumerate(snapshots) if snapshot is not None]
+        await archive_snapshots(BLOB_SERVICE_CLIENT.get_container_client(config["container"]),
+                                [symbols[index] for index in available], [snapshots[index] for index in available])
+
+    return build_liquidity_data(config, snapshots, fx_rates, volumes)
+
+def build_liquidity_data(config, snapshots, fx_rates, volumes):
+    """
+    Sloučí a agreguje snapshoty trhů assetu (bez síťové komunikace, používá i backfill).
+
+    Args:
+        config (dict): konfigurace assetu
+        snapshots (list): DepthSnapshot pro každý trh v pořadí config["markets"], None = trh chybí
+        fx_rates (list): kurz quote -> USD pro každý trh (1.0 pro USD stablecoiny)
+        volumes (list): notional obchodů za VOLUME_MINUTES v quote měně pro každý trh
+
+    Returns:
+        dict: {quote: {'price', 'orderbook', 'impact', 'depth', 'volume_3min', 'volume_3min_usd',
+                       'status', 'missing_markets'}}
+              skupina bez jediného dostupného trhu ve výsledku není
+    """
+    asset = config["asset"]
+    levels = BAND_PRESETS[config["bands"]]
+    markets = config["markets"]
+
+    groups = {}
+    for index, market in enumerate(markets):
+        groups.setdefault(market["quote"], []).append(index)
+    if config.get("consolidated_label"):
+        groups[config["consolidated_label"]] = list(range(len(markets)))
+
+    liquidity_data = {}
+    for label, group_indexes in groups.items():
+        consolidated = label == config.get("consolidated_label")
+        indexes = [index for index in group_indexes if snapshots[index] is not None]
+        if not indexes:
+            continue
+        missing = [markets[index]["symbol"] for index in group_indexes if snapshots[index] is None]
+        group_fx = [fx_rates[index] for index in indexes]
+        with span("aggregate", asset=asset, symbol=label):
+            book = consolidate_books(
+                [snapshots[index] for index in indexes],
+                group_fx,
+                None if consolidated else [1.0] * len(indexes)
+            )
+            aggregated = aggregate_book(book, levels)
+        with span("analytics", asset=asset, symbol=label):
+            analytics = analyze_book(book)
+        volume_usd = sum(volumes[index] * fx_rates[index] for index in indexes)
+        liquidity_data[label] = {
+            **aggregated,
+            **analytics,
+            # Objem v quote měně skupiny, sloučená skupina nemá jednu quote měnu
+            'volume_3min': volume_usd if consolidated else sum(volumes[index] for index in indexes),
+            'volume_3min_usd': volume_usd,
+            'status': STATUS_PARTIAL if missing else STATUS_OK,
+            'missing_markets': " ".join(missing)
+        }
+    return liquidity_data
+
+# Schémata výstupních datasetů (pořadí sloupců CSV)
+BAND_COLUMNS = {
+    "quote": [
+        ("timestamp", STRING), ("quote_asset", STRING), ("current_price", FLOAT), ("type", STRING),
+        ("level_number", INT), ("level_range", STRING), ("price", FLOAT), ("value_usd", FLOAT),
+        ("volume_3min_usd", FLOAT), ("status", STRING), ("missing_markets", STRING)
+    ],
+    "exchange": [
+        ("timestamp", STRING), ("exchange", STRING), ("current_price", FLOAT), ("type", STRING),
+        ("level_number", INT), ("level_range", STRING), ("price", FLOAT), ("quantity_usd", FLOAT),
+        ("volume_3min_usd", FLOAT), ("status", STRING), ("missing_markets", STRING)
+    ]
+}
+IMPACT_COLUMNS = [
+    ("timestamp", STRING), ("quote_asset", STRING), ("current_price", FLOAT), ("side", STRING),
+    ("size_usd", FLOAT), ("avg_price", FLOAT), ("slippage_bps", FLOAT), ("status", STRING),
+    ("missing_markets", STRING)
+]
+DEPTH_COLUMNS = [
+    ("timestamp", STRING), ("quote_asset", STRING), ("current_price", FLOAT), ("side", STRING),
+    ("distance_bps", FLOAT), ("depth_usd", FLOAT), ("status", STRING), ("missing_markets", STRING)
+]
+
+def format_data_for_csv(config, liquidity_data, run_time=None, rows=None):
+    """
+    Převede agregovaná data assetu na řádky denního CSV podle config["csv_layout"].
+
+    Args:
+        config (dict): konfigurace assetu
+        liquidity_data (dict): výstup fetch_asset_data
+        run_time (datetime): čas běhu (UTC), výchozí je aktuální čas
+        rows (ColumnarRows): builder, do kterého se řádky připojí; None = nový
+
+    Returns:
+        ColumnarRows: řádky v pořadí quote měn, v rámci quote nejdřív asks, potom bids
+    """
+    quote_layout = config["csv_layout"] == "quote"
+    rows = rows if rows is not None else ColumnarRows(BAND_COLUMNS[config["csv_layout"]])
+    timestamp = (run_time or datetime.utcnow()).strftime(TIMESTAMP_FORMAT)
+    level_mapping = get_level_mapping(BAND_PRESETS[config["bands"]])
+
+    for quote_asset, exchange_data in liquidity_data.items():
+        for side, orders in (('ask', exchange_data['orderbook']['asks']), ('bid', exchange_data['orderbook']['bids'])):
+            if not orders:
+                continue
+            prices, values, labels = zip(*orders)
+            layout_columns = {'quote_asset': quote_asset, 'value_usd': values} if quote_layout \
+                else {'exchange': EXCHANGE, 'quantity_usd': values}
+            rows.append_block(
+                len(orders),
+                timestamp=timestamp,
+                current_price=exchange_data['price'],
+                type=side,
+                level_number=[level_mapping[label] for label in labels],
+                level_range=labels,
+                price=prices,
+                volume_3min_usd=exchange_data.get('volume_3min_usd', exchange_data.get('volume_3min', 0)),
+                status=exchange_data.get('status', STATUS_OK),
+                missing_markets=exchange_data.get('missing_markets', ""),
+                **layout_columns
+            )
+    return rows
+
+def format_impact_for_csv(liquidity_data, run_time=None, rows=None):
+    """Řádky impact křivek: průměrná cena plnění a slippage pro každou velikost příkazu."""
+    rows = rows if rows is not None else ColumnarRows(IMPACT_COLUMNS)
+    timestamp = (run_time or datetime.utcnow()).strftime(TIMESTAMP_FORMAT)
+    for quote_asset, exchange_data in liquidity_data.items():
+        if not exchange_data['impact']:
+            continue
+        sides, sizes, avg_prices, slippages = zip(*exchange_data['impact'])
+        rows.append_block(
+            len(sides),
+            timestamp=timestamp,
+            quote_asset=quote_asset,
+            current_price=exchange_data['price'],
+            side=sides,
+            size_usd=sizes,
+            avg_price=avg_prices,
+            slippage_bps=slippages,
+            status=exchange_data.get('status', STATUS_OK),
+            missing_markets=exchange_data.get('missing_markets', "")
+        )
+    return rows
+
+def format_depth_for_csv(liquidity_data, run_time=None, rows=None):
+    """Řádky hloubky: notional do dané vzdálenosti od ceny v bps."""
+    rows = rows if rows is not None else ColumnarRows(DEPTH_COLUMNS)
+    timestamp = (run_time or datetime.utcnow()).strftime(TIMESTAMP_FORMAT)
+    for quote_asset, exchange_data in liquidity_data.items():
+        if not exchange_data['depth']:
+            continue
+        sides, distances, depths = zip(*exchange_data['depth'])
+        rows.append_block(
+            len(sides),
+            timestamp=timestamp,
+            quote_asset=quote_asset,
+            current_price=exchange_data['price'],
+            side=sides,
+            distance_bps=distances,
+            depth_usd=depths,
+            status=exchange_data.get('status', STATUS_OK),
+            missing_markets=exchange_data.get('missing_markets', "")
+        )
+    return rows
+
+# Analytické datasety ukládané vedle pásem: <csv_prefix>_<dataset>_YYYYMMDD.csv, Parquet asset=<asset>_<dataset>
+ANALYTICS_DATASETS = {
+    "impact": format_impact_for_csv,
+    "depth": format_depth_for_csv
+}
+
+def format_frames(config, liquidity_data, run_time=None, frames=None):
+    """
+    Všechny výstupní datasety jednoho běhu.
+
+    Args:
+        frames (dict): výsledek předchozího volání, řádky se připojí do stejných builderů
+
+    Returns:
+        dict: dataset -> ColumnarRows, None = pásma, ostatní klíče z ANALYTICS_DATASETS
+    """
+    frames = frames or {}
+    frames[None] = format_data_for_csv(config, liquidity_data, run_time, frames.get(None))
+    for dataset, formatter in ANALYTICS_DATASETS.items():
+        frames[dataset] = formatter(liquidity_data, run_time, frames.get(dataset))
+    return frames
+
+# Sloupec skupiny a notional pásma podle csv_layout (pro rollupy)
+ROLLUP_COLUMNS = {
+    "quote": ("quote_asset", "value_usd"),
+    "exchange": ("exchange", "quantity_usd")
+}
+
+def rollup_observations(config, frames):
+    """Hodnoty pro hodinové rollupy z naformátovaných řádků (pásma + impact)."""
+    group_column, value_column = ROLLUP_COLUMNS[config["csv_layout"]]
+    return iter_observations(frames[None], frames.get("impact"), group_column, value_column)
+
+async def update_asset_rollups(container_client, config, frames, journal=None):
+    """Přičte běh do hodinového rollupu assetu; chyba rollupu neukončí běh (data už jsou uložená)."""
+    try:
+        with span("rollup", asset=config["asset"]):
+            await update_rollups(container_client, config["asset"], rollup_observations(config, frames), journal)
+    except Exception as e:
+        logging.error(f"Error updating {config['asset']} rollups: {e}")
+
+async def rebuild_rollups(container_client, config, day):
+    """
+    Přepočítá hodinové rollupy dne z denních CSV (pásma + impact), např. po ztrátě rollup blobů.
+
+    Returns:
+        int | None: Počet zapsaných hodin, None pokud denní CSV pásem chybí
+    """
+    import pandas as pd
+
+    frames = {}
+    for dataset in (None, "impact"):
+        filename = get_csv_filename(config, dataset, day)
+        try:
+            downloader = await container_client.get_blob_client(filename).download_blob()
+            frames[dataset] = pd.read_csv(
+                BytesIO(await downloader.readall()), dtype={"timestamp": str}, float_precision="round_trip"
+            )
+        except Exception as e:
+            if dataset is None:
+                logging.error(f"Cannot rebuild {config['asset']} rollups, failed to read {filename}: {e}")
+                return None
+            logging.warning(f"Rebuilding {config['asset']} rollups without impact cost, failed to read {filename}: {e}")
+    rollups = build_rollups(config["asset"], rollup_observations(config, frames))
+    return await replace_day_rollups(container_client, config["asset"], day, rollups)
+
+async def save_to_blob_storage(config, data):
+    asset = config["asset"]
+    try:
+        with span("format", asset=asset) as format_span:
+            frames = format_frames(config, data)
+            format_span.set(rows=sum(len(rows) for rows in frames.values()))
+
+        container_client = BLOB_SERVICE_CLIENT.get_container_client(config["container"])
+        journal = get_write_behind()
+        for dataset, rows in frames.items():
+            filename = get_csv_filename(config, dataset)
+            if journal is not None:
+                # Write-behind: jen lokální journal, do blobů se řádky nahrají dávkově
+                with span("serialize.csv", asset=asset, rows=len(rows)) as serialize_span:
+                    csv_data = rows.to_csv()
+                    serialize_span.set(bytes_out=len(csv_data))
+                journal.append(
+                    config["container"],
+                    csv_data,
+                    csv_blob=filename if csv_output_enabled() else None,
+                    parquet_asset=get_parquet_asset(config, dataset) if parquet_output_enabled() else None,
+                    columns=rows.schema
+                )
+                continue
+            if csv_output_enabled():
+                # Append blob - po síti jdou jen řádky z tohoto běhu, ne celý denní soubor
+                with span("serialize.csv", asset=asset, rows=len(rows)) as serialize_span:
+                    csv_data = rows.to_csv()
+                    serialize_span.set(bytes_out=len(csv_data))
+                await append_csv(container_client, filename, csv_data)
+                logging.info(f"Data successfully appended to CSV: {filename}")
+            if parquet_output_enabled():
+                fragment_name = await write_fragment(container_client, get_parquet_asset(config, dataset), rows.to_pandas())
+                logging.info(f"Parquet fragment written: {fragment_name}")
+        if ROLLUPS_ENABLED:
+            await update_asset_rollups(container_client, config, frames, journal)
+    except Exception as e:
+        logging.error(f"Error saving {asset} to blob storage: {str(e)}")
+        raise
+
+async def collect_asset(config, deadline=None):
+    """Jeden běh sběru pro jeden asset. Vrací True při úspěšném uložení (i částečných dat)."""
+    asset = config["asset"]
+    with span("run", asset=asset):
+        try:
+            container_client = BLOB_SERVICE_CLIENT.get_container_client(config["container"])
+            await load_cursors(container_client)
+
+            liquidity_data = await fetch_asset_data(config, deadline)
+            if not liquidity_data:
+                logging.error(f"Failed to fetch any {asset} market data")
+                return False
+
+            await save_to_blob_storage(config, liquidity_data)
+            symbols = [market["symbol"] for market in config["markets"]]
+            journal = get_write_behind()
+            if journal is not None:
+                # Stav kurzorů se nahraje s dávkou řádků, ne v každém běhu
+                journal.put(config["container"], CURSOR_BLOB_NAME, dump_cursors(symbols))
+            else:
+                await save_cursors(container_client, symbols)
+            logging.info(f"{asset.upper()} liquidity data successfully saved to Blob Storage")
+            return True
+        except Exception as e:
+            logging.error(f"Error collecting {asset} liquidity: {str(e)}")
+            return False
+
+async def collect_assets(assets=None):
+    """
+    Spustí sběr pro vybrané assety (výchozí všechny z ASSETS) souběžně.
+
+    Args:
+        assets (list): názvy assetů, None = všechny
+
+    Returns:
+        dict: asset -> True/False podle úspěchu
+    """
+    configs = ASSETS if assets is None else [get_asset_config(asset) for asset in assets]
+    await initialize_blob_client()
+    semaphore = asyncio.Semaphore(MAX_CONCURRENT_ASSETS)
+    # Jeden rozpočet pro celé vyvolání, assety čekající na semafor mají méně času
+    deadline = Deadline(RUN_DEADLINE_SECONDS)
+
+    async def run(config):
+        async with semaphore:
+            return await collect_asset(config, deadline)
+
+    results = await asyncio.gather(*(run(config) for config in configs))
+    journal = get_write_behind()
+    if journal is not None:
+        journal.record_run()
+        await flush_write_behind()
+    return {config["asset"]: result for config, result in zip(configs, results)}
+
+async def flush_write_behind(force=False):
+    """Nahraje write-behind journal, pokud je splněná podmínka dávky (nebo force)."""
+    journal = get_write_behind()
+    if journal is None or not (force or journal.should_flush()):
+        return
+    try:
+        await journal.flush(BLOB_SERVICE_CLIENT.get_container_client)
+    except Exception as e:
+        logging.error(f"Write-behind flush failed, entries stay in journal: {str(e)}")
+
+async def compact_previous_day(assets=None):
+    """Sloučí Parquet fragmenty předchozího dne do jednoho souboru pro každý asset."""
+    configs = ASSETS if assets is None else [get_asset_config(asset) for asset in assets]
+    await initialize_blob_client()
+    day = datetime.utcnow().date() - timedelta(days=1)
+    # Řádky předchozího dne čekající v journalu musí být ve fragmentech před kompakcí
+    await flush_write_behind(force=True)
+    for config in configs:
+        try:
+            container_client = BLOB_SERVICE_CLIENT.get_container_client(config["container"])
+            for dataset in [None, *ANALYTICS_DATASETS]:
+                await compact_day(container_client, get_parquet_asset(config, dataset), day)
+        except Exception as e:
+            logging.error(f"Error in {config['asset']} parquet compaction: {str(e)}")
+
+async def liquidity_collector_impl(timer):
+    logging.info('Azure Function triggered for liquidity collection by timer.')
+    results = await collect_assets()
+    failed = [asset for asset, ok in results.items() if not ok]
+    if failed:
+        logging.error(f"Liquidity collection failed for: {', '.join(failed)}")
+
+async def parquet_compaction_impl(timer):
+    if not parquet_output_enabled():
+        return
+    logging.info('Azure Function triggered for Parquet compaction by timer.')
+    await compact_previous_day()
@@ -0,0 +1 @@
+"""ETH likvidita - obálka nad společným kolektorem."""
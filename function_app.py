@@ -1,13 +1,18 @@
 import azure.functions as func
-from aave.aave_logic import aave_liquidity_storage_impl
-from eth.eth_logic import eth_liquidity_storage_impl
 
 app = func.FunctionApp()
 
+# Kolektor (pandas-free, ale s numpy, aiohttp a Azure SDK) se importuje až v prvním
+# běhu timeru - indexace funkcí při cold startu načítá jen azure.functions.
+# Jeden timer pro všechny assety z collector/collector_config.py
 @app.schedule(schedule="0 */3 * * * *", arg_name="timer")
-async def aave_liquidity_storage(timer: func.TimerRequest) -> None:
-    await aave_liquidity_storage_impl(timer)
+async def liquidity_collector(timer: func.TimerRequest) -> None:
+    from collector.collector_logic import liquidity_collector_impl
 
-@app.schedule(schedule="0 */3 * * * *", arg_name="timer")
-async def eth_liquidity_storage(timer: func.TimerRequest) -> None:
-    await eth_liquidity_storage_impl(timer)
\ No newline at end of file
+    await liquidity_collector_impl(timer)
+
+@app.schedule(schedule="0 15 0 * * *", arg_name="timer")
+async def parquet_compaction(timer: func.TimerRequest) -> None:
+    from collector.collector_logic import parquet_compaction_impl
+
+    await parquet_compaction_impl(timer)
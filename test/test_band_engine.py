@@ -0,0 +1,88 @@
+"""
+Hranice pásem vektorizované agregace (fce_band_engine) proti původním cyklům po úrovních.
+
+Spuštění:
+    python -m pytest test
+"""
+
+import math
+import unittest
+
+from Shared_Functions.fce_aggregate_orders_Large import aggregate_orders_by_levels
+from Shared_Functions.fce_aggregate_orders_Medium import aggregate_orders_by_levels_medium
+from Shared_Functions.fce_band_engine import LARGE_LEVELS, MEDIUM_LEVELS, aggregate_bands
+
+# Při ceně 100 vychází vzdálenost hraničních cen v procentech přesně (100.25 -> 0.25 %)
+CURRENT_PRICE = 100.0
+# Hrany obou předvoleb, ceny těsně za nimi, úroveň přesně na ceně a na špatné straně booku
+ASK_PRICES = [99.99, 100.0, 100.1, 100.25, 100.26, 100.5, 100.75, 101.0, 101.01, 101.5, 102.0, 103.0, 103.01]
+BID_PRICES = [100.01, 100.0, 99.9, 99.75, 99.74, 99.5, 99.25, 99.0, 98.99, 98.5, 98.0, 97.0, 96.99]
+
+
+def book(prices):
+    return [[price, index + 1.0] for index, price in enumerate(prices)]
+
+
+def reference_aggregate(orders, current_price, levels, is_asks):
+    """Původní agregace: první pásmo, do kterého úroveň padne (asks min <= d <= max, bids min <= d < max)."""
+    level_ranges = levels["asks"] if is_asks else levels["bids"]
+    aggregated = {level["label"]: [] for level in level_ranges}
+    for price, quantity in orders:
+        price_diff_percent = ((price - current_price) / current_price) * 100
+        for level in level_ranges:
+            if is_asks and level["min"] <= price_diff_percent <= level["max"]:
+                aggregated[level["label"]].append((price, quantity * price))
+                break
+            if not is_asks and level["min"] <= price_diff_percent < level["max"]:
+                aggregated[level["label"]].append((price, quantity * price))
+                break
+
+    result = []
+    for level in level_ranges:
+        orders_in_level = aggregated[level["label"]]
+        if orders_in_level:
+            best_price = (min if is_asks else max)(order[0] for order in orders_in_level)
+            result.append((best_price, sum(order[1] for order in orders_in_level), level["label"]))
+    return sorted(result, key=lambda x: x[0], reverse=not is_asks)
+
+
+class BandEdgesTest(unittest.TestCase):
+    def assertLevelsEqual(self, actual, expected):
+        self.assertEqual([(price, label) for price, _, label in actual],
+                         [(price, label) for price, _, label in expected])
+        for (_, actual_notional, _), (_, expected_notional, _) in zip(actual, expected):
+            self.assertTrue(math.isclose(actual_notional, expected_notional, rel_tol=1e-12))
+
+    def test_band_counts_on_edges(self):
+        cases = [
+            (MEDIUM_LEVELS, True, ASK_PRICES, [3, 4]),
+            (MEDIUM_LEVELS, False, BID_PRICES, [2, 4]),
+            (LARGE_LEVELS, True, ASK_PRICES, [5, 4, 2]),
+            (LARGE_LEVELS, False, BID_PRICES, [4, 4, 2])
+        ]
+        for levels, is_asks, prices, counts in cases:
+            with self.subTest(levels=len(levels["asks"]), is_asks=is_asks):
+                quantities = [quantity for _, quantity in book(prices)]
+                bands = aggregate_bands(prices, quantities, CURRENT_PRICE, levels["asks" if is_asks else "bids"], is_asks)
+                self.assertEqual(bands["count"].tolist(), counts)
+
+    def test_edges_match_per_level_loops(self):
+        for name, func, levels in (("medium", aggregate_orders_by_levels_medium, MEDIUM_LEVELS),
+                                   ("large", aggregate_orders_by_levels, LARGE_LEVELS)):
+            for is_asks, prices in ((True, ASK_PRICES), (False, BID_PRICES)):
+                with self.subTest(levels=name, is_asks=is_asks):
+                    orders = book(prices)
+                    self.assertLevelsEqual(func(orders, CURRENT_PRICE, is_asks),
+                                           reference_aggregate(orders, CURRENT_PRICE, levels, is_asks))
+
+    def test_best_price_of_each_band(self):
+        asks = aggregate_orders_by_levels(book(ASK_PRICES), CURRENT_PRICE, True)
+        bids = aggregate_orders_by_levels(book(BID_PRICES), CURRENT_PRICE, False)
+        self.assertEqual([(price, label) for price, _, label in asks],
+                         [(100.0, "0-0.5%"), (100.75, "0.5-1.5%"), (102.0, "1.5-3%")])
+        self.assertEqual([(price, label) for price, _, label in bids],
+                         [(99.9, "0 to -0.5%"), (99.25, "-0.5 to -1.5%"), (98.0, "-1.5 to -3%")])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,101 @@
+"""
+Přepis denních CSV v append blobech (fce_blob_append) přerušený chybou nebo pádem.
+
+Spuštění:
+    python -m pytest test
+"""
+
+import asyncio
+import os
+import tempfile
+import unittest
+
+from Shared_Functions import fce_blob_append
+from Shared_Functions.fce_blob_append import append_csv, staging_blob_name
+from Shared_Functions.fce_local_blob import LocalBlobServiceClient
+
+CONTAINER = "liquidity"
+
+
+class SimulatedCrash(BaseException):
+    """Ukončení procesu uprostřed přepisu."""
+
+
+class FailingContainer:
+    """Container client, jehož první append_block do vybraného blobu selže danou výjimkou."""
+
+    def __init__(self, container_client, fail_blob, error):
+        self._container_client = container_client
+        self.fail_blob = fail_blob
+        self.error = error
+
+    def __getattr__(self, name):
+        return getattr(self._container_client, name)
+
+    def get_blob_client(self, blob):
+        blob_client = self._container_client.get_blob_client(blob)
+        if blob == self.fail_blob and self.error is not None:
+            container = self
+
+            async def append_block(data, **kwargs):
+                error, container.error = container.error, None
+                raise error
+            blob_client.append_block = append_block
+        return blob_client
+
+
+def restart_process():
+    fce_blob_append._CHECKED_HEADERS.clear()
+    fce_blob_append._CHECKED_STAGING.clear()
+
+
+class AppendRewriteTest(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.container_client = LocalBlobServiceClient(self._tmp.name).get_container_client(CONTAINER)
+        restart_process()
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def read_blob(self, name):
+        with open(os.path.join(self._tmp.name, CONTAINER, name), encoding="utf-8") as f:
+            return f.read()
+
+    def test_failed_block_blob_conversion_keeps_content(self):
+        asyncio.run(self.container_client.upload_blob("day.csv", "h\n1\n"))
+        failing = FailingContainer(self.container_client, "day.csv", RuntimeError("append failed"))
+
+        with self.assertRaises(RuntimeError):
+            asyncio.run(append_csv(failing, "day.csv", "h\n2\n"))
+        self.assertEqual(self.read_blob(staging_blob_name("day.csv")), "h\n1\n")
+
+        asyncio.run(append_csv(failing, "day.csv", "h\n2\n"))
+        self.assertEqual(self.read_blob("day.csv"), "h\n1\n2\n")
+        self.assertFalse(os.path.exists(os.path.join(self._tmp.name, CONTAINER, staging_blob_name("day.csv"))))
+
+    def test_crash_during_block_blob_conversion_restores_after_restart(self):
+        asyncio.run(self.container_client.upload_blob("day.csv", "h\n1\n"))
+        failing = FailingContainer(self.container_client, "day.csv", SimulatedCrash())
+
+        with self.assertRaises(SimulatedCrash):
+            asyncio.run(append_csv(failing, "day.csv", "h\n2\n"))
+        restart_process()
+
+        asyncio.run(append_csv(self.container_client, "day.csv", "h\n2\n"))
+        self.assertEqual(self.read_blob("day.csv"), "h\n1\n2\n")
+
+    def test_crash_during_column_rewrite_restores_after_restart(self):
+        asyncio.run(append_csv(self.container_client, "day.csv", "a,b\n1,2\n"))
+        failing = FailingContainer(self.container_client, "day.csv", SimulatedCrash())
+
+        with self.assertRaises(SimulatedCrash):
+            asyncio.run(append_csv(failing, "day.csv", "a,c,b\n3,4,5\n"))
+        restart_process()
+
+        asyncio.run(append_csv(self.container_client, "day.csv", "a,c,b\n3,4,5\n"))
+        self.assertEqual(self.read_blob("day.csv").replace("\r\n", "\n"), "a,c,b\n1,,2\n3,4,5\n")
+
+
+if __name__ == "__main__":
+    unittest.main()
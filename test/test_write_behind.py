@@ -0,0 +1,164 @@
+"""
+Simulované chyby a pády během flushe write-behind journalu (fce_write_behind).
+
+Spuštění:
+    python -m pytest test
+"""
+
+import asyncio
+import os
+import tempfile
+import unittest
+from datetime import datetime
+
+from Shared_Functions.fce_blob_cache import LocalBlobCache
+from Shared_Functions.fce_liquidity_query import query_liquidity
+from Shared_Functions.fce_local_blob import LocalBlobServiceClient
+from Shared_Functions.fce_parquet_store import write_fragment
+from Shared_Functions.fce_row_builder import FLOAT, STRING, ColumnarRows
+from Shared_Functions.fce_write_behind import WriteBehindJournal
+
+CONTAINER = "liquidity"
+DEPTH_COLUMNS = [
+    ("timestamp", STRING), ("quote_asset", STRING), ("side", STRING), ("distance_bps", FLOAT),
+    ("depth_usd", FLOAT), ("status", STRING), ("missing_markets", STRING)
+]
+
+
+class SimulatedCrash(BaseException):
+    """Ukončení procesu uprostřed flushe - journal v paměti už nic neobnoví."""
+
+
+class FailingService:
+    """Service client, jehož append do vybraného blobu jednou selže daným výjimkou."""
+
+    def __init__(self, root, fail_blob, error):
+        self._service = LocalBlobServiceClient(root)
+        self.fail_blob = fail_blob
+        self.error = error
+
+    def get_container_client(self, container):
+        container_client = self._service.get_container_client(container)
+        service = self
+
+        class Container:
+            def __getattr__(self, name):
+                return getattr(container_client, name)
+
+            def get_blob_client(self, blob):
+                blob_client = container_client.get_blob_client(blob)
+                if blob == service.fail_blob and service.error is not None:
+                    async def append_block(data, **kwargs):
+                        error, service.error = service.error, None
+                        raise error
+                    blob_client.append_block = append_block
+                return blob_client
+
+        return Container()
+
+
+def read_blob(root, name):
+    with open(os.path.join(root, CONTAINER, name), encoding="utf-8") as f:
+        return f.read()
+
+
+class WriteBehindFlushTest(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.root = os.path.join(self._tmp.name, "blobs")
+        self.journal_dir = os.path.join(self._tmp.name, "journal")
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def fill(self, journal):
+        journal.append(CONTAINER, "h\n1\n", csv_blob="a.csv")
+        journal.append(CONTAINER, "h\n2\n", csv_blob="b.csv")
+        journal.put(CONTAINER, "state/cursors.json", '{"run": 1}')
+        journal.put(CONTAINER, "state/cursors.json", '{"run": 2}')
+
+    def test_failed_group_does_not_duplicate_delivered_rows(self):
+        journal = WriteBehindJournal(self.journal_dir)
+        self.fill(journal)
+        service = FailingService(self.root, "b.csv", RuntimeError("append failed"))
+
+        with self.assertRaises(RuntimeError):
+            asyncio.run(journal.flush(service.get_container_client))
+        self.assertEqual(read_blob(self.root, "a.csv"), "h\n1\n")
+        self.assertEqual(journal.pending(), 3)
+
+        self.assertEqual(asyncio.run(journal.flush(service.get_container_client)), 3)
+        self.assertEqual(read_blob(self.root, "a.csv"), "h\n1\n")
+        self.assertEqual(read_blob(self.root, "b.csv"), "h\n2\n")
+        self.assertEqual(read_blob(self.root, "state/cursors.json"), '{"run": 2}')
+        self.assertEqual(os.listdir(self.journal_dir), [])
+
+    def test_crash_after_partial_delivery_replays_only_undelivered(self):
+        journal = WriteBehindJournal(self.journal_dir)
+        self.fill(journal)
+        service = FailingService(self.root, "b.csv", SimulatedCrash())
+
+        with self.assertRaises(SimulatedCrash):
+            asyncio.run(journal.flush(service.get_container_client))
+
+        restarted = WriteBehindJournal(self.journal_dir)
+        self.assertEqual(restarted.pending(), 3)
+        asyncio.run(restarted.flush(service.get_container_client))
+        self.assertEqual(read_blob(self.root, "a.csv"), "h\n1\n")
+        self.assertEqual(read_blob(self.root, "b.csv"), "h\n2\n")
+        self.assertEqual(read_blob(self.root, "state/cursors.json"), '{"run": 2}')
+        self.assertEqual(os.listdir(self.journal_dir), [])
+
+    def test_entries_written_during_failed_flush_are_kept(self):
+        journal = WriteBehindJournal(self.journal_dir)
+        self.fill(journal)
+        service = FailingService(self.root, "b.csv", RuntimeError("append failed"))
+
+        with self.assertRaises(RuntimeError):
+            asyncio.run(journal.flush(service.get_container_client))
+        journal.append(CONTAINER, "h\n3\n", csv_blob="a.csv")
+
+        restarted = WriteBehindJournal(self.journal_dir)
+        self.assertEqual(restarted.pending(), 4)
+        asyncio.run(restarted.flush(service.get_container_client))
+        self.assertEqual(read_blob(self.root, "a.csv"), "h\n1\n3\n")
+        self.assertEqual(read_blob(self.root, "b.csv"), "h\n2\n")
+
+
+def depth_rows(timestamp, depth_usd):
+    rows = ColumnarRows(DEPTH_COLUMNS)
+    rows.append_block(2, timestamp=timestamp, quote_asset="USDT", side=["ask", "bid"], distance_bps=10.0,
+                      depth_usd=[depth_usd, None], status="ok", missing_markets="")
+    return rows
+
+
+class WriteBehindParquetTest(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.service = LocalBlobServiceClient(os.path.join(self._tmp.name, "blobs"))
+        self.container_client = self.service.get_container_client(CONTAINER)
+        self.cache = LocalBlobCache(os.path.join(self._tmp.name, "cache"))
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def test_query_day_written_by_journal_and_directly(self):
+        # Prázdný missing_markets ve všech řádcích dávky - pandas.read_csv by z něj udělal float
+        journal = WriteBehindJournal(os.path.join(self._tmp.name, "journal"))
+        for minute, depth_usd in ((0, 1.5), (3, 2.5)):
+            rows = depth_rows(f"2024-01-01 10:0{minute}", depth_usd)
+            journal.append(CONTAINER, rows.to_csv(), parquet_asset="eth_depth",
+                           run_time=datetime(2024, 1, 1, 10, minute, 30), columns=rows.schema)
+        asyncio.run(journal.flush(self.service.get_container_client))
+        asyncio.run(write_fragment(self.container_client, "eth_depth", depth_rows("2024-01-01 10:06", 3.5).to_pandas(),
+                                   run_time=datetime(2024, 1, 1, 10, 6, 30)))
+
+        df = asyncio.run(query_liquidity(self.container_client, "eth_depth", datetime(2024, 1, 1, 10),
+                                         datetime(2024, 1, 1, 11), cache=self.cache))
+        self.assertEqual(df["timestamp"].dt.minute.tolist(), [0, 0, 3, 3, 6, 6])
+        self.assertEqual(df["depth_usd"].dropna().tolist(), [1.5, 2.5, 3.5])
+        self.assertEqual(df["missing_markets"].astype(str).tolist(), [""] * 6)
+
+
+if __name__ == "__main__":
+    unittest.main()